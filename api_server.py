@@ -1,15 +1,67 @@
 """
-FastAPI server for additional endpoints (roadmap generation)
-Runs separately from LangGraph dev server
+FastAPI server for the career coach: chat (in-process graph) and roadmaps
+
+Serves the full product from one process. The chat endpoints run the
+compiled graph from app/graph.py directly, so there's no extra hop to the
+LangGraph dev server (which still works for Studio debugging).
+
+Development:
+    python api_server.py
+
+Production (N worker processes sharing one SQLite cache and chat sessions):
+    python api_server.py --workers 4 --host 0.0.0.0 --port 8000
 """
-from fastapi import FastAPI
+import argparse
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import uvicorn
 
-from app.roadmap import generate_roadmap
+from app.action_plans import action_plan_stats
+from app.admission import get_admission
+from app.cache import close_cache
+from app.config import load_env
+from app.deadlines import deadline_stats
+from app.discovery import discovery_stats
+from app.fast_json import dumps
+from app.greeting import greeting_stats, refresh_first_question
+from app.history import history_page, history_stats
+from app.providers import provider_stats
+from app.question_bank import question_bank_stats
+from app.graph import (
+    arun_career_coach,
+    arun_career_coach_stream,
+    close_session_store,
+    reset_conversation,
+    serialize_message,
+    session_store_stats,
+    turn_locks,
+)
+from app.roadmap import generate_roadmap, stream_roadmap
+from app.roadmap_prefetch import prefetch_stats
+from app.roadmap_warmup import start_warmup, stop_warmup, warmup_stats
+
 
-app = FastAPI(title="Career Coach API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Have an LLM-written opening question ready before the first session
+    refresh_first_question()
+    # ROADMAP_WARMUP=true: pre-generate catalog roadmaps in the background
+    start_warmup()
+    yield
+    stop_warmup()
+    # Graceful shutdown: in-flight requests have drained by now
+    close_cache()
+    close_session_store()
+
+
+app = FastAPI(title="Career Coach API", lifespan=lifespan)
 
 # CORS - UPDATED to allow your actual port
 app.add_middleware(
@@ -36,13 +88,192 @@ class RoadmapRequest(BaseModel):
 @app.post("/generate-roadmap")
 async def create_roadmap(request: RoadmapRequest):
     """Generate a career roadmap"""
-    roadmap = generate_roadmap(request.goal)
+    # generate_roadmap blocks on the provider; keep it off the event loop
+    roadmap = await run_in_threadpool(generate_roadmap, request.goal)
     return {"roadmap": roadmap}
 
+class ChatRequest(BaseModel):
+    message: str
+    thread_id: str = "default"
+
+
+class ResetRequest(BaseModel):
+    thread_id: str = "default"
+
+
+def chat_payload(result: dict) -> dict:
+    """JSON-friendly subset of a run_career_coach result"""
+    state = result.get("state") or {}
+    return {
+        "response": result.get("response", ""),
+        "phase": result.get("phase", "unknown"),
+        "recommendations": result.get("recommendations", []),
+        "questions_asked": state.get("questions_asked", 0),
+        "profile_completeness": state.get("profile_completeness", 0.0),
+    }
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    """
+    Run one conversation turn and return the assistant's reply
+
+    If a newer message on the same thread supersedes this turn, the reply
+    is empty with phase "superseded"; the newer request answers both.
+    """
+    result = await arun_career_coach(request.message, request.thread_id)
+    return chat_payload(result)
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Run one conversation turn, streaming server-sent events
+
+    Events: `message` for each new assistant message, `state` whenever
+    phase/progress changes, and a final `done` with the latest state.
+    """
+    async def events():
+        seen_ids = None
+        last_state = None
+        latest = {}
+        async for update in arun_career_coach_stream(request.message, request.thread_id):
+            messages = update.get("messages", [])
+            if seen_ids is None:
+                seen_ids = set()
+                # First update is the input state: everything in it is old news.
+                # Unless the turn failed before the graph ran: then it is the error reply
+                if update.get("phase") != "error":
+                    seen_ids.update(getattr(m, "id", None) for m in messages)
+                    messages = []
+            for msg in messages:
+                payload = serialize_message(msg)
+                if payload["role"] == "assistant" and payload["id"] not in seen_ids:
+                    seen_ids.add(payload["id"])
+                    yield sse_format("message", payload)
+            progress = {
+                "phase": update.get("phase", "unknown"),
+                "questions_asked": update.get("questions_asked", 0),
+                "profile_completeness": update.get("profile_completeness", 0.0),
+            }
+            if progress != last_state:
+                last_state = progress
+                yield sse_format("state", progress)
+            latest = {**progress, "recommendations": update.get("top_recommendations", [])}
+        yield sse_format("done", latest)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with app.fast_json (orjson when installed)"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+@app.get("/history", response_class=FastJSONResponse)
+async def history(thread_id: str = "default", limit: Optional[int] = None, cursor: Optional[str] = None,
+                  since: Optional[str] = None, fields: Optional[str] = None):
+    """
+    Conversation history, profile and recommendations for a thread
+
+    Without parameters, everything. `limit` pages the messages (newest
+    first page, `cursor` = a message id to page back from), `since` = the
+    last message id the client has returns only newer ones, and `fields`
+    (comma-separated, e.g. "messages" or "recommendations") trims the
+    response. See app/history.py.
+    """
+    wanted = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        data = await run_in_threadpool(history_page, thread_id, limit, cursor, since, wanted)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(data)
+
+
+@app.post("/reset")
+async def reset(request: ResetRequest):
+    """Clear a conversation thread"""
+    ok = await run_in_threadpool(reset_conversation, request.thread_id)
+    return {"reset": ok, "thread_id": request.thread_id}
+
+
+def sse_format(event: str, data) -> str:
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+@app.get("/generate-roadmap/stream")
+async def stream_roadmap_endpoint(goal: str):
+    """
+    Stream a career roadmap as server-sent events
+
+    Events: `title`, then one `phase` per completed phase, then `done` with
+    the full roadmap. Use with EventSource:
+    `new EventSource("/generate-roadmap/stream?goal=Music%20Producer")`
+    """
+    def events():
+        # Sync generator: Starlette iterates it in the threadpool
+        for item in stream_roadmap(goal):
+            yield sse_format(item["event"], item["data"])
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint"""
     return {"status": "ok"}
 
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime counters for this worker process"""
+    return {
+        "pid": os.getpid(),
+        "chat_turns": turn_locks.stats(),
+        "turn_deadlines": deadline_stats(),
+        "session_store": session_store_stats(),
+        "llm_admission": get_admission().stats(),
+        "discovery": discovery_stats(),
+        "question_bank": question_bank_stats(),
+        "greeting": greeting_stats(),
+        "action_plans": action_plan_stats(),
+        "history": history_stats(),
+        "roadmap_providers": provider_stats(),
+        "roadmap_warmup": warmup_stats(),
+        "roadmap_prefetch": prefetch_stats(),
+    }
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Career Coach API server")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "1")),
+                        help="Worker processes (caches and sessions are shared through CAREER_CACHE_PATH)")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("API_GRACEFUL_TIMEOUT", "30")),
+                        help="Seconds to let in-flight requests finish on SIGTERM/SIGINT")
+    args = parser.parse_args(argv)
+
+    if args.workers > 1:
+        # A thread's turns can reach any worker, so sessions must live in the shared file
+        load_env()
+        if os.getenv("SESSION_STORE", "shared").lower() != "shared":
+            parser.error("--workers > 1 needs SESSION_STORE=shared (in-memory sessions are per worker)")
+        os.environ["SESSION_STORE"] = "shared"
+        # Multiple workers need an import string so each process loads its own app
+        uvicorn.run("api_server:app", host=args.host, port=args.port, workers=args.workers,
+                    timeout_graceful_shutdown=args.graceful_timeout)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port,
+                    timeout_graceful_shutdown=args.graceful_timeout)
+
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    main()
\ No newline at end of file
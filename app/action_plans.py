@@ -0,0 +1,355 @@
+"""
+Compositional action plans
+
+action_node used to make one large LLM call (ACTION_USER_PROMPT, up to
+800 tokens out) for every top-3 combination, although most of the plan
+depends only on the careers: their first steps, skills, resources and
+the Usher's New Look angle. Plans are now assembled from per-career
+blocks:
+
+- a block is generated once per career and model version
+  (ACTION_BLOCK_PROMPT, grounded in the catalog's skills, education and
+  entry path) and kept in the shared cache for ACTION_BLOCK_TTL
+  (default 30 days); missing blocks of a plan are generated in parallel
+- if a block can't be generated, a local one is built from the catalog
+  and not cached
+- the blocks are composed into the same four sections as before, led by
+  the top career
+- only a short personal intro (route "action_personalize", 150 tokens)
+  is written per user. It is skipped, in favour of a template intro,
+  when the LLM is busy (admission load at ACTION_PERSONALIZE_MAX_LOAD)
+  or the turn has less than PERSONALIZE_MIN_BUDGET seconds left
+
+ACTION_PERSONALIZE=always|auto|off (default auto). ACTION_COMPOSE=0 goes
+back to the single-call plan.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from . import prompts
+from .admission import get_admission
+from .cache import get_cache
+from .config import load_env
+from .deadlines import get_deadline
+
+
+BLOCK_NAMESPACE = "action_block"
+DEFAULT_BLOCK_TTL = 30 * 24 * 3600
+DEFAULT_MAX_LOAD = 0.75
+
+# Seconds of pipeline budget the personal intro needs to be worth trying
+PERSONALIZE_MIN_BUDGET = 2.0
+
+# Items taken from the 2nd and 3rd careers' blocks
+OTHER_CAREER_RESOURCES = 2
+
+_stats = {"blocks": Counter(), "intros": Counter()}
+_stats_lock = threading.Lock()
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+def compose_enabled() -> bool:
+    """ACTION_COMPOSE (default on); off = one LLM call per plan"""
+    load_env()
+    return os.getenv("ACTION_COMPOSE", "1").lower() not in ("0", "false", "no", "off")
+
+
+def personalize_mode() -> str:
+    """ACTION_PERSONALIZE: always, auto (skip under load) or off"""
+    load_env()
+    mode = os.getenv("ACTION_PERSONALIZE", "auto").lower()
+    return mode if mode in ("always", "auto", "off") else "auto"
+
+
+def _block_ttl() -> float:
+    load_env()
+    return float(os.getenv("ACTION_BLOCK_TTL", DEFAULT_BLOCK_TTL))
+
+
+def _count(kind: str, name: str) -> None:
+    with _stats_lock:
+        _stats[kind][name] += 1
+
+
+# ============================================================================
+# BLOCKS
+# ============================================================================
+
+def block_version() -> str:
+    """Hash of the block prompt and the "action" route's model settings"""
+    from .models import model_route
+
+    route = json.dumps(model_route("action"), sort_keys=True)
+    text = f"{prompts.ACTION_BLOCK_SYSTEM}|{prompts.ACTION_BLOCK_PROMPT}|{route}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def _career_key(rec: Dict) -> str:
+    return rec.get("career_key") or " ".join(str(rec.get("path", "")).lower().split())
+
+
+def _career_info(rec: Dict) -> Dict:
+    from .career_data import get_career_paths
+
+    key = rec.get("career_key")
+    career_paths = get_career_paths()
+    info = career_paths.get(key, {}) if key else {}
+    return {"name": rec.get("path", "this career"), **info}
+
+
+def parse_block(text: str) -> Dict:
+    """Block dict from completion text; raises ValueError if it isn't one"""
+    from .nodes import parse_json_response
+
+    block = parse_json_response(text)
+    if not isinstance(block, dict) or not block.get("next_steps") or not isinstance(block.get("skills"), list):
+        raise ValueError("completion is not an action plan block")
+    block["skills"] = [s for s in block["skills"] if isinstance(s, dict) and s.get("skill")]
+    block.setdefault("resources", [])
+    block.setdefault("usher", "")
+    return block
+
+
+def local_block(info: Dict) -> Dict:
+    """Block built from the catalog alone (no LLM)"""
+    name = info.get("name", "this career")
+    steps = [step.strip() for step in info.get("entry_path", "").split(",") if step.strip()]
+    return {
+        "next_steps": [step[0].upper() + step[1:] for step in steps[:4]]
+        or [f"Find three people working as {name} and follow their work"],
+        "skills": [
+            {"skill": skill, "why": f"Core to day-to-day work as {name}",
+             "how": "Start with free tutorials and practice on a small project"}
+            for skill in info.get("skills", [])[:3]
+        ],
+        "resources": [f"Online communities and free courses for {name}"],
+        "usher": "Career prep and talent development programs can connect you with mentors on this path.",
+    }
+
+
+def _generate_block(llm, info: Dict, config) -> Dict:
+    from .nodes import invoke_llm
+
+    user = prompts.ACTION_BLOCK_PROMPT.format(
+        career=info.get("name", ""),
+        description=info.get("description", ""),
+        skills=", ".join(info.get("skills", [])) or "Not listed",
+        education=info.get("education", "") or "Not listed",
+        entry_path=info.get("entry_path", "") or "Not listed",
+    )
+    response = invoke_llm(llm, [
+        SystemMessage(content=prompts.ACTION_BLOCK_SYSTEM),
+        HumanMessage(content=user),
+    ], config, stage="pipeline", priority="bulk")
+    return parse_block(response.content)
+
+
+def get_blocks(llm, recommendations: List[Dict], config=None) -> List[Tuple[Dict, str]]:
+    """
+    One block per recommendation, from the cache or generated in parallel
+
+    Returns:
+        [(block, source)] in recommendation order; source is "cached",
+        "generated" or "local"
+    """
+    cache = get_cache()
+    version = block_version()
+    keys = [f"{version}:{_career_key(rec)}" for rec in recommendations]
+    results: List[Optional[Tuple[Dict, str]]] = []
+    for key in keys:
+        block = cache.get(BLOCK_NAMESPACE, key)
+        results.append((block, "cached") if block else None)
+
+    def generate(index: int) -> Tuple[Dict, str]:
+        info = _career_info(recommendations[index])
+        if llm is None:
+            return local_block(info), "local"
+        try:
+            block = _generate_block(llm, info, config)
+        except Exception as e:
+            print(f"[ACTION] Block for {info.get('name')!r} failed, using catalog steps: {e}")
+            return local_block(info), "local"
+        cache.set(BLOCK_NAMESPACE, keys[index], block, ttl=_block_ttl())
+        return block, "generated"
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if len(missing) == 1:
+        results[missing[0]] = generate(missing[0])
+    elif missing:
+        with ThreadPoolExecutor(max_workers=len(missing), thread_name_prefix="action-block") as pool:
+            for index, result in zip(missing, pool.map(generate, missing)):
+                results[index] = result
+
+    for _, source in results:
+        _count("blocks", source)
+    return results
+
+
+# ============================================================================
+# COMPOSITION
+# ============================================================================
+
+def compose_plan(recommendations: List[Dict], blocks: List[Dict], intro: str) -> str:
+    """The action plan markdown: intro, then the four sections led by the top career"""
+    names = [rec.get("path", "Unknown") for rec in recommendations]
+    top, others = blocks[0], list(zip(names[1:], blocks[1:]))
+
+    steps = [f"- {step}" for step in top["next_steps"][:5]]
+    steps += [f"- Explore {name}: {block['next_steps'][0]}" for name, block in others if block["next_steps"]]
+
+    seen = set()
+    skills = []
+    for block in [top] + [block for _, block in others]:
+        for skill in (block["skills"][:4] if block is top else block["skills"][:1]):
+            if skill["skill"].lower() in seen:
+                continue
+            seen.add(skill["skill"].lower())
+            line = f"- **{skill['skill']}**"
+            if skill.get("why"):
+                line += f" - {skill['why']}"
+            if skill.get("how"):
+                line += f" Start: {skill['how']}"
+            skills.append(line)
+
+    resources = [f"- {item}" for item in top["resources"][:6]]
+    for name, block in others:
+        resources += [f"- {item} ({name})" for item in block["resources"][:OTHER_CAREER_RESOURCES]]
+
+    usher = [top["usher"]] if top.get("usher") else []
+    usher += [f"For {name}: {block['usher']}" for name, block in others if block.get("usher")]
+
+    sections = [
+        intro,
+        "**🎯 Next Steps (This Week)**\n" + "\n".join(steps),
+        "**📚 Skills to Develop**\n" + "\n".join(skills),
+        "**🔗 Resources**\n" + "\n".join(resources),
+        "**🌟 Usher's New Look Programs**\n" + "\n".join(f"- {line}" for line in usher),
+    ]
+    return "\n\n".join(section for section in sections if section)
+
+
+def template_intro(recommendations: List[Dict], user_profile: Dict) -> str:
+    """Intro without an LLM call"""
+    names = [rec.get("path", "Unknown") for rec in recommendations]
+    intro = f"Here's a plan built around **{names[0]}**"
+    if len(names) > 1:
+        intro += f", with {' and '.join(names[1:])} to explore alongside it"
+    interests = user_profile.get("interests") or []
+    if interests:
+        intro += f". Since you're into {interests[0]}, start with the first step below this week."
+    else:
+        intro += ". Start with the first step below this week."
+    return intro
+
+
+def personalize_skip_reason(config=None) -> Optional[str]:
+    """Why the personal intro should be skipped ("off", "budget", "load"), or None"""
+    mode = personalize_mode()
+    if mode == "off":
+        return "off"
+    if mode == "always":
+        return None
+    deadline = get_deadline(config)
+    remaining = deadline.remaining("pipeline") if deadline else None
+    if remaining is not None and remaining < PERSONALIZE_MIN_BUDGET:
+        return "budget"
+    load_env()
+    if get_admission().load() >= float(os.getenv("ACTION_PERSONALIZE_MAX_LOAD", DEFAULT_MAX_LOAD)):
+        return "load"
+    return None
+
+
+def personal_intro(llm, recommendations: List[Dict], user_profile: Dict, steps: List[str],
+                   config=None) -> str:
+    """2-3 sentences tying the plan to this user (raises on LLM failure)"""
+    from .nodes import invoke_llm
+
+    user = prompts.ACTION_PERSONALIZE_PROMPT.format(
+        user_profile=prompts.format_user_profile(user_profile),
+        careers=", ".join(rec.get("path", "Unknown") for rec in recommendations),
+        next_steps="\n".join(f"- {step}" for step in steps[:3]),
+    )
+    response = invoke_llm(llm, [
+        SystemMessage(content=prompts.ACTION_PERSONALIZE_SYSTEM),
+        HumanMessage(content=user),
+    ], config, stage="pipeline", priority="pipeline")
+    text = response.content.strip()
+    if not text:
+        raise ValueError("empty intro")
+    return text
+
+
+def build_action_plan(recommendations: List[Dict], user_profile: Dict, config=None) -> Dict:
+    """
+    Compose the action plan for a user's top recommendations
+
+    Args:
+        recommendations: top_recommendations from ranking_node
+        user_profile: Synthesized profile (for the intro)
+        config: The node's RunnableConfig (turn budget, cancellation)
+
+    Returns:
+        {"content", "blocks" ({career: source}), "intro" ("llm" or the
+        reason it was skipped/failed)}
+    """
+    from .nodes import get_llm
+
+    results = get_blocks(get_llm("action"), recommendations, config)
+    blocks = [block for block, _ in results]
+
+    reason = personalize_skip_reason(config)
+    llm = get_llm("action_personalize") if reason is None else None
+    intro = None
+    if reason is None and llm is None:
+        reason = "no_llm"
+    if llm is not None:
+        try:
+            intro = personal_intro(llm, recommendations, user_profile, blocks[0]["next_steps"], config)
+        except Exception as e:
+            print(f"[ACTION] Personal intro failed, using the template: {e}")
+            reason = "error"
+    _count("intros", reason or "llm")
+
+    return {
+        "content": compose_plan(recommendations, blocks, intro or template_intro(recommendations, user_profile)),
+        "blocks": {rec.get("path", "Unknown"): source for rec, (_, source) in zip(recommendations, results)},
+        "intro": reason or "llm",
+    }
+
+
+def action_plan_stats() -> Dict:
+    """Block sources (cached/generated/local) and intros written vs skipped (by reason)"""
+    with _stats_lock:
+        blocks = dict(_stats["blocks"])
+        total = sum(blocks.values())
+        return {
+            "blocks": blocks,
+            "block_hit_rate": round(blocks.get("cached", 0) / total, 3) if total else 0.0,
+            "intros": dict(_stats["intros"]),
+        }
+
+
+__all__ = [
+    'action_plan_stats',
+    'block_version',
+    'build_action_plan',
+    'compose_enabled',
+    'compose_plan',
+    'get_blocks',
+    'local_block',
+    'parse_block',
+    'personalize_mode',
+    'personalize_skip_reason',
+    'template_intro',
+]
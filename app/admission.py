@@ -0,0 +1,512 @@
+"""
+Global LLM admission control
+
+Every LLM call in the process (discovery/synthesis/matching/action nodes,
+roadmap generation) asks one AdmissionController for a slot first, so a
+burst of traffic queues here instead of hitting the provider at once and
+getting 429s back together.
+
+- Request and token buckets: refill at the provider's per-minute limits,
+  resized from `x-ratelimit-*` response headers as they are seen
+- AIMD concurrency window: +1 per window of successful calls, halved
+  (plus a retry-after pause) on a 429
+- Priority classes: waiting calls are admitted interactive first
+  (discovery questions), then pipeline (synthesis/matching), then bulk
+  (roadmaps, action plans), then background (roadmap warm-up)
+- LLM_ADMISSION_SHARED=true keeps the buckets in the shared SQLite cache
+  file so every api_server worker draws from the same budget
+
+Queue waits, throttle events and window changes are exported by stats().
+"""
+
+import heapq
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from .config import load_env
+
+
+PRIORITIES = {"interactive": 0, "pipeline": 1, "bulk": 2, "background": 3}
+
+RATE_WINDOW_SECONDS = 60.0  # provider limits are per minute
+
+
+class AdmissionTimeout(TimeoutError):
+    """No slot was granted before the caller's timeout (callers fall back)"""
+
+
+class AdmissionCancelled(Exception):
+    """The caller gave up while queued (e.g. its turn was superseded)"""
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def _duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from "20", "1.5", "6m0s", "250ms" style header values"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        total += float(amount) * {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}[unit]
+    return total or None
+
+
+def _header_int(headers, name: str) -> Optional[int]:
+    try:
+        return int(float(headers.get(name)))
+    except (TypeError, ValueError):
+        return None
+
+
+def rate_limit_info(headers) -> Dict[str, Optional[float]]:
+    """Limits / remaining / retry-after from OpenAI- and Groq-style headers"""
+    headers = {k.lower(): v for k, v in dict(headers or {}).items()}
+    return {
+        "limit_requests": _header_int(headers, "x-ratelimit-limit-requests"),
+        "remaining_requests": _header_int(headers, "x-ratelimit-remaining-requests"),
+        "limit_tokens": _header_int(headers, "x-ratelimit-limit-tokens"),
+        "remaining_tokens": _header_int(headers, "x-ratelimit-remaining-tokens"),
+        "retry_after": (_duration(headers.get("retry-after"))
+                        or _duration(headers.get("x-ratelimit-reset-requests"))),
+    }
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """True for a provider 429 (openai/groq RateLimitError or any HTTP error carrying one)"""
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+def _error_headers(exc: BaseException):
+    response = getattr(exc, "response", None)
+    return getattr(response, "headers", None) or {}
+
+
+def _refill(level: float, capacity: float, rate: float, updated: float, now: float) -> float:
+    return min(capacity, level + (now - updated) * rate)
+
+
+# ============================================================================
+# BUCKETS
+# ============================================================================
+
+class _LocalBuckets:
+    """Request + token buckets for this process"""
+
+    def __init__(self, rpm: float, tpm: float):
+        now = time.monotonic()
+        self._state = {
+            "requests": [float(rpm), float(rpm), rpm / RATE_WINDOW_SECONDS, now],  # level, capacity, rate/s, updated
+            "tokens": [float(tpm), float(tpm), tpm / RATE_WINDOW_SECONDS, now],
+        }
+
+    def take(self, requests: float, tokens: float) -> float:
+        """Take both amounts, or return seconds until they would be available"""
+        now = time.monotonic()
+        wait = 0.0
+        want = {"requests": requests, "tokens": tokens}
+        for name, bucket in self._state.items():
+            bucket[0] = _refill(bucket[0], bucket[1], bucket[2], bucket[3], now)
+            bucket[3] = now
+            need = min(want[name], bucket[1]) - bucket[0]
+            if need > 0:
+                wait = max(wait, need / bucket[2] if bucket[2] else 1.0)
+        if wait > 0:
+            return wait
+        for name, bucket in self._state.items():
+            bucket[0] -= min(want[name], bucket[1])
+        return 0.0
+
+    def adjust(self, tokens: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the real usage is known"""
+        bucket = self._state["tokens"]
+        bucket[0] = min(bucket[1], bucket[0] - tokens)
+
+    def update(self, name: str, limit: Optional[int], remaining: Optional[int]) -> None:
+        bucket = self._state[name]
+        if limit:
+            bucket[1] = float(limit)
+            bucket[2] = limit / RATE_WINDOW_SECONDS
+        if remaining is not None:
+            bucket[0] = min(bucket[0], float(remaining))
+
+    def snapshot(self) -> Dict:
+        now = time.monotonic()
+        return {
+            name: {"level": round(_refill(*bucket, now), 1), "capacity": bucket[1]}
+            for name, bucket in self._state.items()
+        }
+
+
+class _SharedBuckets:
+    """
+    The same buckets kept in a SQLite file shared by every worker process
+
+    Each take() is one IMMEDIATE transaction, so refills and takes from
+    different processes serialize on the file lock.
+    """
+
+    def __init__(self, path: str, rpm: float, tpm: float):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS admission_buckets ("
+                "name TEXT PRIMARY KEY, level REAL, capacity REAL, rate REAL, updated_at REAL)"
+            )
+            for name, limit in (("requests", rpm), ("tokens", tpm)):
+                conn.execute(
+                    "INSERT OR IGNORE INTO admission_buckets VALUES (?, ?, ?, ?, ?)",
+                    (name, float(limit), float(limit), limit / RATE_WINDOW_SECONDS, time.time()),
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, fn):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = {
+                name: [level, capacity, rate, updated]
+                for name, level, capacity, rate, updated in conn.execute(
+                    "SELECT name, level, capacity, rate, updated_at FROM admission_buckets"
+                )
+            }
+            now = time.time()
+            for bucket in rows.values():
+                bucket[0] = _refill(*bucket, now)
+                bucket[3] = now
+            result = fn(rows)
+            conn.executemany(
+                "UPDATE admission_buckets SET level = ?, capacity = ?, rate = ?, updated_at = ? WHERE name = ?",
+                [(*bucket, name) for name, bucket in rows.items()],
+            )
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def take(self, requests: float, tokens: float) -> float:
+        want = {"requests": requests, "tokens": tokens}
+
+        def take_both(rows):
+            wait = 0.0
+            for name, bucket in rows.items():
+                need = min(want[name], bucket[1]) - bucket[0]
+                if need > 0:
+                    wait = max(wait, need / bucket[2] if bucket[2] else 1.0)
+            if wait == 0.0:
+                for name, bucket in rows.items():
+                    bucket[0] -= min(want[name], bucket[1])
+            return wait
+
+        return self._transaction(take_both)
+
+    def adjust(self, tokens: float) -> None:
+        def charge(rows):
+            bucket = rows["tokens"]
+            bucket[0] = min(bucket[1], bucket[0] - tokens)
+        self._transaction(charge)
+
+    def update(self, name: str, limit: Optional[int], remaining: Optional[int]) -> None:
+        def apply(rows):
+            bucket = rows[name]
+            if limit:
+                bucket[1] = float(limit)
+                bucket[2] = limit / RATE_WINDOW_SECONDS
+            if remaining is not None:
+                bucket[0] = min(bucket[0], float(remaining))
+        self._transaction(apply)
+
+    def snapshot(self) -> Dict:
+        return self._transaction(
+            lambda rows: {name: {"level": round(b[0], 1), "capacity": b[1]} for name, b in rows.items()}
+        )
+
+
+# ============================================================================
+# CONTROLLER
+# ============================================================================
+
+class Ticket:
+    """An admitted LLM call; report what the provider said via observe()"""
+
+    def __init__(self, controller: "AdmissionController", priority: str, tokens: int, waited: float):
+        self.controller = controller
+        self.priority = priority
+        self.tokens = tokens
+        self.waited = waited
+
+    def observe(self, headers=None, total_tokens: Optional[int] = None) -> None:
+        """Feed rate-limit headers and/or actual token usage back to the buckets"""
+        if headers:
+            self.controller.update_limits(headers)
+        if total_tokens is not None:
+            self.controller.adjust_tokens(total_tokens - self.tokens)
+            self.tokens = total_tokens
+
+
+class AdmissionController:
+    """
+    Process-wide gate in front of the LLM provider
+
+    Args:
+        rpm: Requests per minute until headers say otherwise
+        tpm: Tokens per minute until headers say otherwise
+        window: Initial concurrent calls (AIMD window)
+        max_window: Upper bound for the window
+        shared_path: SQLite file for cross-process buckets (None = per process)
+        sample_size: Queue-wait samples kept per priority
+    """
+
+    def __init__(self, rpm: float = 500, tpm: float = 200_000, window: float = 16,
+                 max_window: float = 64, shared_path: Optional[str] = None, sample_size: int = 1000):
+        self.min_window = 1.0
+        self.max_window = float(max_window)
+        self._window = min(float(window), self.max_window)
+        self._buckets = _SharedBuckets(shared_path, rpm, tpm) if shared_path else _LocalBuckets(rpm, tpm)
+        self.shared = bool(shared_path)
+        self._cond = threading.Condition()
+        self._waiting = []          # heap of (priority rank, seq)
+        self._seq = 0
+        self._in_flight = 0
+        self._cooldown_until = 0.0
+        self._waits = {name: deque(maxlen=sample_size) for name in PRIORITIES}
+        self._counts = {
+            "admitted": 0, "throttle_events": 0, "admission_timeouts": 0,
+            "cancelled_in_queue": 0, "header_updates": 0, "window_decreases": 0,
+        }
+
+    # -- admission -------------------------------------------------------
+
+    @contextmanager
+    def admit(self, priority: str = "bulk", tokens: int = 0, timeout: Optional[float] = None,
+              is_cancelled: Optional[Callable[[], bool]] = None):
+        """
+        Hold one LLM slot for the body
+
+        Args:
+            priority: "interactive", "pipeline", "bulk" or "background"
+            tokens: Expected prompt + completion tokens
+            timeout: Max seconds to wait in the queue
+            is_cancelled: Checked while waiting; True abandons the wait
+
+        Raises:
+            AdmissionTimeout: Not admitted within `timeout`
+            AdmissionCancelled: `is_cancelled` turned true while queued
+        """
+        ticket = self._acquire(priority, tokens, timeout, is_cancelled)
+        try:
+            yield ticket
+        except BaseException as e:
+            self._release(throttled=is_rate_limited(e), headers=_error_headers(e), ok=False)
+            raise
+        else:
+            self._release(throttled=False, headers=None, ok=True)
+
+    def _acquire(self, priority: str, tokens: int, timeout: Optional[float], is_cancelled) -> Ticket:
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        with self._cond:
+            self._seq += 1
+            entry = (PRIORITIES.get(priority, PRIORITIES["bulk"]), self._seq)
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = 0.25
+                    if self._waiting[0] == entry and self._in_flight < int(self._window):
+                        wait = self._cooldown_until - now
+                        if wait <= 0:
+                            wait = self._buckets.take(1, tokens)
+                            if wait <= 0:
+                                heapq.heappop(self._waiting)
+                                self._in_flight += 1
+                                self._counts["admitted"] += 1
+                                waited = now - started
+                                self._waits.get(priority, self._waits["bulk"]).append(waited)
+                                self._cond.notify_all()  # the next in line may fit too
+                                return Ticket(self, priority, tokens, waited)
+                    if is_cancelled is not None and is_cancelled():
+                        self._counts["cancelled_in_queue"] += 1
+                        raise AdmissionCancelled(priority)
+                    if deadline is not None:
+                        if now >= deadline:
+                            self._counts["admission_timeouts"] += 1
+                            raise AdmissionTimeout(f"no LLM slot within {timeout:.2f}s ({priority})")
+                        wait = min(wait, deadline - now)
+                    self._cond.wait(min(max(wait, 0.005), 0.25))
+            except BaseException:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    def _release(self, throttled: bool, headers, ok: bool) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                # Multiplicative decrease, and hold everyone until the provider's reset
+                self._counts["throttle_events"] += 1
+                self._counts["window_decreases"] += 1
+                self._window = max(self.min_window, self._window / 2)
+                retry_after = rate_limit_info(headers)["retry_after"] or 1.0
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + retry_after)
+            elif ok:
+                # Additive increase: about +1 per window's worth of successes
+                self._window = min(self.max_window, self._window + 1.0 / self._window)
+            self._cond.notify_all()
+        if headers:
+            self.update_limits(headers)
+
+    # -- feedback --------------------------------------------------------
+
+    def update_limits(self, headers) -> None:
+        """Resize the buckets from provider rate-limit headers"""
+        info = rate_limit_info(headers)
+        if all(info[k] is None for k in ("limit_requests", "remaining_requests", "limit_tokens", "remaining_tokens")):
+            return
+        with self._cond:
+            self._buckets.update("requests", info["limit_requests"], info["remaining_requests"])
+            self._buckets.update("tokens", info["limit_tokens"], info["remaining_tokens"])
+            self._counts["header_updates"] += 1
+
+    def adjust_tokens(self, delta: int) -> None:
+        with self._cond:
+            self._buckets.adjust(delta)
+
+    def load(self) -> float:
+        """Calls in flight or queued per window slot (>= 1 means new calls wait)"""
+        with self._cond:
+            return (self._in_flight + len(self._waiting)) / max(self._window, 1.0)
+
+    # -- stats -----------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """Window, queue depth, queue-wait percentiles (ms) per priority, throttle counts"""
+        def pct(samples, p: float) -> float:
+            if not samples:
+                return 0.0
+            ordered = sorted(samples)
+            return round(ordered[min(len(ordered) - 1, int(p / 100.0 * len(ordered)))] * 1000, 2)
+
+        with self._cond:
+            waiting = {name: 0 for name in PRIORITIES}
+            names = {rank: name for name, rank in PRIORITIES.items()}
+            for rank, _ in self._waiting:
+                waiting[names[rank]] += 1
+            return {
+                "window": round(self._window, 2),
+                "in_flight": self._in_flight,
+                "waiting": waiting,
+                "cooldown_s": round(max(0.0, self._cooldown_until - time.monotonic()), 2),
+                "queue_wait_ms": {
+                    name: {"count": len(samples), "p50": pct(samples, 50), "p99": pct(samples, 99)}
+                    for name, samples in self._waits.items()
+                },
+                "buckets": self._buckets.snapshot(),
+                "shared": self.shared,
+                **self._counts,
+            }
+
+
+class _Unlimited:
+    """Stand-in when LLM_ADMISSION=false: admits everything immediately"""
+
+    @contextmanager
+    def admit(self, priority: str = "bulk", tokens: int = 0, timeout: Optional[float] = None,
+              is_cancelled: Optional[Callable[[], bool]] = None):
+        yield Ticket(self, priority, tokens, 0.0)
+
+    def update_limits(self, headers) -> None:
+        pass
+
+    def adjust_tokens(self, delta: int) -> None:
+        pass
+
+    def load(self) -> float:
+        return 0.0
+
+    def stats(self) -> Dict:
+        return {"enabled": False}
+
+
+# ============================================================================
+# PROCESS-WIDE INSTANCE
+# ============================================================================
+
+_admission = None
+_admission_lock = threading.Lock()
+
+
+def get_admission():
+    """The process-wide admission controller (configured from LLM_* env vars)"""
+    global _admission
+    if _admission is None:
+        with _admission_lock:
+            if _admission is None:
+                load_env()
+                if os.getenv("LLM_ADMISSION", "true").lower() != "true":
+                    _admission = _Unlimited()
+                else:
+                    shared_path = None
+                    if os.getenv("LLM_ADMISSION_SHARED", "false").lower() == "true":
+                        from .cache import get_cache
+                        shared_path = get_cache().path
+                    _admission = AdmissionController(
+                        rpm=float(os.getenv("LLM_RPM_LIMIT", 500)),
+                        tpm=float(os.getenv("LLM_TPM_LIMIT", 200_000)),
+                        window=float(os.getenv("LLM_CONCURRENCY", 16)),
+                        max_window=float(os.getenv("LLM_MAX_CONCURRENCY", 64)),
+                        shared_path=shared_path,
+                    )
+    return _admission
+
+
+def set_admission(controller) -> None:
+    """Swap the process-wide controller (benchmarks/tests)"""
+    global _admission
+    with _admission_lock:
+        _admission = controller
+
+
+__all__ = [
+    'PRIORITIES',
+    'AdmissionController',
+    'AdmissionTimeout',
+    'AdmissionCancelled',
+    'Ticket',
+    'estimate_tokens',
+    'rate_limit_info',
+    'is_rate_limited',
+    'get_admission',
+    'set_admission',
+]
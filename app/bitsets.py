@@ -0,0 +1,241 @@
+"""
+Bitset encoding of career skills and work styles
+
+get_career_paths_by_skill / _by_work_style used to lowercase every
+career's lists and substring-scan them on each call. Here each career's
+skills and work styles are encoded once as bitsets over the catalog
+vocabularies (the same sets get_all_skills() / get_all_work_styles()
+return), packed into uint64 words:
+
+    skills matrix: (careers, ceil(len(vocabulary) / 64)) uint64
+
+A query term becomes a mask over the vocabulary (every entry that
+contains the term, the same substring rule as before), so "any of these
+skills", "all of these skills" and Jaccard similarity against a user
+profile are AND/OR and popcount over the packed matrix.
+
+The encoding is rebuilt when the catalog changes (same fingerprint as
+the retrieval index).
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+FIELDS = ("skills", "work_style")
+
+# Query-term masks kept per encoding (the vocabulary is fixed once built)
+MAX_CACHED_TERMS = 4096
+
+# Profile entries that feed each catalog field
+PROFILE_FIELDS = {"skills": ("skills", "interests"), "work_style": ("work_style",)}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# numpy < 2.0 has no bitwise_count; fall back to a per-byte table
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits per row of a (..., words) uint64 array"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int32)
+    as_bytes = np.ascontiguousarray(words).view(np.uint8)
+    return _POPCOUNT8[as_bytes].sum(axis=-1, dtype=np.int32)
+
+
+def _pack(rows: np.ndarray, bits: np.ndarray, n_rows: int, n_bits: int) -> np.ndarray:
+    """Set bit `bits[i]` of row `rows[i]` in a zeroed (n_rows, words) matrix"""
+    matrix = np.zeros((n_rows, max(1, (n_bits + 63) // 64)), dtype=np.uint64)
+    bits = bits.astype(np.uint64)
+    np.bitwise_or.at(matrix, (rows, (bits >> np.uint64(6)).astype(np.intp)),
+                     np.uint64(1) << (bits & np.uint64(63)))
+    return matrix
+
+
+def _words(text: str) -> set:
+    return {word for word in _WORD.findall(text) if len(word) >= 4}
+
+
+# ============================================================================
+# ENCODING
+# ============================================================================
+
+class CareerBitsets:
+    """
+    Packed skill / work-style bitsets for a career catalog
+
+    Args:
+        keys: Catalog keys, one per matrix row
+        vocabularies: {field: entries}, entry i is bit i
+        matrices: {field: (len(keys), words) uint64}
+    """
+
+    def __init__(self, keys: List[str], vocabularies: Dict[str, List[str]], matrices: Dict[str, np.ndarray]):
+        self.keys = keys
+        self.vocabularies = vocabularies
+        self.matrices = matrices
+        self.rows = {key: i for i, key in enumerate(keys)}
+        self._lower = {field: [entry.lower() for entry in entries] for field, entries in vocabularies.items()}
+        self._term_masks: Dict[Tuple[str, str], np.ndarray] = {}
+
+    @classmethod
+    def build(cls, career_paths: Dict[str, Dict]) -> "CareerBitsets":
+        keys = list(career_paths)
+        vocabularies, matrices = {}, {}
+
+        if hasattr(career_paths, "list_column"):
+            # Memory-mapped catalog: the ID lists already are bit positions
+            for field in FIELDS:
+                ids, offsets = career_paths.list_column(field)
+                rows = np.repeat(np.arange(len(keys)), np.diff(np.asarray(offsets)))
+                vocabularies[field] = career_paths.vocabulary(field)
+                matrices[field] = _pack(rows, np.asarray(ids), len(keys), len(vocabularies[field]))
+            return cls(keys, vocabularies, matrices)
+
+        for field in FIELDS:
+            vocabulary = sorted({entry for info in career_paths.values() for entry in info.get(field, [])})
+            position = {entry: i for i, entry in enumerate(vocabulary)}
+            rows, bits = [], []
+            for row, key in enumerate(keys):
+                for entry in career_paths[key].get(field, []):
+                    rows.append(row)
+                    bits.append(position[entry])
+            vocabularies[field] = vocabulary
+            matrices[field] = _pack(np.array(rows, dtype=np.intp), np.array(bits, dtype=np.int64),
+                                    len(keys), len(vocabulary))
+        return cls(keys, vocabularies, matrices)
+
+    # -- masks -----------------------------------------------------------
+
+    def _mask(self, field: str, bits: Iterable[int]) -> np.ndarray:
+        bits = np.fromiter(bits, dtype=np.int64)
+        return _pack(np.zeros(len(bits), dtype=np.intp), bits, 1, len(self.vocabularies[field]))[0]
+
+    def term_mask(self, field: str, term: str) -> np.ndarray:
+        """Bits of every vocabulary entry containing `term` (case-insensitive)"""
+        term = term.lower()
+        mask = self._term_masks.get((field, term))
+        if mask is None:
+            mask = self._mask(field, (i for i, entry in enumerate(self._lower[field]) if term in entry))
+            mask.setflags(write=False)
+            if len(self._term_masks) < MAX_CACHED_TERMS:
+                self._term_masks[field, term] = mask
+        return mask
+
+    def profile_mask(self, field: str, items: Iterable[str]) -> np.ndarray:
+        """
+        Bits for free-text profile items
+
+        An item sets an entry's bit if either contains the other, or they
+        share a word of four or more letters ("editing videos" -> "Video editing").
+        """
+        items = [str(item).lower() for item in items if item]
+        item_words = [_words(item) for item in items]
+        bits = []
+        for i, entry in enumerate(self._lower[field]):
+            entry_words = _words(entry)
+            for item, words in zip(items, item_words):
+                if entry in item or item in entry or words & entry_words:
+                    bits.append(i)
+                    break
+        return self._mask(field, bits)
+
+    # -- queries ---------------------------------------------------------
+
+    def match_any(self, field: str, terms: Iterable[str]) -> np.ndarray:
+        """Boolean row mask: careers with at least one entry matching any term"""
+        mask = np.zeros(self.matrices[field].shape[1], dtype=np.uint64)
+        for term in terms:
+            mask |= self.term_mask(field, term)
+        return (self.matrices[field] & mask).any(axis=1)
+
+    def match_all(self, field: str, terms: Iterable[str]) -> np.ndarray:
+        """Boolean row mask: careers where every term matches at least one entry"""
+        rows = np.ones(len(self.keys), dtype=bool)
+        for term in terms:
+            rows &= (self.matrices[field] & self.term_mask(field, term)).any(axis=1)
+        return rows
+
+    def select(self, rows: np.ndarray) -> List[str]:
+        """Catalog keys for a boolean row mask, in catalog order"""
+        return [self.keys[i] for i in np.flatnonzero(rows)]
+
+    def jaccard(self, user_profile: Dict, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Jaccard similarity of every career to the profile
+
+        Skills and work styles are treated as one set: |career & profile| /
+        |career | profile| over both bitsets.
+
+        Args:
+            user_profile: Profile from synthesis_node
+            rows: Only score these row indices (default: the whole catalog)
+
+        Returns:
+            (careers,) float32, 0 where both sets are empty
+        """
+        count = len(self.keys) if rows is None else len(rows)
+        intersection = np.zeros(count, dtype=np.int32)
+        union = np.zeros(count, dtype=np.int32)
+        for field, sources in PROFILE_FIELDS.items():
+            items = [item for source in sources for item in user_profile.get(source, []) or []]
+            mask = self.profile_mask(field, items)
+            matrix = self.matrices[field] if rows is None else self.matrices[field][rows]
+            intersection += popcount(matrix & mask)
+            union += popcount(matrix | mask)
+        return np.divide(intersection, union, out=np.zeros(count, dtype=np.float32),
+                         where=union > 0, casting="unsafe")
+
+    def pairwise_jaccard(self, rows: np.ndarray) -> np.ndarray:
+        """(len(rows), len(rows)) Jaccard similarity between careers, both fields as one set"""
+        packed = np.concatenate([self.matrices[field][rows] for field in FIELDS], axis=1)
+        intersection = popcount(packed[:, None, :] & packed[None, :, :])
+        union = popcount(packed[:, None, :] | packed[None, :, :])
+        return np.divide(intersection, union, out=np.zeros(intersection.shape, dtype=np.float32),
+                         where=union > 0, casting="unsafe")
+
+    def top_similar(self, user_profile: Dict, k: int) -> List[Tuple[str, float]]:
+        """Top-k (key, Jaccard) for the profile, best first; careers with no overlap are left out"""
+        scores = self.jaccard(user_profile)
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.keys[i], float(scores[i])) for i in top]
+
+
+# ============================================================================
+# PROCESS-WIDE ENCODING
+# ============================================================================
+
+_bitsets: Optional[CareerBitsets] = None
+_bitsets_fingerprint: Optional[str] = None
+_bitsets_lock = threading.Lock()
+
+
+def get_career_bitsets(career_paths: Optional[Dict[str, Dict]] = None) -> CareerBitsets:
+    """Bitsets for the current catalog (built on first use, rebuilt when it changes)"""
+    global _bitsets, _bitsets_fingerprint
+    from .retrieval import catalog_fingerprint
+    if career_paths is None:
+        from .career_data import get_career_paths
+        career_paths = get_career_paths()
+    fingerprint = catalog_fingerprint(career_paths)
+    if _bitsets is not None and _bitsets_fingerprint == fingerprint:
+        return _bitsets
+    with _bitsets_lock:
+        if _bitsets is None or _bitsets_fingerprint != fingerprint:
+            _bitsets, _bitsets_fingerprint = CareerBitsets.build(career_paths), fingerprint
+    return _bitsets
+
+
+__all__ = [
+    'CareerBitsets',
+    'get_career_bitsets',
+    'popcount',
+]
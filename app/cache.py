@@ -0,0 +1,229 @@
+"""
+Shared cache backed by SQLite
+
+One cache file is shared by every api_server worker process, so a roadmap
+generated by one worker is a hit for all of them (no per-worker copies,
+no N-times cache misses). WAL mode lets readers and a writer work at the
+same time. Values are stored as JSON.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .config import load_env
+
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "career_coach.sqlite3")
+
+
+class SharedCache:
+    """
+    Namespaced key/value store with optional TTL
+
+    Safe to use from many threads (one connection per thread) and many
+    processes (SQLite file locking).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0}
+        self._stats_lock = threading.Lock()
+        self._init_schema()
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace  TEXT NOT NULL,
+                    key        TEXT NOT NULL,
+                    value      TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+
+    def close(self) -> None:
+        """Close every connection opened by this process"""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store `value` (JSON-serializable), optionally expiring after `ttl` seconds"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), now, now + ttl if ttl else None),
+            )
+        self._count("writes")
+
+    def add(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store `value` only if the key is missing or expired; returns whether it was stored"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ? AND expires_at IS NOT NULL AND expires_at < ?",
+                (namespace, key, now),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache (namespace, key, value, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), now, now + ttl if ttl else None),
+            )
+        if cursor.rowcount:
+            self._count("writes")
+        return cursor.rowcount == 1
+
+    def expiries(self, namespace: str, keys: List[str]) -> Dict[str, Optional[float]]:
+        """{key: expires_at} for the live entries among `keys` (values are not read)"""
+        now = time.time()
+        found: Dict[str, Optional[float]] = {}
+        conn = self._connect()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, expires_at FROM cache WHERE namespace = ? AND key IN ({','.join('?' * len(chunk))})",
+                (namespace, *chunk),
+            ).fetchall()
+            found.update((key, expires) for key, expires in rows if expires is None or expires >= now)
+        return found
+
+    def delete(self, namespace: str, key: str) -> bool:
+        """Remove an entry; returns whether there was one (expired or not)"""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+        return cursor.rowcount > 0
+
+    def delete_if(self, namespace: str, key: str, value: Any) -> bool:
+        """Remove an entry only if it still holds `value` (e.g. releasing a lease we own)"""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ? AND value = ?",
+                (namespace, key, json.dumps(value)),
+            )
+        return cursor.rowcount > 0
+
+    def renew(self, namespace: str, key: str, value: Any, ttl: float) -> bool:
+        """Restart the TTL of a live entry only if it still holds `value`; returns whether it did"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE cache SET expires_at = ? WHERE namespace = ? AND key = ? AND value = ? "
+                "AND (expires_at IS NULL OR expires_at >= ?)",
+                (now + ttl, namespace, key, json.dumps(value), now),
+            )
+        return cursor.rowcount > 0
+
+    def purge_expired(self) -> int:
+        """Drop expired rows; returns how many were removed"""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus shared entry counts"""
+        rows = self._connect().execute(
+            "SELECT namespace, COUNT(*) FROM cache GROUP BY namespace"
+        ).fetchall()
+        with self._stats_lock:
+            counters = dict(self._stats)
+        return {**counters, "path": self.path, "entries": dict(rows)}
+
+
+# ============================================================================
+# PROCESS-WIDE INSTANCE
+# ============================================================================
+
+_cache: Optional[SharedCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> SharedCache:
+    """Return this process's handle on the shared cache (CAREER_CACHE_PATH)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                load_env()
+                _cache = SharedCache(os.getenv("CAREER_CACHE_PATH", DEFAULT_CACHE_PATH))
+    return _cache
+
+
+def close_cache() -> None:
+    """Close the shared cache handle (call on worker shutdown)"""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
+
+
+__all__ = [
+    'SharedCache',
+    'get_cache',
+    'close_cache',
+]
@@ -5,16 +5,62 @@ This module contains career path information used for matching
 users to appropriate careers based on their interests, skills, and preferences.
 """
 
-from typing import Dict, List
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+from .bitsets import get_career_bitsets
+from .catalog import load_catalog
 
 
 def get_career_paths() -> Dict[str, Dict]:
     """
     Return entertainment career paths database
     
+    Uses the external catalog from CAREER_CATALOG_PATH when set (a lazy,
+    memory-mapped mapping with the same shape), else the built-in one.
+    
     Returns:
         Dictionary of career paths with detailed information
     """
+    catalog = load_catalog()
+    if catalog is not None:
+        return catalog
+    return get_builtin_career_paths()
+
+
+class BuiltinCareerPaths(dict):
+    """
+    The built-in catalog: a plain dict plus a `fingerprint` of its content
+
+    Indexes and bitsets are cached per catalog fingerprint. The built-in
+    records never change at runtime, so the fingerprint is hashed once per
+    process (like CatalogView.fingerprint) instead of on every lookup.
+    """
+
+    fingerprint: Optional[str] = None
+
+
+_builtin_fingerprint: Optional[str] = None
+
+
+def get_builtin_career_paths() -> Dict[str, Dict]:
+    """
+    Return the built-in entertainment career paths
+    
+    Returns:
+        Dictionary of career paths with detailed information (a fresh
+        copy on each call, with a `fingerprint` attribute)
+    """
+    global _builtin_fingerprint
+    paths = BuiltinCareerPaths(_builtin_records())
+    if _builtin_fingerprint is None:
+        _builtin_fingerprint = hashlib.sha1(json.dumps(paths, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    paths.fingerprint = _builtin_fingerprint
+    return paths
+
+
+def _builtin_records() -> Dict[str, Dict]:
     return {
         "audio_engineer": {
             "name": "Audio Engineer",
@@ -198,6 +244,37 @@ def get_career_paths() -> Dict[str, Dict]:
     }
 
 
+def get_builtin_career_aliases() -> Dict[str, List[str]]:
+    """
+    Other names people (and the LLM) use for the built-in careers
+    
+    External catalogs carry these per record as an "aliases" list.
+    
+    Returns:
+        Dictionary of career key to alternative names
+    """
+    return {
+        "audio_engineer": ["recording engineer", "mixing engineer", "mastering engineer", "sound engineer"],
+        "music_producer": ["record producer", "beat maker", "beatmaker"],
+        "content_creator": ["youtuber", "social media creator", "tiktoker"],
+        "video_editor": ["film editor", "video editing", "post production"],
+        "sound_designer": ["game audio designer", "foley artist"],
+        "talent_manager": ["artist manager", "music manager"],
+        "concert_promoter": ["event promoter", "live events producer"],
+        "music_journalist": ["music writer", "music blogger", "music critic"],
+        "broadcast_technician": ["broadcast engineer"],
+        "lighting_designer": ["lighting tech", "stage lighting designer"],
+        "dj": ["disc jockey"],
+        "a_and_r": ["a and r", "artist and repertoire", "talent scout"],
+        "music_teacher": ["music educator", "music instructor"],
+        "tour_manager": ["touring manager"],
+        "music_video_director": ["video director"],
+        "streaming_specialist": ["live streamer", "stream producer"],
+        "songwriter": ["lyricist", "composer"],
+        "podcast_producer": ["podcaster", "podcast editor"],
+    }
+
+
 def get_career_path_by_name(career_name: str) -> Dict:
     """
     Get a specific career path by name
@@ -208,17 +285,22 @@ def get_career_path_by_name(career_name: str) -> Dict:
     Returns:
         Career path dictionary or None if not found
     """
+    from .name_resolver import get_name_resolver
+    
     paths = get_career_paths()
+    resolver = get_name_resolver(paths)
     
-    # Try exact match first
-    for key, path in paths.items():
-        if path["name"].lower() == career_name.lower():
-            return path
+    # Exact name/alias match first, then trigram similarity (see name_resolver.py)
+    resolved = resolver.resolve(career_name)
+    if resolved is not None:
+        return paths[resolved["key"]]
     
-    # Try partial match
-    for key, path in paths.items():
-        if career_name.lower() in path["name"].lower():
-            return path
+    # Then partial match, e.g. "Audio" or "Producer": the resolver's threshold
+    # is for filtering LLM recommendations, not for direct lookups
+    wanted = career_name.lower()
+    for key, name in resolver.names.items():
+        if wanted in name.lower():
+            return paths[key]
     
     return None
 
@@ -233,17 +315,7 @@ def get_career_paths_by_skill(skill: str) -> List[Dict]:
     Returns:
         List of career paths that include this skill
     """
-    paths = get_career_paths()
-    matching_paths = []
-    
-    skill_lower = skill.lower()
-    
-    for key, path in paths.items():
-        path_skills = [s.lower() for s in path.get("skills", [])]
-        if any(skill_lower in ps for ps in path_skills):
-            matching_paths.append(path)
-    
-    return matching_paths
+    return get_career_paths_matching(skills=[skill])
 
 
 def get_career_paths_by_work_style(work_style: str) -> List[Dict]:
@@ -256,17 +328,42 @@ def get_career_paths_by_work_style(work_style: str) -> List[Dict]:
     Returns:
         List of career paths that match this work style
     """
-    paths = get_career_paths()
-    matching_paths = []
+    return get_career_paths_matching(work_styles=[work_style])
+
+
+def get_career_paths_matching(skills: List[str] = None, work_styles: List[str] = None,
+                              match_all: bool = False) -> List[Dict]:
+    """
+    Get career paths matching several skills and/or work styles
     
-    work_style_lower = work_style.lower()
+    Each term matches a career if it is contained in one of the career's
+    entries (case-insensitive). Runs over the bitset encoding in bitsets.py.
     
-    for key, path in paths.items():
-        path_styles = [s.lower() for s in path.get("work_style", [])]
-        if any(work_style_lower in ps for ps in path_styles):
-            matching_paths.append(path)
+    Args:
+        skills: Skill terms to search for
+        work_styles: Work style terms to search for
+        match_all: Require every term to match (default: any term)
     
-    return matching_paths
+    Returns:
+        List of matching career paths, in catalog order
+    """
+    paths = get_career_paths()
+    bitsets = get_career_bitsets(paths)
+    query = bitsets.match_all if match_all else bitsets.match_any
+    
+    rows = None
+    for field, terms in (("skills", skills), ("work_style", work_styles)):
+        if not terms:
+            continue
+        field_rows = query(field, terms)
+        if rows is None:
+            rows = field_rows
+        else:
+            rows = rows & field_rows if match_all else rows | field_rows
+    
+    if rows is None:
+        return []
+    return [paths[key] for key in bitsets.select(rows)]
 
 
 def get_all_skills() -> List[str]:
@@ -276,6 +373,10 @@ def get_all_skills() -> List[str]:
     Returns:
         Sorted list of unique skills
     """
+    catalog = load_catalog()
+    if catalog is not None:
+        return sorted(catalog.vocabulary("skills"))
+    
     paths = get_career_paths()
     all_skills = set()
     
@@ -292,6 +393,10 @@ def get_all_work_styles() -> List[str]:
     Returns:
         Sorted list of unique work styles
     """
+    catalog = load_catalog()
+    if catalog is not None:
+        return sorted(catalog.vocabulary("work_style"))
+    
     paths = get_career_paths()
     all_styles = set()
     
@@ -306,10 +411,14 @@ def get_all_work_styles() -> List[str]:
 # ============================================================================
 
 __all__ = [
+    'BuiltinCareerPaths',
     'get_career_paths',
+    'get_builtin_career_paths',
+    'get_builtin_career_aliases',
     'get_career_path_by_name',
     'get_career_paths_by_skill',
     'get_career_paths_by_work_style',
+    'get_career_paths_matching',
     'get_all_skills',
     'get_all_work_styles',
 ]
\ No newline at end of file
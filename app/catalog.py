@@ -0,0 +1,401 @@
+"""
+External career catalog with a memory-mapped binary sidecar
+
+The built-in catalog in career_data.py is a Python literal of ~20
+careers. For an O*NET-scale catalog (thousands of occupations) set
+CAREER_CATALOG_PATH to a JSONL or Parquet file with one career per
+record (name, description, skills, work_style, salary_range, education,
+entry_path; optional key).
+
+On first use the source is compiled into a binary sidecar:
+
+- every string is interned once in a string table
+- record fields are int32 string IDs in fixed-width columns
+- skills and work styles are int32 IDs into their own vocabularies,
+  stored as flat arrays with per-record offsets
+
+The sidecar is memory-mapped, so opening a catalog costs a header read
+and pages are only touched when used. get_career_paths() returns a
+read-only mapping that materializes a record dict only when it is
+accessed (a small LRU keeps recently used ones). The sidecar is rebuilt
+when the source file changes.
+
+Usage:
+    python -m app.catalog export careers.jsonl      # dump the built-in catalog
+    python -m app.catalog compile careers.jsonl     # build the sidecar ahead of time
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .config import load_env
+
+
+SIDECAR_MAGIC = b"CCATv001"
+SIDECAR_VERSION = 1
+DEFAULT_SIDECAR_DIR = os.path.join(".cache", "catalog")
+
+# Fixed columns, in order; anything else in a record is kept as JSON in "extra"
+STRING_FIELDS = ["key", "name", "description", "salary_range", "education", "entry_path", "extra"]
+LIST_FIELDS = ["skills", "work_style"]
+NO_STRING = -1
+
+
+# ============================================================================
+# SOURCE READING
+# ============================================================================
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def read_source(path: str) -> Iterator[Dict]:
+    """Yield raw records from a .jsonl or .parquet catalog file"""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet catalogs need pyarrow (pip install pyarrow)") from e
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+        return
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON ({e})") from e
+
+
+# ============================================================================
+# COMPILE
+# ============================================================================
+
+class _Interner:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def __call__(self, value) -> int:
+        if value is None or value == "":
+            return NO_STRING
+        value = str(value)
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+
+def compile_catalog(source_path: str, sidecar_path: str) -> int:
+    """
+    Compile a JSONL/Parquet catalog into a sidecar file
+
+    Returns:
+        Number of records compiled
+    """
+    strings = _Interner()
+    vocab = {field: _Interner() for field in LIST_FIELDS}
+    columns = {field: [] for field in STRING_FIELDS}
+    lists = {field: ([], [0]) for field in LIST_FIELDS}  # flat ids, offsets
+    seen_keys = set()
+
+    for record in read_source(source_path):
+        name = record.get("name")
+        if not name:
+            continue
+        key = str(record.get("key") or _slug(name))
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+        extra = {k: v for k, v in record.items() if k not in STRING_FIELDS and k not in LIST_FIELDS}
+        values = {**record, "key": key, "extra": json.dumps(extra, sort_keys=True) if extra else None}
+        for field in STRING_FIELDS:
+            columns[field].append(strings(values.get(field)))
+        for field in LIST_FIELDS:
+            flat, offsets = lists[field]
+            flat.extend(vocab[field](item) for item in record.get(field) or [] if item)
+            offsets.append(len(flat))
+
+    # Vocabulary entries point into the shared string table, so intern
+    # them before the table is encoded
+    vocab_ids = {field: [strings(s) for s in vocab[field].strings] for field in LIST_FIELDS}
+    encoded = [s.encode("utf-8") for s in strings.strings]
+    string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=string_offsets[1:])
+    sections = {
+        "string_offsets": string_offsets,
+        "string_data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "records": np.array([columns[f] for f in STRING_FIELDS], dtype=np.int32).T.reshape(-1, len(STRING_FIELDS)),
+    }
+    for field in LIST_FIELDS:
+        flat, offsets = lists[field]
+        sections[f"{field}_ids"] = np.array(flat, dtype=np.int32)
+        sections[f"{field}_offsets"] = np.array(offsets, dtype=np.int64)
+        sections[f"{field}_vocab"] = np.array(vocab_ids[field], dtype=np.int32)
+
+    _write_sidecar(sidecar_path, sections, {
+        "version": SIDECAR_VERSION,
+        "source": _source_signature(source_path),
+        "count": len(seen_keys),
+        "fields": STRING_FIELDS,
+    })
+    return len(seen_keys)
+
+
+def _write_sidecar(path: str, sections: Dict[str, np.ndarray], meta: Dict) -> None:
+    """Layout: magic | header length (u64) | JSON header | 8-byte aligned raw arrays"""
+    layout = {}
+    offset = 0
+    for name, array in sections.items():
+        offset = (offset + 7) // 8 * 8
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+    header = json.dumps({**meta, "sections": layout}).encode("utf-8")
+    data_start = (len(SIDECAR_MAGIC) + 8 + len(header) + 7) // 8 * 8
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(SIDECAR_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, array in sections.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp, path)
+
+
+def _source_signature(path: str) -> Dict:
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+# ============================================================================
+# MEMORY-MAPPED CATALOG
+# ============================================================================
+
+class CatalogView(Mapping):
+    """
+    Read-only {key: career dict} mapping over a sidecar file
+
+    Records are decoded on access; iteration only decodes keys.
+
+    Args:
+        sidecar_path: Compiled sidecar
+        cache_size: Materialized records kept in memory
+    """
+
+    def __init__(self, sidecar_path: str, cache_size: int = 256):
+        self.path = sidecar_path
+        with open(sidecar_path, "rb") as f:
+            if f.read(len(SIDECAR_MAGIC)) != SIDECAR_MAGIC:
+                raise ValueError(f"{sidecar_path} is not a catalog sidecar")
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            self.meta = json.loads(f.read(header_length))
+        data_start = (len(SIDECAR_MAGIC) + 8 + header_length + 7) // 8 * 8
+        self._arrays = {}
+        for name, spec in self.meta["sections"].items():
+            count = int(np.prod(spec["shape"]))
+            if count == 0:
+                self._arrays[name] = np.zeros(spec["shape"], dtype=spec["dtype"])
+            else:
+                # Plain ndarray view of the mapping: element access on np.memmap
+                # itself allocates a memmap subclass per lookup
+                self._arrays[name] = np.asarray(np.memmap(
+                    sidecar_path, dtype=spec["dtype"], mode="r",
+                    offset=data_start + spec["offset"], shape=tuple(spec["shape"])))
+        self._records = self._arrays["records"]
+        self._string_data = memoryview(self._arrays["string_data"])
+        self._columns = {field: i for i, field in enumerate(self.meta["fields"])}
+        self._cache: "OrderedDict[int, Dict]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._rows: Optional[Dict[str, int]] = None
+        # Stable identity for indexes built over this catalog (see retrieval.py)
+        self.fingerprint = hashlib.sha1(json.dumps(self.meta["source"], sort_keys=True).encode()).hexdigest()[:16]
+
+    # -- strings ---------------------------------------------------------
+
+    def string(self, string_id: int) -> Optional[str]:
+        if string_id == NO_STRING:
+            return None
+        offsets = self._arrays["string_offsets"]
+        start, end = int(offsets[string_id]), int(offsets[string_id + 1])
+        return str(self._string_data[start:end], "utf-8")
+
+    def _field(self, row: int, field: str) -> Optional[str]:
+        return self.string(int(self._records[row, self._columns[field]]))
+
+    def list_ids(self, row: int, field: str) -> np.ndarray:
+        """Vocabulary IDs of a record's skills / work styles (no decoding)"""
+        offsets = self._arrays[f"{field}_offsets"]
+        return self._arrays[f"{field}_ids"][int(offsets[row]):int(offsets[row + 1])]
+
+    def list_column(self, field: str):
+        """(ids, offsets) for a list field across all records: row r is ids[offsets[r]:offsets[r+1]]"""
+        return self._arrays[f"{field}_ids"], self._arrays[f"{field}_offsets"]
+
+    def vocabulary(self, field: str) -> List[str]:
+        """All distinct skills / work styles, in ID order"""
+        return [self.string(int(i)) for i in self._arrays[f"{field}_vocab"]]
+
+    # -- records ---------------------------------------------------------
+
+    def record(self, row: int) -> Dict:
+        """Materialize one record as the same dict shape as the built-in catalog"""
+        with self._lock:
+            cached = self._cache.get(row)
+            if cached is not None:
+                self._cache.move_to_end(row)
+                return cached
+        vocab = {field: self._arrays[f"{field}_vocab"] for field in LIST_FIELDS}
+        info = {
+            "name": self._field(row, "name"),
+            "description": self._field(row, "description") or "",
+            "skills": [self.string(i) for i in vocab["skills"][self.list_ids(row, "skills")].tolist()],
+            "work_style": [self.string(i) for i in vocab["work_style"][self.list_ids(row, "work_style")].tolist()],
+            "salary_range": self._field(row, "salary_range") or "Varies",
+            "education": self._field(row, "education") or "",
+            "entry_path": self._field(row, "entry_path") or "",
+        }
+        extra = self._field(row, "extra")
+        if extra:
+            info.update(json.loads(extra))
+        with self._lock:
+            self._cache[row] = info
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return info
+
+    def key(self, row: int) -> str:
+        return self._field(row, "key")
+
+    def column(self, field: str) -> List[Optional[str]]:
+        """One string field for every record, in row order (no record dicts built)"""
+        return [self.string(i) for i in self._records[:, self._columns[field]].tolist()]
+
+    def _row_index(self) -> Dict[str, int]:
+        if self._rows is None:
+            with self._lock:
+                if self._rows is None:
+                    self._rows = {self.key(row): row for row in range(len(self._records))}
+        return self._rows
+
+    # -- Mapping ---------------------------------------------------------
+
+    def __getitem__(self, key: str) -> Dict:
+        return self.record(self._row_index()[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._row_index())
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, key) -> bool:
+        return key in self._row_index()
+
+
+# ============================================================================
+# PROCESS-WIDE CATALOG
+# ============================================================================
+
+_catalog: Optional[CatalogView] = None
+_catalog_source: Optional[str] = None
+_catalog_lock = threading.Lock()
+
+
+def sidecar_path_for(source_path: str) -> str:
+    load_env()
+    directory = os.getenv("CAREER_CATALOG_SIDECAR_DIR", DEFAULT_SIDECAR_DIR)
+    digest = hashlib.sha1(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:10]
+    base = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(directory, f"{base}-{digest}.ccat")
+
+
+def open_catalog(source_path: str) -> CatalogView:
+    """Map the sidecar for `source_path`, compiling it first if missing or stale"""
+    sidecar = sidecar_path_for(source_path)
+    if os.path.exists(sidecar):
+        try:
+            view = CatalogView(sidecar)
+            if (view.meta.get("version") == SIDECAR_VERSION
+                    and view.meta.get("source") == _source_signature(source_path)):
+                return view
+        except (OSError, ValueError):
+            pass
+    count = compile_catalog(source_path, sidecar)
+    print(f"[CATALOG] Compiled {count} careers from {source_path}")
+    return CatalogView(sidecar)
+
+
+def load_catalog() -> Optional[CatalogView]:
+    """The external catalog from CAREER_CATALOG_PATH, or None to use the built-in one"""
+    global _catalog, _catalog_source
+    load_env()
+    source = os.getenv("CAREER_CATALOG_PATH")
+    if not source:
+        return None
+    if _catalog is None or _catalog_source != source:
+        with _catalog_lock:
+            if _catalog is None or _catalog_source != source:
+                _catalog, _catalog_source = open_catalog(source), source
+    return _catalog
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Career catalog tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Write the built-in catalog as JSONL")
+    export.add_argument("path")
+    compile_ = sub.add_parser("compile", help="Build the sidecar for a JSONL/Parquet catalog")
+    compile_.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        from .career_data import get_builtin_career_paths
+        with open(args.path, "w", encoding="utf-8") as f:
+            for key, info in get_builtin_career_paths().items():
+                f.write(json.dumps({"key": key, **info}) + "\n")
+        print(f"Wrote {args.path}")
+    else:
+        sidecar = sidecar_path_for(args.path)
+        count = compile_catalog(args.path, sidecar)
+        print(f"Compiled {count} careers -> {sidecar}")
+    return 0
+
+
+__all__ = [
+    'CatalogView',
+    'compile_catalog',
+    'open_catalog',
+    'load_catalog',
+    'read_source',
+    'sidecar_path_for',
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
@@ -0,0 +1,307 @@
+"""
+Per-thread turn serialization and cancellation
+
+Two rapid messages on the same conversation thread must not run the graph
+at the same time: both would read the same checkpoint and the later write
+would clobber the earlier one (questions_asked, messages). Turns on the
+same thread_id queue behind each other in arrival order. Different
+threads never wait on each other.
+
+A newer message also supersedes the turn in front of it: the running turn
+is cancelled (including its in-flight provider request), the caller rolls
+the thread back to its pre-turn checkpoint, and the new turn runs with the
+superseded user message(s) carried over, so nothing the user said is lost.
+
+The locks live in one process. With several api_server workers sharing
+their sessions (SESSION_STORE=shared), a SharedTurnLease in the shared
+cache additionally keeps two workers from running turns of the same
+thread at once. Superseding still only reaches turns in the same worker;
+a newer message arriving at another worker waits for the lease instead.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+
+class TurnCancelled(BaseException):
+    """
+    Raised inside a turn that a newer message superseded
+
+    A BaseException (like asyncio.CancelledError) so the nodes' broad
+    `except Exception` fallbacks don't swallow it.
+    """
+
+
+class _PendingMessage:
+    __slots__ = ("text", "delivered")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.delivered = False
+
+
+class TurnHandle:
+    """
+    One conversation turn: its user message(s) and its cancellation token
+
+    Passed to nodes through config["configurable"]["turn"].
+    """
+
+    def __init__(self, thread_id: str, message: str, inherited: List[_PendingMessage] = ()):
+        self.thread_id = thread_id
+        self._messages = [m for m in inherited if not m.delivered] + [_PendingMessage(message)]
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.task: Optional[asyncio.Task] = None
+        self.waited = 0.0
+        self.started_at: Optional[float] = None
+        self.llm_requests_aborted = 0
+        self._cancelled = threading.Event()
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    # -- messages --------------------------------------------------------
+
+    def pending_messages(self) -> List[str]:
+        """User messages this turn must deliver (superseded ones first)"""
+        return [m.text for m in self._messages if not m.delivered]
+
+    def mark_delivered(self) -> None:
+        """Call once the turn's state has been checkpointed"""
+        for m in self._messages:
+            m.delivered = True
+
+    # -- cancellation ----------------------------------------------------
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.started_at = time.perf_counter()
+
+    def run(self, coro) -> asyncio.Task:
+        """
+        Run the turn's graph work as its own task
+
+        cancel() cancels this task, never the caller's: a request task that
+        is streaming the turn out must stay alive to roll back and report
+        "superseded".
+        """
+        self.task = asyncio.ensure_future(coro)
+        return self.task
+
+    def cancel(self) -> None:
+        """Cancel the turn: its run() task (if any) and any in-flight LLM request"""
+        self._cancelled.set()
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            if future.cancel():
+                self.llm_requests_aborted += 1
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise TurnCancelled(self.thread_id)
+
+    def track(self, future: concurrent.futures.Future) -> None:
+        """Register an in-flight LLM request so cancel() can abort it"""
+        with self._lock:
+            self._futures.add(future)
+        if self.cancelled and future.cancel():
+            self.llm_requests_aborted += 1
+
+    def untrack(self, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            self._futures.discard(future)
+
+
+def get_turn(config) -> Optional[TurnHandle]:
+    """The TurnHandle carried in a node's config, if any"""
+    if not config:
+        return None
+    return config.get("configurable", {}).get("turn")
+
+
+class SharedTurnLease:
+    """
+    Cross-process per-thread turn lease in the shared cache
+
+    Args:
+        ttl: Seconds before a lease left by a crashed worker expires
+        poll: Seconds between attempts while another worker holds it
+    """
+
+    NAMESPACE = "chat_turn"
+
+    def __init__(self, ttl: float = 300.0, poll: float = 0.05):
+        self.ttl = ttl
+        self.poll = poll
+
+    async def acquire(self, thread_id: str, handle: TurnHandle) -> Optional[Dict]:
+        """
+        Wait for the lease
+
+        Returns:
+            The owner record to pass to release(), or None if `handle` is
+            superseded while waiting
+        """
+        from .cache import get_cache
+
+        loop = asyncio.get_running_loop()
+        owner = {"pid": os.getpid(), "token": uuid.uuid4().hex}
+        while not handle.cancelled:
+            if await loop.run_in_executor(None, get_cache().add, self.NAMESPACE, thread_id, owner, self.ttl):
+                return owner
+            await asyncio.sleep(self.poll)
+        return None
+
+    def release(self, thread_id: str, owner: Dict) -> None:
+        """Release the lease if `owner` still holds it (not if it expired and was taken over)"""
+        from .cache import get_cache
+
+        get_cache().delete_if(self.NAMESPACE, thread_id, owner)
+
+
+class _ThreadEntry:
+    __slots__ = ("lock", "refs", "latest")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()  # FIFO: waiters acquire in arrival order
+        self.refs = 0               # holder + waiters; entry is evicted at 0
+        self.latest: Optional[TurnHandle] = None  # newest turn (running or queued)
+
+
+class ThreadLockManager:
+    """
+    Async lock per conversation thread
+
+    Entries exist only while a turn is running or queued on the thread,
+    so idle threads cost nothing. Queue wait times and cancelled work are
+    recorded for stats().
+
+    Args:
+        supersede: Cancel the running/queued turn when a newer message
+            arrives on the same thread (otherwise just queue behind it)
+        lease: Also hold this SharedTurnLease while a turn runs (workers
+            sharing sessions)
+    """
+
+    def __init__(self, supersede: bool = True, sample_size: int = 1000,
+                 lease: Optional[SharedTurnLease] = None):
+        self.supersede = supersede
+        self.lease = lease
+        self._entries: Dict[str, _ThreadEntry] = {}
+        self._waits = deque(maxlen=sample_size)
+        self._turns = 0
+        self._queued_turns = 0
+        self._max_wait = 0.0
+        self._superseded = 0
+        self._skipped = 0
+        self._aborted_requests = 0
+        self._superseded_seconds = 0.0
+
+    @asynccontextmanager
+    async def hold(self, thread_id: str, message: str = ""):
+        """
+        Run the body as the only turn on `thread_id`
+
+        Yields the TurnHandle. If it is already cancelled when the lock is
+        acquired (superseded while queued), the body should skip the run.
+        """
+        entry = self._entries.get(thread_id)
+        if entry is None:
+            entry = self._entries[thread_id] = _ThreadEntry()
+
+        previous = entry.latest
+        handle = TurnHandle(thread_id, message, previous._messages if previous else ())
+        if previous is not None and self.supersede:
+            previous.cancel()
+        entry.latest = handle
+
+        entry.refs += 1
+        queued = entry.lock.locked()
+        started = time.perf_counter()
+        try:
+            async with entry.lock:
+                owner = None
+                if self.lease is not None and not handle.cancelled:
+                    owner = await self.lease.acquire(thread_id, handle)
+                handle.waited = time.perf_counter() - started
+                self._record(handle.waited, queued)
+                if handle.cancelled:
+                    self._skipped += 1
+                else:
+                    handle.start()
+                try:
+                    yield handle
+                finally:
+                    if owner is not None:
+                        self.lease.release(thread_id, owner)
+                    self._record_cancellation(handle)
+        finally:
+            entry.refs -= 1
+            if entry.latest is handle:
+                entry.latest = None
+            if entry.refs == 0 and self._entries.get(thread_id) is entry:
+                del self._entries[thread_id]
+
+    def _record_cancellation(self, handle: TurnHandle) -> None:
+        self._aborted_requests += handle.llm_requests_aborted
+        if handle.cancelled and handle.started_at is not None:
+            self._superseded += 1
+            self._superseded_seconds += time.perf_counter() - handle.started_at
+
+    def _record(self, waited: float, queued: bool) -> None:
+        self._turns += 1
+        self._queued_turns += int(queued)
+        self._max_wait = max(self._max_wait, waited)
+        self._waits.append(waited)
+
+    def queue_depth(self, thread_id: str) -> int:
+        """Turns running or waiting on `thread_id`"""
+        entry = self._entries.get(thread_id)
+        return entry.refs if entry else 0
+
+    def stats(self) -> Dict:
+        """Turn counts and queue-wait percentiles (ms)"""
+        waits = sorted(self._waits)
+
+        def pct(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p / 100.0 * len(waits)))] * 1000, 2)
+
+        return {
+            "turns": self._turns,
+            "queued_turns": self._queued_turns,
+            "active_threads": len(self._entries),
+            "waiting_turns": sum(max(0, e.refs - 1) for e in self._entries.values()),
+            "queue_wait_p50_ms": pct(50),
+            "queue_wait_p99_ms": pct(99),
+            "queue_wait_max_ms": round(self._max_wait * 1000, 2),
+            # Cancelled work: turns cut short, turns never started, provider
+            # requests aborted mid-flight, and run time cut short
+            "turns_superseded": self._superseded,
+            "turns_skipped_in_queue": self._skipped,
+            "llm_requests_aborted": self._aborted_requests,
+            "superseded_turn_seconds": round(self._superseded_seconds, 3),
+        }
+
+
+__all__ = [
+    'SharedTurnLease',
+    'ThreadLockManager',
+    'TurnHandle',
+    'TurnCancelled',
+    'get_turn',
+]
@@ -0,0 +1,18 @@
+"""
+Environment configuration
+
+Loads .env once per process, on first use instead of at import time.
+"""
+
+import functools
+
+from dotenv import load_dotenv
+
+
+@functools.lru_cache(maxsize=None)
+def load_env() -> None:
+    """Load variables from .env (no-op after the first call)"""
+    load_dotenv()
+
+
+__all__ = ['load_env']
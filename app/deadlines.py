@@ -0,0 +1,106 @@
+"""
+Per-turn latency budgets
+
+Each turn gets a TurnDeadline, passed to nodes through
+config["configurable"]["deadline"]. Budgets are per stage and measured
+from the start of the turn: a plain discovery turn must answer within
+TURN_BUDGET_DISCOVERY seconds, a turn that runs the recommendation
+pipeline within TURN_BUDGET_PIPELINE seconds. Each LLM call gets the
+remaining budget as its timeout; a node whose budget is spent skips or
+abandons the call and uses its local fallback, so the user-visible
+latency of a turn has a hard upper bound.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from .config import load_env
+
+
+DEFAULT_BUDGETS = {
+    "discovery": 4.0,   # one follow-up question
+    "pipeline": 12.0,   # synthesis -> matching -> action
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """An LLM call ran out of turn budget (nodes treat it like any failure and fall back)"""
+
+
+def turn_budgets() -> Dict[str, float]:
+    """Stage budgets in seconds from TURN_BUDGET_<STAGE> (0 disables a stage's budget)"""
+    load_env()
+    return {
+        stage: float(os.getenv(f"TURN_BUDGET_{stage.upper()}", default))
+        for stage, default in DEFAULT_BUDGETS.items()
+    }
+
+
+class TurnDeadline:
+    """
+    Deadlines for one turn, one per stage, all counted from turn start
+
+    Args:
+        budgets: Seconds per stage (defaults to turn_budgets())
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, float]] = None):
+        self.started = time.monotonic()
+        self.budgets = dict(turn_budgets() if budgets is None else budgets)
+
+    def remaining(self, stage: Optional[str]) -> Optional[float]:
+        """Seconds left for `stage` (may be <= 0), or None if it has no budget"""
+        budget = self.budgets.get(stage) if stage else None
+        if not budget:
+            return None
+        return self.started + budget - time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+def get_deadline(config) -> Optional[TurnDeadline]:
+    """The TurnDeadline carried in a node's config, if any"""
+    if not config:
+        return None
+    return config.get("configurable", {}).get("deadline")
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+_stats = {"llm_calls": 0, "llm_timeouts": 0, "skipped_calls": 0}
+_stage_timeouts: Dict[str, int] = {}
+_stats_lock = threading.Lock()
+
+
+def record_llm_call(stage: Optional[str], outcome: str = "ok") -> None:
+    """Count a budgeted LLM call: "ok", "timeout" (ran out mid-call) or "skipped" (no budget left)"""
+    with _stats_lock:
+        _stats["llm_calls"] += 1
+        if outcome == "timeout":
+            _stats["llm_timeouts"] += 1
+        elif outcome == "skipped":
+            _stats["skipped_calls"] += 1
+        if outcome != "ok":
+            _stage_timeouts[stage] = _stage_timeouts.get(stage, 0) + 1
+
+
+def deadline_stats() -> Dict:
+    """Budgeted LLM calls and how many fell back because the turn ran out of time"""
+    with _stats_lock:
+        return {**_stats, "fallbacks_by_stage": dict(_stage_timeouts), "budgets_s": turn_budgets()}
+
+
+__all__ = [
+    'DEFAULT_BUDGETS',
+    'DeadlineExceeded',
+    'TurnDeadline',
+    'turn_budgets',
+    'get_deadline',
+    'record_llm_call',
+    'deadline_stats',
+]
@@ -0,0 +1,201 @@
+"""
+Adaptive discovery: when to stop asking questions
+
+router_node used to ask exactly six questions (two each on interests,
+skills and work style) however much the user had already said. Now the
+router keeps a live profile - each answer filed under the focus of the
+question it answered - and after every answer scores the catalog
+against it with the local retrieval index (no LLM). Discovery ends as
+soon as:
+
+- at least DISCOVERY_MIN_QUESTIONS (default 3) have been asked and
+  interests, skills and work style all have an answer
+  (calculate_profile_completeness)
+- the last answer did not change the local top 3, and
+- the gap between the 3rd and 4th career is wider than the next answer
+  is expected to move any career's score, so it is unlikely to change
+  the outcome. The estimate is the largest score change the last answer
+  caused, scaled by n/(n+1) for n answers so far: each answer is a
+  smaller share of a growing profile.
+
+DISCOVERY_MAX_QUESTIONS (default 6, the old fixed count) is still the
+cap. DISCOVERY_EARLY_EXIT=0 turns the early exit off.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from .config import load_env
+
+
+# Focus name (router/discovery prompts) -> profile field
+FOCUS_FIELDS = {"interests": "interests", "skills": "skills", "workstyle": "work_style"}
+
+DEFAULT_MIN_QUESTIONS = 3
+DEFAULT_MAX_QUESTIONS = 6
+MIN_COMPLETENESS = 0.85  # interests + skills + work style add up to 0.9
+STABLE_TOP_K = 3
+
+# Floor for the shift estimate: one vague answer doesn't prove the next will be
+MIN_EXPECTED_SHIFT = 0.01
+
+_stats = {"completed": 0, "early_exits": 0, "questions_asked": 0, "questions_saved": 0}
+_stats_lock = threading.Lock()
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+def discovery_limits() -> Dict:
+    """{"min_questions", "max_questions", "early_exit"} from the environment"""
+    load_env()
+    return {
+        "min_questions": int(os.getenv("DISCOVERY_MIN_QUESTIONS", DEFAULT_MIN_QUESTIONS)),
+        "max_questions": int(os.getenv("DISCOVERY_MAX_QUESTIONS", DEFAULT_MAX_QUESTIONS)),
+        "early_exit": os.getenv("DISCOVERY_EARLY_EXIT", "1").lower() not in ("0", "false", "no", "off"),
+    }
+
+
+# ============================================================================
+# LIVE PROFILE
+# ============================================================================
+
+def pending_answers(messages: List[BaseMessage]) -> List[str]:
+    """User messages since the last assistant message (usually one)"""
+    answers = []
+    for msg in reversed(messages):
+        if isinstance(msg, AIMessage):
+            break
+        if isinstance(msg, HumanMessage):
+            answers.append(msg.content if isinstance(msg.content, str) else str(msg.content))
+    return list(reversed(answers))
+
+
+def update_live_profile(live_profile: Dict, focus: Optional[str], answers: List[str]) -> Dict:
+    """
+    File answers under the profile field their question was about
+
+    Args:
+        live_profile: Profile so far ({field: [answer, ...]})
+        focus: Focus of the question being answered (None for the opening
+            message, which is filed under interests)
+        answers: New user messages
+
+    Returns:
+        A new profile dict; the input is not modified
+    """
+    field = FOCUS_FIELDS.get(focus or "interests", "interests")
+    updated = {key: list(values) for key, values in (live_profile or {}).items()}
+    updated.setdefault(field, []).extend(answer.strip() for answer in answers if answer and answer.strip())
+    return updated
+
+
+def next_focus(live_profile: Dict) -> str:
+    """The focus with the fewest answers so far (interests, skills, work style on ties)"""
+    return min(FOCUS_FIELDS, key=lambda focus: len(live_profile.get(FOCUS_FIELDS[focus], [])))
+
+
+# ============================================================================
+# RANKING STABILITY
+# ============================================================================
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    top = np.argpartition(-scores, k)[:k + 1]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def ranking_outlook(previous_profile: Dict, live_profile: Dict, k: int = STABLE_TOP_K) -> Optional[Dict]:
+    """
+    How the last answer moved the local ranking
+
+    Returns:
+        {"top", "stable", "gap", "shift", "expected_shift"} - current top-k
+        keys, whether the top-k set is unchanged by the last answer, the
+        score gap between the k-th and (k+1)-th career, the largest score
+        change the last answer caused, and the change expected from the
+        next one. None if the profile can't be ranked yet.
+    """
+    from .retrieval import get_career_index
+
+    index = get_career_index()
+    current = index.scores(live_profile)
+    if current is None or len(current) <= k:
+        return None
+    top = _top(current, k)
+    previous = index.scores(previous_profile) if previous_profile else None
+    if previous is None:
+        shift, stable = float("inf"), False
+    else:
+        shift = float(np.max(np.abs(current - previous)))
+        stable = set(top[:k].tolist()) == set(_top(previous, k)[:k].tolist())
+    answers = sum(len(values) for values in live_profile.values())
+    return {
+        "top": [index.keys[i] for i in top[:k]],
+        "stable": stable,
+        "gap": float(current[top[k - 1]] - current[top[k]]),
+        "shift": shift,
+        "expected_shift": max(shift * answers / (answers + 1), MIN_EXPECTED_SHIFT),
+    }
+
+
+def _record(questions_asked: int, saved: int) -> None:
+    with _stats_lock:
+        _stats["completed"] += 1
+        _stats["questions_asked"] += questions_asked
+        if saved:
+            _stats["early_exits"] += 1
+            _stats["questions_saved"] += saved
+
+
+def plan_next_question(questions_asked: int, previous_profile: Dict, live_profile: Dict,
+                       completeness: float) -> Optional[str]:
+    """
+    Focus for the next discovery question, or None when discovery is done
+
+    Args:
+        questions_asked: Questions asked so far
+        previous_profile: Live profile before the latest answer
+        live_profile: Live profile including it
+        completeness: calculate_profile_completeness(live_profile)
+    """
+    limits = discovery_limits()
+    if questions_asked >= limits["max_questions"]:
+        _record(questions_asked, 0)
+        return None
+
+    if (limits["early_exit"] and questions_asked >= limits["min_questions"]
+            and completeness >= MIN_COMPLETENESS):
+        outlook = ranking_outlook(previous_profile, live_profile)
+        if outlook and outlook["stable"] and outlook["gap"] > outlook["expected_shift"]:
+            saved = limits["max_questions"] - questions_asked
+            print(f"[ROUTER] Ranking stable after {questions_asked} questions "
+                  f"(gap {outlook['gap']:.3f} > expected shift {outlook['expected_shift']:.3f}), skipping {saved}")
+            _record(questions_asked, saved)
+            return None
+
+    return next_focus(live_profile)
+
+
+def discovery_stats() -> Dict:
+    """Discovery phases finished in this process and questions saved by early exit"""
+    with _stats_lock:
+        stats = dict(_stats)
+    completed = stats["completed"]
+    stats["avg_questions"] = round(stats["questions_asked"] / completed, 2) if completed else 0.0
+    return stats
+
+
+__all__ = [
+    'discovery_limits',
+    'discovery_stats',
+    'next_focus',
+    'pending_answers',
+    'plan_next_question',
+    'ranking_outlook',
+    'update_live_profile',
+]
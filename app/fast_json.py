@@ -0,0 +1,45 @@
+"""
+Fast JSON encoding for API responses
+
+Uses orjson when it is installed (several times faster than the json
+module on message-heavy payloads like /history), else the json module
+with compact separators. Both produce UTF-8 bytes.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+
+def backend() -> str:
+    """Encoder in use: orjson or json"""
+    return "orjson" if orjson is not None else "json"
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode `obj` as compact UTF-8 JSON
+
+    Non-string dict keys and numpy values are accepted; anything else
+    unknown is encoded with str(), like json.dumps(default=str).
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _default(value: Any):
+    # numpy scalars/arrays (ranking signals) without importing numpy here
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+__all__ = [
+    'backend',
+    'dumps',
+]
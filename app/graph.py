@@ -1,8 +1,15 @@
+import asyncio
+import functools
 import os
-from typing import Literal
+import threading
+from typing import Literal, Optional
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import AIMessage
 
+from .concurrency import SharedTurnLease, ThreadLockManager, TurnCancelled
+from .config import load_env
+from .deadlines import TurnDeadline
+from .session_store import create_session_checkpointer, session_store_mode
 from .nodes import (
     CareerCoachState,
     greeting_node,
@@ -204,9 +211,14 @@ def old_create_graph():
     
     return graph
 
-def create_graph():
+def create_graph(checkpointer=None):
     """
     Create the 10-node career coach LangGraph workflow
+
+    Args:
+        checkpointer: Optional checkpointer for conversation persistence.
+            Leave unset for LangGraph Studio / `langgraph dev`, which
+            provides its own persistence.
     """
     
     # Initialize the graph with state
@@ -318,13 +330,51 @@ def create_graph():
     # ========================================================================
     # COMPILE GRAPH
     # ========================================================================
-    graph = workflow.compile()
+    graph = workflow.compile(checkpointer=checkpointer)
     
     return graph
 
 
-# Create the graph instance
-graph = create_graph()
+# ============================================================================
+# GRAPH INSTANCES (compiled lazily, once per process)
+# ============================================================================
+
+# lru_cache alone can compile twice if two threads race on first use,
+# which would give them different MemorySavers
+_graph_lock = threading.Lock()
+
+
+_session_checkpointer = None
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_graph(with_checkpointer: bool):
+    global _session_checkpointer
+    if not with_checkpointer:
+        return create_graph()
+    _session_checkpointer = create_session_checkpointer()
+    return create_graph(checkpointer=_session_checkpointer)
+
+
+def get_graph():
+    """Graph for LangGraph Studio / `langgraph dev` (server provides persistence)"""
+    with _graph_lock:
+        return _compiled_graph(False)
+
+
+def get_session_graph():
+    """Graph for the in-process helpers below, with the session checkpointer (see session_store)"""
+    with _graph_lock:
+        return _compiled_graph(True)
+
+
+def __getattr__(name: str):
+    # `from app.graph import graph` keeps working, but compiles on first access
+    if name == "graph":
+        return get_graph()
+    if name == "session_graph":
+        return get_session_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 
@@ -341,6 +391,8 @@ def initialize_state() -> CareerCoachState:
         "questions_asked": 0,
         "current_focus": None,
         "user_profile": {},
+        "live_profile": {},
+        "question_sources": [],
         "insights": [],
         "profile_completeness": 0.0,
         "career_matches": [],
@@ -349,7 +401,54 @@ def initialize_state() -> CareerCoachState:
         "_routing_decision": None
     }
 
-graph= create_graph()
+def _turn_input(current_state, user_messages) -> dict:
+    """Graph input for a new turn: checkpointed state (or fresh) plus the user message(s)"""
+    if current_state and current_state.values:
+        state = current_state.values
+    else:
+        state = initialize_state()
+    
+    # Add user message(s) to state
+    if isinstance(user_messages, str):
+        user_messages = [user_messages]
+    for user_message in user_messages:
+        state["messages"].append({
+            "role": "user",
+            "content": user_message
+        })
+    return state
+
+
+def _turn_result(final_state, state) -> dict:
+    """Shape the final graph state into the run_career_coach response"""
+    # Get assistant's last message
+    if final_state and final_state.get("messages"):
+        # Find last assistant message
+        for msg in reversed(final_state["messages"]):
+            if isinstance(msg, AIMessage):
+                return {
+                    "response": msg.content,
+                    "state": final_state,
+                    "phase": final_state.get("phase", "unknown"),
+                    "recommendations": final_state.get("top_recommendations", [])
+                }
+    
+    return {
+        "response": "I'm having trouble processing that. Can you try again?",
+        "state": state,
+        "phase": state.get("phase", "unknown"),
+        "recommendations": []
+    }
+
+
+def _turn_error(state) -> dict:
+    return {
+        "response": "Sorry, I encountered an error. Please try again.",
+        "state": state if state is not None else initialize_state(),
+        "phase": "error",
+        "recommendations": []
+    }
+
 
 def run_career_coach(user_message: str, thread_id: str = "default") -> dict:
     """
@@ -364,54 +463,159 @@ def run_career_coach(user_message: str, thread_id: str = "default") -> dict:
     """
     
     config = {"configurable": {"thread_id": thread_id}}
+    graph = get_session_graph()
+    state = None
     
     try:
-        # Get current state or initialize
-        current_state = graph.get_state(config)
-        
-        if current_state and current_state.values:
-            state = current_state.values
-        else:
-            state = initialize_state()
-        
-        # Add user message to state
-        state["messages"].append({
-            "role": "user",
-            "content": user_message
-        })
+        state = _turn_input(graph.get_state(config), user_message)
         
         # Run the graph
         final_state = None
-        for event in graph.stream(state, config, stream_mode="values"):
+        run_config = {"configurable": {**config["configurable"], "deadline": TurnDeadline()}}
+        for event in graph.stream(state, run_config, stream_mode="values"):
             final_state = event
         
-        # Get assistant's last message
-        if final_state and final_state.get("messages"):
-            # Find last assistant message
-            for msg in reversed(final_state["messages"]):
-                if msg["role"] == "assistant":
-                    return {
-                        "response": msg["content"],
-                        "state": final_state,
-                        "phase": final_state.get("phase", "unknown"),
-                        "recommendations": final_state.get("top_recommendations", [])
-                    }
+        return _turn_result(final_state, state)
         
-        return {
-            "response": "I'm having trouble processing that. Can you try again?",
-            "state": state,
-            "phase": state.get("phase", "unknown"),
-            "recommendations": []
-        }
+    except Exception as e:
+        print(f"Error running graph: {e}")
+        return _turn_error(state)
+
+
+# Turns on the same thread run one at a time; different threads run in
+# parallel. A newer message cancels the turn in front of it (CHAT_SUPERSEDE).
+# Workers sharing sessions also take a per-thread lease in the shared cache.
+load_env()
+turn_locks = ThreadLockManager(
+    supersede=os.getenv("CHAT_SUPERSEDE", "true").lower() == "true",
+    lease=SharedTurnLease() if session_store_mode() == "shared" else None,
+)
+
+
+def _turn_superseded() -> dict:
+    return {
+        "response": "",
+        "state": None,
+        "phase": "superseded",
+        "recommendations": []
+    }
+
+
+def _consume_cancellation() -> None:
+    """We handled a cancellation ourselves; clear it so the task carries on normally"""
+    task = asyncio.current_task()
+    if task is not None and hasattr(task, "uncancel") and task.cancelling():
+        task.uncancel()
+
+
+async def _rollback(graph, config: dict, snapshot) -> None:
+    """Make the pre-turn checkpoint the thread's latest again"""
+    if snapshot.config.get("configurable", {}).get("checkpoint_id"):
+        # Copies the pre-turn checkpoint to the head of the thread; partial
+        # writes of the cancelled turn (e.g. synthesis done, matching not)
+        # are discarded. "__copy__" needs no as_node to route from, which
+        # the seeded opening checkpoint doesn't have.
+        await graph.aupdate_state(snapshot.config, None, as_node="__copy__")
+    else:
+        graph.checkpointer.delete_thread(config["configurable"]["thread_id"])
+
+
+async def _turn_task(graph, config: dict, turn, events: Optional[asyncio.Queue] = None):
+    """
+    One turn's graph work, run as the turn's own task (TurnHandle.run)
+
+    Reads the thread's checkpoint, runs the graph and marks the turn's
+    messages delivered once its state is checkpointed. If the turn is
+    cancelled (superseded, or its caller went away) the thread is rolled
+    back to the pre-turn checkpoint and the result is (None, state).
+
+    Args:
+        events: Receives each state update as the graph produces it
+
+    Returns:
+        (final_state, input_state)
+    """
+    snapshot = None
+    state = None
+    try:
+        snapshot = await graph.aget_state(config)
+        state = _turn_input(snapshot, turn.pending_messages())
+        run_config = {"configurable": {
+            **config["configurable"], "turn": turn, "deadline": TurnDeadline()
+        }}
+        
+        final_state = None
+        async for event in graph.astream(state, run_config, stream_mode="values"):
+            final_state = event
+            if events is not None:
+                events.put_nowait(event)
+        turn.mark_delivered()
+        return final_state, state
+    except (asyncio.CancelledError, TurnCancelled):
+        if not turn.cancelled:
+            raise
+        _consume_cancellation()
+        # Cancelled during the state read: nothing was written, nothing to roll back
+        if snapshot is not None:
+            await _rollback(graph, config, snapshot)
+        return None, state
+
+
+async def _finish_turn(turn, task: asyncio.Task):
+    """
+    Wait out the turn's task once its caller is done with it
+
+    A caller leaving early (client disconnect, stream closed) cancels the
+    turn, so the thread is rolled back and a queued turn re-sends the
+    message instead of finding it both checkpointed and undelivered.
+
+    Returns:
+        (final_state, input_state); final_state is None if the turn was cancelled
+    """
+    if not task.done():
+        turn.cancel()
+    await asyncio.wait([task])
+    if task.cancelled():
+        # Cancelled before it started: nothing was read or written
+        return None, None
+    return task.result()
+
+
+async def arun_career_coach(user_message: str, thread_id: str = "default") -> dict:
+    """
+    Async run_career_coach for in-process serving (api_server /chat)
+    
+    Sync nodes run in the executor, so the event loop stays free while a
+    node waits on the LLM. Turns on the same thread_id are serialized, and
+    a newer message supersedes this one: the run and its provider request
+    are cancelled, the thread is rolled back, and the result has
+    phase "superseded" (the newer turn answers both messages).
+    """
+    
+    config = {"configurable": {"thread_id": thread_id}}
+    graph = get_session_graph()
+    state = None
+    
+    try:
+        # Read-modify-write of the checkpoint must not interleave with
+        # another turn on the same thread
+        async with turn_locks.hold(thread_id, user_message) as turn:
+            if turn.cancelled:
+                return _turn_superseded()
+            
+            task = turn.run(_turn_task(graph, config, turn))
+            try:
+                await asyncio.wait([task])
+            finally:
+                final_state, state = await _finish_turn(turn, task)
+            if final_state is None:
+                return _turn_superseded()
+        
+        return _turn_result(final_state, state)
         
     except Exception as e:
         print(f"Error running graph: {e}")
-        return {
-            "response": "Sorry, I encountered an error. Please try again.",
-            "state": state if 'state' in locals() else initialize_state(),
-            "phase": "error",
-            "recommendations": []
-        }
+        return _turn_error(state)
 
 
 def run_career_coach_stream(user_message: str, thread_id: str = "default"):
@@ -430,7 +634,7 @@ def run_career_coach_stream(user_message: str, thread_id: str = "default"):
     
     try:
         # Get current state or initialize
-        current_state = graph.get_state(config)
+        current_state = get_session_graph().get_state(config)
         
         if current_state and current_state.values:
             state = current_state.values
@@ -444,7 +648,8 @@ def run_career_coach_stream(user_message: str, thread_id: str = "default"):
         })
         
         # Stream events
-        for event in graph.stream(state, config, stream_mode="values"):
+        run_config = {"configurable": {**config["configurable"], "deadline": TurnDeadline()}}
+        for event in get_session_graph().stream(state, run_config, stream_mode="values"):
             # Yield each state update
             yield {
                 "messages": event.get("messages", []),
@@ -468,9 +673,71 @@ def run_career_coach_stream(user_message: str, thread_id: str = "default"):
         }
 
 
+async def arun_career_coach_stream(user_message: str, thread_id: str = "default"):
+    """
+    Async run_career_coach_stream for in-process serving (api_server /chat/stream)
+    
+    The graph runs in the turn's own task and hands its updates over a
+    queue, so superseding the turn never cancels the response that is
+    streaming it; a slow consumer still gets the "superseded" update.
+    
+    Yields:
+        Same state-update dicts as run_career_coach_stream
+    """
+    
+    config = {"configurable": {"thread_id": thread_id}}
+    graph = get_session_graph()
+    superseded = {
+        "messages": [],
+        "phase": "superseded",
+        "questions_asked": 0,
+        "profile_completeness": 0.0,
+        "top_recommendations": []
+    }
+    
+    try:
+        async with turn_locks.hold(thread_id, user_message) as turn:
+            if turn.cancelled:
+                yield superseded
+                return
+            
+            events = asyncio.Queue()
+            task = turn.run(_turn_task(graph, config, turn, events))
+            task.add_done_callback(lambda _: events.put_nowait(None))
+            try:
+                while (event := await events.get()) is not None:
+                    yield {
+                        "messages": event.get("messages", []),
+                        "phase": event.get("phase", "unknown"),
+                        "questions_asked": event.get("questions_asked", 0),
+                        "profile_completeness": event.get("profile_completeness", 0.0),
+                        "top_recommendations": event.get("top_recommendations", [])
+                    }
+            finally:
+                # Also runs on GeneratorExit / cancellation of the response
+                final_state, _ = await _finish_turn(turn, task)
+            if final_state is None:
+                yield superseded
+            
+    except Exception as e:
+        print(f"Error in stream: {e}")
+        yield {
+            "messages": [AIMessage(content="Sorry, I encountered an error.")],
+            "phase": "error",
+            "questions_asked": 0,
+            "profile_completeness": 0.0,
+            "top_recommendations": []
+        }
+
+
 def start_new_conversation(thread_id: str = "default") -> dict:
     """
-    Start a brand new conversation (runs greeting node)
+    Start a brand new conversation
+    
+    Seeds the thread's checkpoint with the precomputed opening turn
+    (greeting + first question, see app/greeting.py) without running the
+    graph or waiting on the LLM. With GREETING_FAST_PATH=0 it runs the
+    greeting node instead.
     
     Args:
         thread_id: Unique identifier for this conversation thread
@@ -478,6 +745,7 @@ def start_new_conversation(thread_id: str = "default") -> dict:
     Returns:
         dict with initial greeting and state
     """
+    from .greeting import fast_path_enabled, opening_state
     
     config = {"configurable": {"thread_id": thread_id}}
     
@@ -485,9 +753,20 @@ def start_new_conversation(thread_id: str = "default") -> dict:
         # Initialize fresh state
         state = initialize_state()
         
+        if fast_path_enabled():
+            graph = get_session_graph()
+            opening = opening_state(state)
+            # As if discovery_node had just run: the next message goes to the router
+            graph.update_state(config, opening, as_node="discovery")
+            return {
+                "response": "\n\n".join(msg.content for msg in opening["messages"]),
+                "state": graph.get_state(config).values,
+                "phase": "discovery"
+            }
+        
         # Run just the greeting node
         final_state = None
-        for event in graph.stream(state, config, stream_mode="values"):
+        for event in get_session_graph().stream(state, config, stream_mode="values"):
             final_state = event
             # Stop after greeting
             if final_state.get("phase") == "discovery":
@@ -495,7 +774,7 @@ def start_new_conversation(thread_id: str = "default") -> dict:
         
         # Get the greeting message
         if final_state and final_state.get("messages"):
-            greeting_msg = final_state["messages"][-1]["content"]
+            greeting_msg = final_state["messages"][-1].content
             return {
                 "response": greeting_msg,
                 "state": final_state,
@@ -531,7 +810,7 @@ def get_conversation_history(thread_id: str = "default") -> dict:
     config = {"configurable": {"thread_id": thread_id}}
     
     try:
-        current_state = graph.get_state(config)
+        current_state = get_session_graph().get_state(config)
         if current_state and current_state.values:
             return {
                 "messages": current_state.values.get("messages", []),
@@ -570,14 +849,11 @@ def reset_conversation(thread_id: str = "default") -> bool:
         bool indicating success
     """
     
-    config = {"configurable": {"thread_id": thread_id}}
-    
     try:
-        # Create fresh state
-        fresh_state = initialize_state()
-        
-        # Update state (this effectively resets it)
-        graph.update_state(config, fresh_state)
+        # Drop every checkpoint for the thread; the next message starts fresh.
+        # (update_state with an initial state can't clear messages, since
+        # add_messages appends.)
+        get_session_graph().checkpointer.delete_thread(thread_id)
         
         return True
     except Exception as e:
@@ -585,6 +861,29 @@ def reset_conversation(thread_id: str = "default") -> bool:
         return False
 
 
+def session_store_stats() -> dict:
+    """Resident size / spill counters of the session checkpointer (thread counts when shared)"""
+    checkpointer = get_session_graph().checkpointer
+    if hasattr(checkpointer, "stats"):
+        return checkpointer.stats()
+    return {"budget_bytes": None}
+
+
+def close_session_store() -> None:
+    """Close the session store; deletes the spill file (call on worker shutdown)"""
+    if hasattr(_session_checkpointer, "close"):
+        _session_checkpointer.close()
+
+
+def serialize_message(msg) -> dict:
+    """Convert a LangChain message to a JSON-friendly {id, role, content} dict"""
+    roles = {"human": "user", "ai": "assistant", "system": "system"}
+    if isinstance(msg, dict):
+        return {"id": msg.get("id"), "role": msg.get("role", "unknown"), "content": msg.get("content", "")}
+    content = msg.content if isinstance(msg.content, str) else str(msg.content)
+    return {"id": msg.id, "role": roles.get(msg.type, msg.type), "content": content}
+
+
 def get_graph_visualization():
     """
     Get a text representation of the graph structure
@@ -633,11 +932,21 @@ def get_graph_visualization():
 
 __all__ = [
     "graph",
+    "session_graph",
+    "create_graph",
+    "get_graph",
+    "get_session_graph",
     "run_career_coach",
     "run_career_coach_stream",
+    "arun_career_coach",
+    "arun_career_coach_stream",
+    "turn_locks",
+    "serialize_message",
     "start_new_conversation",
     "get_conversation_history",
     "reset_conversation",
+    "session_store_stats",
+    "close_session_store",
     "get_graph_visualization"
 ]
 
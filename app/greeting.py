@@ -0,0 +1,177 @@
+"""
+Precomputed opening turn
+
+start_new_conversation used to stream the graph through greeting_node,
+router_node and discovery_node just to show the opening message - the
+most latency-sensitive moment in a session. The opening turn is always
+the same: prompts.INITIAL_GREETING followed by a first question about
+interests. This module keeps that first question ready:
+
+- until the LLM has written one, it is the bank question from
+  prompts.DISCOVERY_QUESTION_BANK (no LLM needed)
+- in the background, the LLM writes one exactly as discovery_node would
+  for an empty conversation; it is refreshed every
+  GREETING_REFRESH_SECONDS (default 1 hour) so openers don't go stale
+
+Callers never wait for a refresh: a stale question is served while the
+next one is generated. GREETING_FAST_PATH=0 goes back to running the graph.
+"""
+
+import os
+import threading
+import time
+from typing import Dict
+
+from langchain_core.messages import AIMessage
+
+from . import prompts
+from .config import load_env
+
+
+DEFAULT_REFRESH_SECONDS = 3600
+
+# Wait after a failed refresh before trying again
+RETRY_SECONDS = 60
+
+# Opening question when no LLM-written one is ready
+FIRST_FOCUS = "interests"
+BANK_QUESTION_ID = "interests_spark"
+
+_question: Dict = {}
+_refreshing = False
+_worker = None
+_next_refresh = 0.0
+_lock = threading.Lock()
+_stats = {"served": 0, "refreshes": 0, "refresh_errors": 0}
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+def fast_path_enabled() -> bool:
+    """GREETING_FAST_PATH (default on)"""
+    load_env()
+    return os.getenv("GREETING_FAST_PATH", "1").lower() not in ("0", "false", "no", "off")
+
+
+def refresh_interval() -> float:
+    """Seconds an LLM-written first question is served before it is regenerated"""
+    load_env()
+    return float(os.getenv("GREETING_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS))
+
+
+# ============================================================================
+# FIRST QUESTION
+# ============================================================================
+
+def _bank_question() -> Dict:
+    text = dict(prompts.DISCOVERY_QUESTION_BANK[FIRST_FOCUS])[BANK_QUESTION_ID]
+    return {"text": text, "source": BANK_QUESTION_ID, "generated_at": 0.0}
+
+
+def _generate() -> None:
+    """Background worker: have the LLM write a fresh first question"""
+    global _question, _refreshing, _next_refresh
+    from .nodes import generate_discovery_question, get_llm
+
+    try:
+        llm = get_llm("discovery")
+        if llm is None:
+            with _lock:
+                _next_refresh = time.time() + refresh_interval()
+            return
+        text = generate_discovery_question(
+            llm, [AIMessage(content=prompts.INITIAL_GREETING)], {}, 0, FIRST_FOCUS, priority="bulk"
+        )
+        if not text:
+            raise ValueError("empty question")
+        with _lock:
+            _question = {"text": text, "source": "greeting", "generated_at": time.time()}
+            _next_refresh = time.time() + refresh_interval()
+            _stats["refreshes"] += 1
+        print("[GREETING] First question refreshed")
+    except Exception as e:
+        print(f"[GREETING] Refresh failed, keeping the current question: {e}")
+        with _lock:
+            _next_refresh = time.time() + RETRY_SECONDS
+            _stats["refresh_errors"] += 1
+    finally:
+        with _lock:
+            _refreshing = False
+
+
+def refresh_first_question(wait: bool = False) -> None:
+    """
+    Regenerate the first question in a background thread (at most one at a time)
+
+    Args:
+        wait: Block until the refresh (this one or one in flight) is done
+    """
+    global _refreshing, _worker
+    with _lock:
+        if not _refreshing:
+            _refreshing = True
+            _worker = threading.Thread(target=_generate, name="greeting-refresh", daemon=True)
+            _worker.start()
+        worker = _worker
+    if wait:
+        worker.join()
+
+
+def first_question() -> Dict:
+    """
+    The current first question, without waiting for the LLM
+
+    Returns:
+        {"text", "source", "generated_at"} - source is "greeting" for an
+        LLM-written question, else the bank question id. Schedules a
+        refresh when the question is missing or older than refresh_interval().
+    """
+    with _lock:
+        question = _question or _bank_question()
+        due = time.time() >= _next_refresh
+        _stats["served"] += 1
+    if due:
+        refresh_first_question()
+    return question
+
+
+def opening_state(state: Dict) -> Dict:
+    """
+    State after the opening turn, as greeting -> router -> discovery would leave it
+
+    Args:
+        state: Fresh state (initialize_state())
+    """
+    question = first_question()
+    return {
+        **state,
+        "messages": [AIMessage(content=prompts.INITIAL_GREETING), AIMessage(content=question["text"])],
+        "phase": "discovery",
+        "questions_asked": 1,
+        "current_focus": FIRST_FOCUS,
+        "live_profile": {},
+        "question_sources": [question["source"]],
+    }
+
+
+def greeting_stats() -> Dict:
+    """Opening turns served from the fast path and background refreshes"""
+    with _lock:
+        age = time.time() - _question["generated_at"] if _question else None
+        return {
+            **_stats,
+            "source": _question.get("source", BANK_QUESTION_ID),
+            "age_s": round(age, 1) if age is not None else None,
+        }
+
+
+__all__ = [
+    'fast_path_enabled',
+    'first_question',
+    'greeting_stats',
+    'opening_state',
+    'refresh_first_question',
+    'refresh_interval',
+]
@@ -0,0 +1,191 @@
+"""
+Paginated conversation history
+
+get_conversation_history returns a thread's whole messages list plus
+profile and recommendations, and the UI fetched all of it on every
+refresh. history_page() returns only what the client asks for:
+
+- page mode: the newest `limit` messages, or the `limit` messages just
+  before `cursor` (a message id) to scroll back; "next_cursor" is the
+  cursor for the page before this one
+- delta mode: only messages after `since` (the last message id the
+  client has); "next_since" is the id to pass next time. If `since` is
+  no longer in the thread (reset, or a superseded turn rolled back), the
+  response has "reset": true and the newest page, so the client
+  replaces what it has
+- `fields` projects the response onto any of HISTORY_FIELDS, e.g.
+  ["messages"] or ["recommendations"]
+
+Message ids are stable (add_messages assigns them once), so cursors stay
+valid while the thread grows.
+
+Loading a checkpoint deserializes every message in it, which costs more
+than encoding the page. The serialized history of recently read threads
+is therefore kept per checkpoint id, and a refresh with no new turn
+skips the checkpoint load.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Threads whose serialized history is kept between requests
+SNAPSHOT_CACHE_SIZE = 256
+
+HISTORY_FIELDS = ("messages", "user_profile", "recommendations", "phase", "completeness")
+
+
+_snapshots: "OrderedDict[str, tuple]" = OrderedDict()  # thread_id -> (checkpoint id, history)
+_snapshots_lock = threading.Lock()
+_stats = {"snapshot_hits": 0, "snapshot_misses": 0}
+
+
+def _message_id(message) -> Optional[str]:
+    return message.get("id") if isinstance(message, dict) else getattr(message, "id", None)
+
+
+def _position(messages: List, message_id: Optional[str]) -> Optional[int]:
+    """Index of the message with this id (searched from the end), or None"""
+    if not message_id:
+        return None
+    for index in range(len(messages) - 1, -1, -1):
+        if _message_id(messages[index]) == message_id:
+            return index
+    return None
+
+
+def paginate_messages(messages: List, limit: Optional[int] = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                      since: Optional[str] = None) -> Dict:
+    """
+    Slice a thread's messages for one page
+
+    Args:
+        messages: The thread's messages, oldest first
+        limit: Page size (None = no limit)
+        cursor: Page mode: return messages before this message id
+        since: Delta mode: return messages after this message id
+
+    Returns:
+        {"messages" (raw, oldest first), "page": {...}}
+    """
+    limit = min(max(1, limit), MAX_PAGE_SIZE) if limit else None
+    total = len(messages)
+    page = {"limit": limit, "total": total}
+
+    if since is not None:
+        position = _position(messages, since)
+        if position is not None:
+            start = position + 1
+            end = min(total, start + limit) if limit else total
+            chunk = messages[start:end]
+            page.update({
+                "mode": "delta",
+                "since": since,
+                "has_more": end < total,
+                "next_since": _message_id(chunk[-1]) if chunk else since,
+            })
+            return {"messages": chunk, "page": page}
+        # The client's last message is gone: send the newest page to replace its copy
+        page["reset"] = True
+
+    end = total
+    if cursor is not None and since is None:
+        position = _position(messages, cursor)
+        if position is None:
+            page["reset"] = True
+        else:
+            end = position
+    start = max(0, end - limit) if limit else 0
+    chunk = messages[start:end]
+    page.update({
+        "mode": "page",
+        "cursor": cursor,
+        "has_more": start > 0,
+        "next_cursor": _message_id(chunk[0]) if start > 0 and chunk else None,
+        "next_since": _message_id(messages[-1]) if messages else None,
+    })
+    return {"messages": chunk, "page": page}
+
+
+def _snapshot(thread_id: str) -> Dict:
+    """get_conversation_history with messages serialized, reused while the checkpoint is unchanged"""
+    from .graph import get_conversation_history, get_session_graph, serialize_message
+
+    latest = getattr(get_session_graph().checkpointer, "latest_checkpoint_id", None)
+    checkpoint_id = latest(thread_id) if latest else None
+    if checkpoint_id:
+        with _snapshots_lock:
+            cached = _snapshots.get(thread_id)
+            if cached and cached[0] == checkpoint_id:
+                _snapshots.move_to_end(thread_id)
+                _stats["snapshot_hits"] += 1
+                return cached[1]
+
+    data = get_conversation_history(thread_id)
+    data = {**data, "messages": [serialize_message(m) for m in data.get("messages", [])]}
+    with _snapshots_lock:
+        _stats["snapshot_misses"] += 1
+        # Read before the load: a turn landing in between only makes the next read miss
+        if checkpoint_id and data.get("phase") != "error":
+            _snapshots[thread_id] = (checkpoint_id, data)
+            _snapshots.move_to_end(thread_id)
+            while len(_snapshots) > SNAPSHOT_CACHE_SIZE:
+                _snapshots.popitem(last=False)
+    return data
+
+
+def history_stats() -> Dict:
+    """Snapshot reuse for /history in this process"""
+    with _snapshots_lock:
+        return {**_stats, "threads": len(_snapshots)}
+
+
+def history_page(thread_id: str = "default", limit: Optional[int] = DEFAULT_PAGE_SIZE,
+                 cursor: Optional[str] = None, since: Optional[str] = None,
+                 fields: Optional[Iterable[str]] = None) -> Dict:
+    """
+    One page of a thread's history, JSON-ready
+
+    Args:
+        thread_id: Conversation thread
+        limit: Messages per page (None = all)
+        cursor: Message id to page back from (page mode)
+        since: Last message id the client has (delta mode)
+        fields: Subset of HISTORY_FIELDS to include (default all)
+
+    Returns:
+        {"thread_id", requested fields, "page"} - "page" is present when
+        messages are requested
+
+    Raises:
+        ValueError: Unknown field requested
+    """
+    wanted = list(fields) if fields else list(HISTORY_FIELDS)
+    unknown = [field for field in wanted if field not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown history field(s): {', '.join(unknown)}")
+
+    data = _snapshot(thread_id)
+    response = {"thread_id": thread_id}
+    for field in wanted:
+        if field != "messages":
+            response[field] = data.get(field)
+    if "messages" in wanted:
+        sliced = paginate_messages(data.get("messages", []), limit, cursor, since)
+        response["messages"] = sliced["messages"]
+        response["page"] = sliced["page"]
+    return response
+
+
+__all__ = [
+    'DEFAULT_PAGE_SIZE',
+    'HISTORY_FIELDS',
+    'MAX_PAGE_SIZE',
+    'history_page',
+    'history_stats',
+    'paginate_messages',
+]
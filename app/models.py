@@ -0,0 +1,103 @@
+"""
+Per-node model routing
+
+Every node used one ChatOpenAI(model="gpt-4o-mini", temperature=0.7), and
+roadmap.py hard-coded its own models. Nodes have different needs:
+discovery questions are short and latency-sensitive, synthesis must
+return the same JSON for the same conversation, and matching is the one
+call where a stronger model pays off. MODEL_ROUTES assigns a model,
+temperature and max_tokens per route (node name, plus "roadmap" /
+"roadmap_groq" for app/roadmap.py); anything a route leaves out comes
+from "default".
+
+Overrides come from LLM_ROUTES, e.g.
+"matching.model=gpt-4o-mini,synthesis.temperature=0.2,default.max_tokens=none".
+"""
+
+import os
+from typing import Dict, Optional
+
+from .config import load_env
+
+
+MODEL_ROUTES = {
+    "default": {"model": "gpt-4o-mini", "temperature": 0.7, "max_tokens": None},
+    # One short question per turn: small model, tight output cap
+    "discovery": {"max_tokens": 150},
+    # Profile JSON; deterministic so the same conversation gives the same profile
+    "synthesis": {"temperature": 0.0, "max_tokens": 800},
+    # Recommendations drive everything downstream
+    "matching": {"model": "gpt-4o", "temperature": 0.3, "max_tokens": 1200},
+    # Action plans: cached per-career blocks, then a short personal intro
+    "action": {"max_tokens": 800},
+    "action_personalize": {"max_tokens": 150},
+    "roadmap": {"max_tokens": 2000},
+    "roadmap_groq": {"model": "llama-3.1-70b-versatile", "max_tokens": 2000},
+}
+
+ROUTE_FIELDS = ("model", "temperature", "max_tokens")
+
+# (LLM_ROUTES value, parsed overrides): get_llm() resolves a route on every call
+_parsed = (None, {})
+
+
+def _parse_value(field: str, raw: str):
+    raw = raw.strip()
+    if field == "model":
+        return raw
+    if raw.lower() in ("", "none", "null"):
+        return None
+    return float(raw) if field == "temperature" else int(raw)
+
+
+def route_overrides() -> Dict[str, Dict]:
+    """LLM_ROUTES as {route: {field: value}} ("route.field=value,...")"""
+    global _parsed
+    load_env()
+    raw = os.getenv("LLM_ROUTES", "")
+    if raw == _parsed[0]:
+        return _parsed[1]
+    overrides: Dict[str, Dict] = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        name, _, value = item.partition("=")
+        route, _, field = name.strip().rpartition(".")
+        if not route or field not in ROUTE_FIELDS:
+            print(f"[MODELS] Ignoring LLM_ROUTES entry {item!r}")
+            continue
+        overrides.setdefault(route, {})[field] = _parse_value(field, value)
+    _parsed = (raw, overrides)
+    return overrides
+
+
+def model_routes() -> Dict[str, Dict]:
+    """The full routing table: every route resolved against "default", overrides applied"""
+    overrides = route_overrides()
+    default = {**MODEL_ROUTES["default"], **overrides.get("default", {})}
+    names = set(MODEL_ROUTES) | set(overrides)
+    return {
+        name: {**default, **MODEL_ROUTES.get(name, {}), **overrides.get(name, {})}
+        for name in sorted(names)
+    }
+
+
+def model_route(route: Optional[str] = None) -> Dict:
+    """
+    Model settings for a route
+
+    Args:
+        route: Node name ("discovery", "synthesis", ...) or None for "default";
+            unknown routes get the default settings
+
+    Returns:
+        {"model", "temperature", "max_tokens"}
+    """
+    routes = model_routes()
+    return dict(routes.get(route or "default", routes["default"]))
+
+
+__all__ = [
+    'MODEL_ROUTES',
+    'model_route',
+    'model_routes',
+    'route_overrides',
+]
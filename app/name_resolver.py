@@ -0,0 +1,269 @@
+"""
+Career name resolution
+
+The recommendation LLM returns each match's `path` as free text, e.g.
+"Content Creator" for the catalog's "Content Creator / Influencer", or
+occasionally a career that isn't in the catalog at all. This module
+maps such strings to catalog keys with a confidence score, without
+another LLM call:
+
+1. Exact lookup of the normalized string among every career's name
+   variants: the full name, each " / " part, the name without or inside
+   parentheses, the key, and aliases (confidence 1.0).
+2. Otherwise character-trigram similarity against the same variants:
+   the better of Dice overlap and containment, weighted by how much of
+   each side the other covers. The best candidates are then scaled by
+   how many of their words match (typos and plurals allowed) on both
+   sides. A generic or made-up name ("Engineer", "Music Marketing
+   Manager") then falls below the threshold instead of borrowing a
+   catalog career it only shares a word with.
+
+Results below the confidence threshold (CAREER_NAME_MIN_CONFIDENCE,
+default 0.6) are unresolved.
+"""
+
+import functools
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .config import load_env
+
+
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+# Covering a query is a weaker signal than matching it
+CONTAINMENT_WEIGHT = 0.9
+
+# Trigram candidates re-scored by their word overlap
+WORD_CANDIDATES = 8
+
+# Words that don't tell careers apart
+STOP_WORDS = frozenset({"a", "an", "and", "at", "for", "in", "of", "on", "or", "the", "to", "with"})
+
+_CACHE_SIZE = 4096
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(name: str) -> str:
+    """Lowercase, "&" -> "and", punctuation folded to single spaces"""
+    return _NON_WORD.sub(" ", name.lower().replace("&", " and ")).strip()
+
+
+def _trigrams(text: str) -> set:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _words(text: str) -> List[str]:
+    return [word for word in text.split() if word not in STOP_WORDS]
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _same_word(a: str, b: str) -> bool:
+    """Equal up to a plural, a truncation ("tech"/"technician") or a typo"""
+    if a == b or a.rstrip("s") == b.rstrip("s"):
+        return True
+    short, long = sorted((a, b), key=len)
+    if len(short) >= 4 and long.startswith(short):
+        return True
+    ga, gb = _trigrams(a), _trigrams(b)
+    return 2 * len(ga & gb) / (len(ga) + len(gb)) >= 0.5
+
+
+def _word_overlap(query_words: List[str], variant_words: List[str]) -> float:
+    """Dice overlap of two word lists (1.0 when either has no words)"""
+    if not query_words or not variant_words:
+        return 1.0
+    matched_variant = sum(any(_same_word(v, q) for q in query_words) for v in variant_words)
+    matched_query = sum(any(_same_word(q, v) for v in variant_words) for q in query_words)
+    return (matched_variant + matched_query) / (len(variant_words) + len(query_words))
+
+
+def name_variants(key: str, name: str, aliases: Iterable[str] = ()) -> List[str]:
+    """Every normalized string that should resolve to this career"""
+    variants = [name, key.replace("_", " "), re.sub(r"\(.*?\)", " ", name)]
+    variants += re.findall(r"\((.*?)\)", name)
+    variants += name.split("/")
+    variants += list(aliases)
+    seen = []
+    for variant in variants:
+        variant = normalize(variant)
+        if variant and variant not in seen:
+            seen.append(variant)
+    return seen
+
+
+# ============================================================================
+# RESOLVER
+# ============================================================================
+
+class CareerNameResolver:
+    """
+    Maps free-text career names to catalog keys
+
+    Args:
+        entries: (key, name, aliases) per career, in catalog order
+        min_confidence: Below this, resolve() returns None
+    """
+
+    def __init__(self, entries: List[Tuple[str, str, List[str]]], min_confidence: float = DEFAULT_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self.names: Dict[str, str] = {}
+        self.variants: Dict[str, List[str]] = {}
+        self._exact: Dict[str, str] = {}
+        self._variant_keys: List[str] = []
+        self._variant_sizes: List[int] = []
+        self._variant_words: List[List[str]] = []
+        postings: Dict[str, List[int]] = {}
+
+        for key, name, aliases in entries:
+            self.names[key] = name
+            self.variants[key] = name_variants(key, name, aliases)
+            for variant in self.variants[key]:
+                # First career wins a shared variant, matching catalog order
+                self._exact.setdefault(variant, key)
+                grams = _trigrams(variant)
+                for gram in grams:
+                    postings.setdefault(gram, []).append(len(self._variant_keys))
+                self._variant_keys.append(key)
+                self._variant_sizes.append(len(grams))
+                self._variant_words.append(_words(variant))
+
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._sizes = np.array(self._variant_sizes, dtype=np.float32)
+        self._cache: Dict[str, Optional[Dict]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, career_paths: Dict[str, Dict], aliases: Optional[Dict[str, List[str]]] = None,
+              min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> "CareerNameResolver":
+        """
+        Args:
+            career_paths: Catalog; records may carry their own "aliases" list
+            aliases: Extra {key: [alias, ...]}
+        """
+        aliases = aliases or {}
+        if hasattr(career_paths, "column"):
+            # Memory-mapped catalog: read the name and extra columns only
+            keys, names, extras = career_paths.column("key"), career_paths.column("name"), career_paths.column("extra")
+            entries = [
+                (key, name, list(aliases.get(key, [])) + (json.loads(extra).get("aliases", []) if extra else []))
+                for key, name, extra in zip(keys, names, extras)
+            ]
+        else:
+            entries = [
+                (key, info.get("name", key), list(aliases.get(key, [])) + list(info.get("aliases", [])))
+                for key, info in career_paths.items()
+            ]
+        return cls(entries, min_confidence)
+
+    def _score(self, query: str) -> Optional[Tuple[str, float]]:
+        grams = [gram for gram in _trigrams(query) if gram in self._postings]
+        if not grams:
+            return None
+        hits = np.bincount(np.concatenate([self._postings[gram] for gram in grams]),
+                           minlength=len(self._variant_keys)).astype(np.float32)
+        query_size = len(_trigrams(query))
+        dice = 2 * hits / (self._sizes + query_size)
+        containment = CONTAINMENT_WEIGHT * (hits / query_size) * (hits / self._sizes)
+        scores = np.maximum(dice, containment)
+
+        # Stable sort: the first variant wins ties (catalog order)
+        candidates = np.argsort(-scores, kind="stable")[:WORD_CANDIDATES]
+        query_words = _words(query)
+        best, best_score = None, 0.0
+        for index in candidates:
+            if scores[index] <= best_score:
+                break  # sorted: word overlap can only lower the rest
+            score = float(scores[index]) * _word_overlap(query_words, self._variant_words[index])
+            if score > best_score:
+                best, best_score = int(index), score
+        if best is None:
+            return None
+        return self._variant_keys[best], best_score
+
+    def resolve(self, name: str) -> Optional[Dict]:
+        """
+        Resolve a career name
+
+        Args:
+            name: Free text, e.g. the "path" of an LLM recommendation
+
+        Returns:
+            {"key", "name", "confidence"} for the best catalog match, or None
+            when nothing reaches min_confidence
+        """
+        if not name:
+            return None
+        query = normalize(str(name))
+        cached = self._cache.get(query, False)
+        if cached is not False:
+            return cached
+
+        key = self._exact.get(query)
+        if key is not None:
+            result = {"key": key, "name": self.names[key], "confidence": 1.0}
+        else:
+            scored = self._score(query) if query else None
+            if scored is None or scored[1] < self.min_confidence:
+                result = None
+            else:
+                result = {"key": scored[0], "name": self.names[scored[0]], "confidence": round(scored[1], 3)}
+
+        with self._lock:
+            if len(self._cache) >= _CACHE_SIZE:
+                self._cache.clear()
+            self._cache[query] = result
+        return result
+
+
+# ============================================================================
+# PROCESS-WIDE RESOLVER
+# ============================================================================
+
+_resolver: Optional[CareerNameResolver] = None
+_resolver_fingerprint: Optional[str] = None
+_resolver_lock = threading.Lock()
+
+
+def min_confidence() -> float:
+    """Resolution threshold (CAREER_NAME_MIN_CONFIDENCE)"""
+    load_env()
+    return float(os.getenv("CAREER_NAME_MIN_CONFIDENCE", DEFAULT_MIN_CONFIDENCE))
+
+
+def get_name_resolver(career_paths: Optional[Dict[str, Dict]] = None) -> CareerNameResolver:
+    """Resolver for the current catalog (built on first use, rebuilt when it changes)"""
+    global _resolver, _resolver_fingerprint
+    from .career_data import get_builtin_career_aliases, get_career_paths
+    from .retrieval import catalog_fingerprint
+    if career_paths is None:
+        career_paths = get_career_paths()
+    threshold = min_confidence()
+    fingerprint = f"{catalog_fingerprint(career_paths)}:{threshold}"
+    if _resolver is not None and _resolver_fingerprint == fingerprint:
+        return _resolver
+    with _resolver_lock:
+        if _resolver is None or _resolver_fingerprint != fingerprint:
+            _resolver = CareerNameResolver.build(career_paths, get_builtin_career_aliases(), threshold)
+            _resolver_fingerprint = fingerprint
+    return _resolver
+
+
+def resolve_career_name(name: str) -> Optional[Dict]:
+    """{"key", "name", "confidence"} for `name` in the current catalog, or None"""
+    return get_name_resolver().resolve(name)
+
+
+__all__ = [
+    'CareerNameResolver',
+    'get_name_resolver',
+    'name_variants',
+    'normalize',
+    'resolve_career_name',
+]
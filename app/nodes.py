@@ -7,28 +7,79 @@ Career Coach Agent Nodes
 import os
 import json
 import re
+import asyncio
+import concurrent.futures
+import threading
 from typing import TypedDict, Optional, Annotated, List, Dict, Any
 from datetime import datetime
-from dotenv import load_dotenv
 
 # LangChain message types
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph.message import add_messages
 
-load_dotenv()
+from .admission import AdmissionCancelled, estimate_tokens, get_admission
+from .concurrency import TurnCancelled, get_turn
+from .config import load_env
+from .deadlines import DeadlineExceeded, get_deadline, record_llm_call
 
-# LLM Setup
-USE_LLM = False
-llm = None
 
-try:
-    from langchain_openai import ChatOpenAI
-    if os.getenv("OPENAI_API_KEY"):
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
-        USE_LLM = True
-except Exception as e:
-    print(f"LLM initialization failed: {e}")
-    USE_LLM = False
+# LLM Setup (lazy - langchain_openai is slow to import, so it is only
+# loaded when a node first needs the model). One model per distinct
+# route setting (see app/models.py), shared by the routes that use it.
+_llms: Dict[tuple, Any] = {}
+_llm_factory = None
+_llm_lock = threading.Lock()
+
+
+# Completion tokens reserved per call until the real usage is known
+EXPECTED_COMPLETION_TOKENS = 400
+
+
+def _create_llm(route: Dict):
+    """Build the chat model for a route, or None if no API key / langchain_openai"""
+    load_env()
+    if not os.getenv("OPENAI_API_KEY"):
+        return None
+    try:
+        from langchain_openai import ChatOpenAI
+        # Response headers carry the rate limits the admission controller sizes itself from
+        return ChatOpenAI(model=route["model"], temperature=route["temperature"],
+                          max_tokens=route["max_tokens"], include_response_headers=True)
+    except Exception as e:
+        print(f"LLM initialization failed: {e}")
+        return None
+
+
+def get_llm(route: Optional[str] = None):
+    """
+    Return the shared chat model for a node, creating it on first use (None if unavailable)
+    
+    Args:
+        route: Node name in the model routing table (None for the default model)
+    """
+    from .models import model_route
+    
+    settings = model_route(route)
+    key = (settings["model"], settings["temperature"], settings["max_tokens"])
+    if key not in _llms:
+        with _llm_lock:
+            if key not in _llms:
+                _llms[key] = (_llm_factory or _create_llm)(settings)
+    return _llms[key]
+
+
+def set_llm(model) -> None:
+    """Replace the shared chat model for every route (e.g. with a stub for benchmarks)"""
+    set_llm_factory(lambda route: model)
+
+
+def set_llm_factory(factory) -> None:
+    """Build route models with `factory(route_settings)` instead of ChatOpenAI (None restores it)"""
+    global _llm_factory
+    with _llm_lock:
+        _llm_factory = factory
+        _llms.clear()
 
 
 # Import prompts
@@ -50,6 +101,8 @@ class CareerCoachState(TypedDict):
     
     # User profile (builds over time)
     user_profile: Dict  # {interests: [], skills: [], work_style: [], constraints: []}
+    live_profile: Dict  # Raw answers by field, kept by router_node during discovery
+    question_sources: List[str]  # Per discovery question: bank question id, "llm" or "fallback"
     insights: List[str]
     profile_completeness: float  # 0.0 to 1.0
     
@@ -91,6 +144,96 @@ def parse_json_response(content: str) -> Any:
         return {}
 
 
+def invoke_llm(llm, messages: List[BaseMessage], config: Optional[RunnableConfig] = None,
+               stage: Optional[str] = None, priority: Optional[str] = None):
+    """
+    Call the LLM on behalf of a node, within the turn's budget and abortable
+    
+    Every call first takes a slot from the process-wide admission
+    controller (app/admission.py); discovery questions are admitted ahead
+    of pipeline and bulk work.
+    
+    Under the async API (arun_career_coach) nodes run in executor threads
+    and the turn's event loop is free, so the request is sent from that
+    loop and registered with the turn: cancelling the turn cancels the
+    request (and closes its connection) instead of letting it finish for
+    nothing. Otherwise this is a plain llm.invoke.
+    
+    If the turn carries a deadline, queueing and the call itself share the
+    budget left for `stage`; the call gets what remains as its timeout.
+    
+    Args:
+        stage: Budget stage ("discovery" or "pipeline")
+        priority: Admission class (default: interactive for discovery, else pipeline)
+    
+    Raises:
+        TurnCancelled: The turn was superseded before or during the call
+        DeadlineExceeded: The stage budget ran out (node should fall back)
+    """
+    turn = get_turn(config)
+    deadline = get_deadline(config)
+    timeout = deadline.remaining(stage) if deadline else None
+    if timeout is not None and timeout <= 0:
+        record_llm_call(stage, "skipped")
+        raise DeadlineExceeded(f"{stage} budget spent before the LLM call")
+    
+    priority = priority or ("interactive" if stage == "discovery" else "pipeline")
+    # The route's max_tokens caps the completion (app/models.py)
+    completion = min(EXPECTED_COMPLETION_TOKENS, getattr(llm, "max_tokens", None) or EXPECTED_COMPLETION_TOKENS)
+    tokens = sum(estimate_tokens(str(m.content)) for m in messages) + completion
+    is_cancelled = (lambda: turn.cancelled) if turn is not None else None
+    
+    try:
+        with get_admission().admit(priority, tokens, timeout=timeout, is_cancelled=is_cancelled) as ticket:
+            if timeout is not None:
+                timeout = deadline.remaining(stage)
+                if timeout <= 0:
+                    raise DeadlineExceeded(f"{stage} budget spent waiting for an LLM slot")
+            kwargs = {"timeout": timeout} if timeout is not None else {}
+            response = _invoke_llm(llm, messages, turn, timeout, kwargs)
+            usage = getattr(response, "usage_metadata", None) or {}
+            ticket.observe(headers=getattr(response, "response_metadata", {}).get("headers"),
+                           total_tokens=usage.get("total_tokens"))
+    except AdmissionCancelled:
+        raise TurnCancelled(turn.thread_id)
+    except Exception as e:
+        if timeout is not None and deadline.remaining(stage) <= 0:
+            record_llm_call(stage, "timeout")
+            raise DeadlineExceeded(f"{stage} budget ran out during the LLM call") from e
+        raise
+    
+    if timeout is not None:
+        record_llm_call(stage)
+    return response
+
+
+def _invoke_llm(llm, messages, turn, timeout: Optional[float], kwargs: Dict):
+    if turn is None or turn.loop is None or turn.loop.is_closed():
+        return llm.invoke(messages, **kwargs)
+    
+    turn.raise_if_cancelled()
+    try:
+        on_loop = asyncio.get_running_loop() is turn.loop
+    except RuntimeError:
+        on_loop = False
+    if on_loop:
+        # Blocking here would deadlock the loop; run it the plain way
+        return llm.invoke(messages, **kwargs)
+    
+    future = asyncio.run_coroutine_threadsafe(llm.ainvoke(messages, **kwargs), turn.loop)
+    turn.track(future)
+    try:
+        # Hard stop even if the client doesn't honour its timeout
+        return future.result(timeout=timeout)
+    except concurrent.futures.CancelledError:
+        raise TurnCancelled(turn.thread_id)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+    finally:
+        turn.untrack(future)
+
+
 def calculate_profile_completeness(user_profile: Dict) -> float:
     """Calculate how complete the user profile is (0.0 to 1.0)"""
     score = 0.0
@@ -133,6 +276,8 @@ def greeting_node(state: CareerCoachState) -> CareerCoachState:
         "phase": "discovery",
         "questions_asked": 0,
         "current_focus": None,
+        "live_profile": {},
+        "question_sources": [],
     }
 
 """"
@@ -198,36 +343,40 @@ def working_router_node(state: CareerCoachState) -> CareerCoachState:
 def router_node(state: CareerCoachState) -> CareerCoachState:
     """
     Node 2: Decide what information to gather next (NO LLM - instant)
+    
+    Files the latest answer into the live profile, then asks about the
+    least covered area, or ends discovery once more answers are unlikely
+    to change the local career ranking (see discovery.py).
     """
+    from .discovery import pending_answers, plan_next_question, update_live_profile
     
     questions_asked = state.get("questions_asked", 0)
+    previous_profile = state.get("live_profile") or {}
     
-    print(f"[ROUTER] Questions asked: {questions_asked}")  # Debug log
+    # current_focus is still the focus of the question just answered
+    live_profile = update_live_profile(
+        previous_profile, state.get("current_focus"), pending_answers(state.get("messages", []))
+    )
+    completeness = calculate_profile_completeness(live_profile)
+    focus = plan_next_question(questions_asked, previous_profile, live_profile, completeness)
     
-    # After 6 questions asked, we're done
-    if questions_asked >= 6:
-        focus = None
-    elif questions_asked < 2:
-        focus = "interests"
-    elif questions_asked < 4:
-        focus = "skills"
-    elif questions_asked < 6:
-        focus = "workstyle"
-    else:
-        focus = None
+    print(f"[ROUTER] Questions asked: {questions_asked}, next focus: {focus}")  # Debug log
     
     return {
         **state,
         "current_focus": focus,
+        "live_profile": live_profile,
+        "profile_completeness": completeness,
     }
 
 
-def old_working_but_not_fine_discovery_node(state: CareerCoachState) -> CareerCoachState:
+def old_working_but_not_fine_discovery_node(state: CareerCoachState, config: RunnableConfig = None) -> CareerCoachState:
     """
     Node 3: Ask contextual questions (LLM CALL ~2s)
     """
     
-    if not USE_LLM or llm is None:
+    llm = get_llm()
+    if llm is None:
         return {
             **state,
             "messages": [AIMessage(content=prompts.FALLBACK_NO_LLM)],
@@ -265,10 +414,10 @@ def old_working_but_not_fine_discovery_node(state: CareerCoachState) -> CareerCo
     user_prompt += f"\n\nCurrent focus area: {current_focus}\n{focus_guidance.get(current_focus, '')}"
     
     try:
-        response = llm.invoke([
+        response = invoke_llm(llm, [
             SystemMessage(content=prompts.DISCOVERY_SYSTEM),
             HumanMessage(content=user_prompt)
-        ])
+        ], config, stage="discovery")
         
         next_question = response.content.strip()
         
@@ -286,10 +435,12 @@ def old_working_but_not_fine_discovery_node(state: CareerCoachState) -> CareerCo
             "questions_asked": questions_asked + 1,  # ← AND HERE
         }
     
-def discovery_node(state: CareerCoachState) -> CareerCoachState:
+def discovery_node(state: CareerCoachState, config: RunnableConfig = None) -> CareerCoachState:
     """
-    Node 3: Ask contextual questions (LLM CALL ~2s)
+    Node 3: Ask contextual questions (question bank - instant, or LLM CALL ~2s)
     """
+    from .discovery import pending_answers
+    from .question_bank import choose_question
     
     current_focus = state.get("current_focus")
     
@@ -298,16 +449,56 @@ def discovery_node(state: CareerCoachState) -> CareerCoachState:
         print("[DISCOVERY] No focus set, skipping question")
         return state  # Don't ask a question, just pass through
     
-    if not USE_LLM or llm is None:
+    # Get context
+    messages = state.get("messages", [])
+    questions_asked = state.get("questions_asked", 0)
+    sources = state.get("question_sources") or []
+    last_answer = " ".join(pending_answers(messages))
+    
+    def ask(question: str, source: str) -> CareerCoachState:
         return {
             **state,
-            "messages": [AIMessage(content=prompts.FALLBACK_NO_LLM)],
-            "questions_asked": state.get("questions_asked", 0) + 1,
+            "messages": [AIMessage(content=question)],
+            "questions_asked": questions_asked + 1,
+            "question_sources": sources + [source],
         }
     
-    # Get context
-    messages = state.get("messages", [])
+    llm = get_llm("discovery")
+    live_profile = state.get("live_profile")
+    choice = choose_question(current_focus, sources, last_answer, llm_available=llm is not None,
+                             live_profile=live_profile)
+    if choice["source"] == "bank":
+        print(f"[DISCOVERY] Bank question {choice['id']}")
+        return ask(choice["text"], choice["id"])
+    
+    if llm is None:
+        return ask(prompts.FALLBACK_NO_LLM, "fallback")
     
+    try:
+        next_question = generate_discovery_question(
+            llm, messages, state.get("user_profile", {}), questions_asked, current_focus, config
+        )
+        print(f"[DISCOVERY] LLM question ({choice['reason']})")
+        return ask(next_question, "llm")
+        
+    except Exception as e:
+        print(f"Error in discovery_node: {e}")
+        # A generic bank question still beats the generic fallback
+        fallback = choose_question(current_focus, sources, last_answer, llm_available=False, record=False,
+                                   live_profile=live_profile)
+        if fallback["source"] == "bank":
+            return ask(fallback["text"], fallback["id"])
+        return ask(prompts.FALLBACK_DISCOVERY, "fallback")
+
+
+def generate_discovery_question(llm, messages: List[BaseMessage], user_profile: Dict, questions_asked: int,
+                                focus: str, config: RunnableConfig = None, priority: Optional[str] = None) -> str:
+    """
+    Ask the LLM for the next discovery question (LLM CALL ~2s)
+    
+    Raises:
+        Whatever invoke_llm raises; callers fall back
+    """
     # Format recent conversation (last 5 messages)
     recent_messages = messages[-5:] if len(messages) > 5 else messages
     conversation_context = "\n".join([
@@ -315,8 +506,7 @@ def discovery_node(state: CareerCoachState) -> CareerCoachState:
         for msg in recent_messages
     ])
     
-    user_profile = prompts.format_user_profile(state.get("user_profile", {}))
-    questions_asked = state.get("questions_asked", 0)
+    user_profile = prompts.format_user_profile(user_profile)
     
     # Build prompt with focus area
     focus_guidance = {
@@ -332,29 +522,14 @@ def discovery_node(state: CareerCoachState) -> CareerCoachState:
     )
     
     # Add focus guidance
-    user_prompt += f"\n\nCurrent focus area: {current_focus}\n{focus_guidance.get(current_focus, '')}"
+    user_prompt += f"\n\nCurrent focus area: {focus}\n{focus_guidance.get(focus, '')}"
     
-    try:
-        response = llm.invoke([
-            SystemMessage(content=prompts.DISCOVERY_SYSTEM),
-            HumanMessage(content=user_prompt)
-        ])
-        
-        next_question = response.content.strip()
-        
-        return {
-            **state,
-            "messages": [AIMessage(content=next_question)],
-            "questions_asked": questions_asked + 1,
-        }
-        
-    except Exception as e:
-        print(f"Error in discovery_node: {e}")
-        return {
-            **state,
-            "messages": [AIMessage(content=prompts.FALLBACK_DISCOVERY)],
-            "questions_asked": questions_asked + 1,
-        }
+    response = invoke_llm(llm, [
+        SystemMessage(content=prompts.DISCOVERY_SYSTEM),
+        HumanMessage(content=user_prompt)
+    ], config, stage="discovery", priority=priority)
+    
+    return response.content.strip()
 
 
 def validation_node(state: CareerCoachState) -> CareerCoachState:
@@ -393,12 +568,13 @@ def validation_node(state: CareerCoachState) -> CareerCoachState:
 # PHASE 2: ANALYSIS NODES
 # ============================================================================
 
-def synthesis_node(state: CareerCoachState) -> CareerCoachState:
+def synthesis_node(state: CareerCoachState, config: RunnableConfig = None) -> CareerCoachState:
     """
     Node 5: Extract structured insights from conversation (LLM CALL ~2s)
     """
     
-    if not USE_LLM or llm is None:
+    llm = get_llm("synthesis")
+    if llm is None:
         return {
             **state,
             "user_profile": {"interests": [], "skills": [], "work_style": [], "constraints": []},
@@ -418,10 +594,10 @@ def synthesis_node(state: CareerCoachState) -> CareerCoachState:
     )
     
     try:
-        response = llm.invoke([
+        response = invoke_llm(llm, [
             SystemMessage(content=prompts.ANALYSIS_SYSTEM),
             HumanMessage(content=user_prompt)
-        ])
+        ], config, stage="pipeline")
         
         insights = parse_json_response(response.content)
         
@@ -436,6 +612,18 @@ def synthesis_node(state: CareerCoachState) -> CareerCoachState:
             "insights": all_insights,
         }
         
+    except DeadlineExceeded as e:
+        # The router kept the raw answers per field; matching/ranking can
+        # still work from those instead of an empty profile
+        print(f"[SYNTHESIS] {e}, using the live profile")
+        live_profile = state.get("live_profile") or {}
+        user_profile = {key: list(live_profile.get(key, [])) for key in ["interests", "skills", "work_style"]}
+        return {
+            **state,
+            "user_profile": {**user_profile, "constraints": []},
+            "insights": [answer for answers in user_profile.values() for answer in answers],
+        }
+        
     except Exception as e:
         print(f"Error in synthesis_node: {e}")
         return {
@@ -472,21 +660,23 @@ def enrichment_node(state: CareerCoachState) -> CareerCoachState:
 # PHASE 3: RECOMMENDATION NODES
 # ============================================================================
 
-def matching_node(state: CareerCoachState) -> CareerCoachState:
+def matching_node(state: CareerCoachState, config: RunnableConfig = None) -> CareerCoachState:
     """
     Node 7: Match user profile to career paths (LLM CALL ~2s)
     """
     
-    if not USE_LLM or llm is None:
+    llm = get_llm("matching")
+    if llm is None:
         return {
             **state,
             "career_matches": [],
         }
     
-    from .career_data import get_career_paths
+    from .retrieval import retrieve_career_paths
     
     user_profile = state.get("user_profile", {})
-    career_paths = get_career_paths()
+    # Only the top-k careers for this profile go into the prompt
+    career_paths = retrieve_career_paths(user_profile)
     
     # Format for prompt
     user_profile_str = prompts.format_user_profile(user_profile)
@@ -499,10 +689,10 @@ def matching_node(state: CareerCoachState) -> CareerCoachState:
     )
     
     try:
-        response = llm.invoke([
+        response = invoke_llm(llm, [
             SystemMessage(content=prompts.RECOMMENDATION_SYSTEM),
             HumanMessage(content=user_prompt)
-        ])
+        ], config, stage="pipeline")
         
         recommendations = parse_json_response(response.content)
         
@@ -515,6 +705,13 @@ def matching_node(state: CareerCoachState) -> CareerCoachState:
             "career_matches": recommendations,
         }
         
+    except DeadlineExceeded as e:
+        print(f"[MATCHING] {e}, using local matches")
+        return {
+            **state,
+            "career_matches": local_career_matches(user_profile, career_paths),
+        }
+        
     except Exception as e:
         print(f"Error in matching_node: {e}")
         return {
@@ -523,22 +720,112 @@ def matching_node(state: CareerCoachState) -> CareerCoachState:
         }
 
 
+def local_career_matches(user_profile: Dict, career_paths: Dict[str, Dict], top_n: int = 3) -> List[Dict]:
+    """
+    Keyword-overlap matches (NO LLM - instant), same shape as matching_node's
+    
+    Used when the turn has no time left for the LLM recommendation call.
+    """
+    terms = set()
+    for key in ["interests", "skills", "work_style"]:
+        for item in user_profile.get(key, []) or []:
+            terms.update(re.findall(r"[a-z]+", str(item).lower()))
+    
+    scored = []
+    for info in career_paths.values():
+        attributes = info.get("skills", []) + info.get("work_style", [])
+        vocabulary = set(re.findall(r"[a-z]+", " ".join(attributes + [info.get("description", "")]).lower()))
+        hits = [a for a in attributes if terms & set(re.findall(r"[a-z]+", a.lower()))]
+        overlap = len(terms & vocabulary)
+        if overlap:
+            scored.append((overlap, hits, info))
+    
+    scored.sort(key=lambda item: item[0], reverse=True)
+    best = scored[0][0] if scored else 1
+    return [
+        {
+            "path": info["name"],
+            "fit_score": round(0.5 + 0.4 * overlap / best, 2),
+            "reasoning": (f"Matches what you told us about {', '.join(hits[:3])}."
+                          if hits else "Matches interests and strengths you described."),
+            "day_to_day": info.get("description", ""),
+        }
+        for overlap, hits, info in scored[:top_n]
+    ]
+
+
+def resolve_career_matches(career_matches: List[Dict], career_paths: Dict[str, Dict]) -> List[Dict]:
+    """
+    Map each match's free-text "path" to a catalog career (NO LLM - instant)
+    
+    Matches that don't resolve (hallucinated careers) are dropped, and only
+    the first match per career is kept, so pass them best first. Kept
+    matches get the catalog name as "path" plus career_key,
+    name_confidence and the catalog's salary/education/entry path.
+    """
+    from .name_resolver import get_name_resolver
+    
+    resolver = get_name_resolver(career_paths)
+    resolved, seen = [], set()
+    for match in career_matches:
+        hit = resolver.resolve(match.get("path", ""))
+        if hit is None:
+            print(f"[RANKING] Dropped unknown career {match.get('path')!r}")
+            continue
+        if hit["key"] in seen:
+            continue
+        seen.add(hit["key"])
+        info = career_paths[hit["key"]]
+        resolved.append({
+            **match,
+            "path": hit["name"],
+            "career_key": hit["key"],
+            "name_confidence": hit["confidence"],
+            "salary_range": info.get("salary_range", "Varies"),
+            "education": info.get("education", ""),
+            "entry_path": info.get("entry_path", ""),
+        })
+    return resolved
+
+
 def ranking_node(state: CareerCoachState) -> CareerCoachState:
     """
-    Node 8: Score and rank career matches (NO LLM - instant)
+    Node 8: Resolve, dedupe and rank career matches (NO LLM - instant)
+    
+    The LLM's fit_score is fused with catalog overlap, salary/education
+    constraints and a diversity penalty (see ranking.py).
     """
+    from .career_data import get_career_paths
+    from .ranking import fit_score, rank_careers
+    from .roadmap_prefetch import prefetch_roadmaps
     
     career_matches = state.get("career_matches", [])
+    user_profile = state.get("user_profile", {})
+    career_paths = get_career_paths()
     
-    # Sort by fit_score
+    # Best LLM score first, so a duplicate keeps its strongest entry
     sorted_matches = sorted(
         career_matches, 
-        key=lambda x: x.get("fit_score", 0), 
+        key=fit_score, 
         reverse=True
     )
     
+    resolved = resolve_career_matches(sorted_matches, career_paths)
+    if not resolved and career_matches:
+        # Nothing the LLM named is in the catalog; use keyword matches instead
+        from .retrieval import retrieve_career_paths
+        local = local_career_matches(user_profile, retrieve_career_paths(user_profile, career_paths))
+        resolved = resolve_career_matches(local, career_paths)
+    
     # Take top 3
-    top_3 = sorted_matches[:3]
+    top_3 = rank_careers(resolved, user_profile, career_paths, k=3)
+    
+    # The next click is usually one of these roadmaps: start them in the background now.
+    # Best effort: a cache or config error must not fail the recommendation turn
+    try:
+        prefetch_roadmaps([match["path"] for match in top_3])
+    except Exception as e:
+        print(f"[PREFETCH] Skipped: {e}")
     
     return {
         **state,
@@ -562,12 +849,17 @@ def explanation_node(state: CareerCoachState) -> CareerCoachState:
 # PHASE 4: ACTION NODE
 # ============================================================================
 
-def action_node(state: CareerCoachState) -> CareerCoachState:
+def action_node(state: CareerCoachState, config: RunnableConfig = None) -> CareerCoachState:
     """
-    Node 10: Create actionable next steps (LLM CALL ~2s)
+    Node 10: Create actionable next steps
+    
+    Composed from cached per-career blocks plus a short personal intro
+    (see action_plans.py); ACTION_COMPOSE=0 makes one LLM call (~2s) instead.
     """
+    from .action_plans import build_action_plan, compose_enabled
     
-    if not USE_LLM or llm is None:
+    llm = get_llm("action")
+    if llm is None:
         return {
             **state,
             "messages": [AIMessage(content="Here are some next steps you can take!")],
@@ -576,27 +868,29 @@ def action_node(state: CareerCoachState) -> CareerCoachState:
     
     top_recommendations = state.get("top_recommendations", [])
     
-    # Format recommendations
-    recommendations_summary = prompts.format_recommendations_summary(top_recommendations)
-    
-    # Build action plan prompt
-    user_prompt = prompts.ACTION_USER_PROMPT.format(
-        recommendations_summary=recommendations_summary
-    )
-    
     try:
-        response = llm.invoke([
-            SystemMessage(content=prompts.ACTION_SYSTEM),
-            HumanMessage(content=user_prompt)
-        ])
-        
-        action_plan = response.content.strip()
+        if compose_enabled() and top_recommendations:
+            action_plan_data = build_action_plan(top_recommendations, state.get("user_profile", {}), config)
+            action_plan = action_plan_data["content"]
+        else:
+            # Format recommendations
+            recommendations_summary = prompts.format_recommendations_summary(top_recommendations)
+            
+            # Build action plan prompt
+            user_prompt = prompts.ACTION_USER_PROMPT.format(
+                recommendations_summary=recommendations_summary
+            )
+            
+            response = invoke_llm(llm, [
+                SystemMessage(content=prompts.ACTION_SYSTEM),
+                HumanMessage(content=user_prompt)
+            ], config, stage="pipeline", priority="bulk")
+            
+            action_plan = response.content.strip()
+            action_plan_data = {"content": action_plan}
         
         # Store action plan
-        action_plan_data = {
-            "content": action_plan,
-            "created_at": datetime.now().isoformat()
-        }
+        action_plan_data["created_at"] = datetime.now().isoformat()
         
         # Build recommendations message
         rec_message = "Based on our conversation, here are your top career matches:\n\n"
@@ -646,14 +940,21 @@ def route_after_validation(state: CareerCoachState) -> str:
 
 __all__ = [
     'CareerCoachState',
+    'get_llm',
+    'set_llm',
+    'set_llm_factory',
+    'invoke_llm',
+    'local_career_matches',
     'greeting_node',
     'router_node',
     'discovery_node',
+    'generate_discovery_question',
     'validation_node',
     'synthesis_node',
     'enrichment_node',
     'matching_node',
     'ranking_node',
+    'resolve_career_matches',
     'explanation_node',
     'action_node',
     'route_after_validation',
@@ -222,6 +222,61 @@ Guidelines:
 Write in a warm, encouraging tone that makes them excited to take action."""
 
 
+# Per-career building blocks for composed action plans (app/action_plans.py).
+# Generated once per career and cached, so nothing user-specific goes in.
+ACTION_BLOCK_SYSTEM = """You are an action-oriented career coach focused on concrete next steps.
+
+You write reusable action plan building blocks for one career at a time.
+Suggest real resources (courses, communities, tools) and return only JSON."""
+
+
+ACTION_BLOCK_PROMPT = """Career: {career}
+What it is: {description}
+Key skills: {skills}
+Education: {education}
+Typical entry: {entry_path}
+
+---
+
+Task: Write the building blocks of an action plan for someone just starting out toward this career.
+They are shown to many different people, so don't assume anything about the person.
+
+Return ONLY valid JSON in this exact format:
+{{
+  "next_steps": ["Concrete action for the next 7 days", "..."],
+  "skills": [
+    {{"skill": "Skill name", "why": "Why it matters for this career", "how": "A specific way to start learning it"}}
+  ],
+  "resources": ["Named YouTube channel, course, book or community", "..."],
+  "usher": "How Usher's New Look programs (career prep, leadership, talent development) support this path"
+}}
+
+Guidelines:
+1. 3-5 next steps, quick wins first, achievable for a beginner
+2. 3-4 skills
+3. 4-6 resources, free and paid, with real names (NOT generic)
+4. "usher" is 1-2 sentences"""
+
+
+ACTION_PERSONALIZE_SYSTEM = """You are a warm, encouraging career coach.
+
+You write short, personal introductions to action plans."""
+
+
+ACTION_PERSONALIZE_PROMPT = """User profile:
+{user_profile}
+
+Their top career matches: {careers}
+
+First steps in their plan:
+{next_steps}
+
+---
+
+Task: Write 2-3 sentences introducing this plan to them. Connect their own interests and strengths
+to the top career and the first steps. No headers, no lists, no preamble."""
+
+
 # ============================================================================
 # UI MESSAGES
 # ============================================================================
@@ -242,6 +297,34 @@ Last time we talked about **{previous_insights}**.
 Want to continue exploring those paths, or dive into something new?"""
 
 
+# ============================================================================
+# DISCOVERY QUESTION BANK (asked without an LLM call, see question_bank.py)
+# ============================================================================
+
+# Per focus: (id, question). "{topic}" is filled with something the user
+# said; those questions are only used when a topic was found.
+DISCOVERY_QUESTION_BANK = {
+    "interests": [
+        ("interests_topic", "You mentioned {topic} - what pulls you in most: creating it, performing it, or the tech behind it?"),
+        ("interests_spark", "What part of entertainment could you happily spend a whole weekend on - music, video, games, live events, or something else?"),
+        ("interests_topic_moment", "What's a moment involving {topic} that really stuck with you?"),
+        ("interests_backstage", "When you watch a show, concert or video, are you more curious about the people on stage or the crew making it happen behind the scenes?"),
+    ],
+    "skills": [
+        ("skills_topic_tried", "Have you tried doing anything with {topic} yourself - even just for fun or for friends? What did you make?"),
+        ("skills_strengths", "What do friends or family usually come to you for help with?"),
+        ("skills_tools", "Are there any tools, apps or instruments you've taught yourself to use?"),
+        ("skills_learn", "If you could get really good at one skill in the next year, what would it be?"),
+    ],
+    "workstyle": [
+        ("workstyle_team", "Do you do your best work on your own, or bouncing ideas around with a team?"),
+        ("workstyle_topic_setting", "Picture yourself working on {topic} every day - are you in a studio, on the road, at a desk, or somewhere else?"),
+        ("workstyle_schedule", "Would you rather have a steady routine, or a schedule that changes with every project?"),
+        ("workstyle_pressure", "How do you feel about deadlines and high-pressure moments, like a live show about to start?"),
+    ],
+}
+
+
 # ============================================================================
 # FALLBACK MESSAGES
 # ============================================================================
@@ -344,10 +427,16 @@ def format_recommendations_summary(recommendations: list) -> str:
         fit_score = rec.get('fit_score', 0)
         reasoning = rec.get('reasoning', 'No reasoning provided.')
         
-        summary.append(
+        entry = (
             f"{i}. **{path}** (Match: {fit_score:.0%})\n"
             f"   {reasoning}"
         )
+        # Catalog facts attached by ranking_node, so next steps stay grounded
+        if rec.get('entry_path'):
+            entry += f"\n   Typical entry: {rec['entry_path']}"
+        if rec.get('education'):
+            entry += f"\n   Education: {rec['education']}"
+        summary.append(entry)
     
     return "\n\n".join(summary)
 
@@ -396,16 +485,21 @@ __all__ = [
     'ANALYSIS_SYSTEM',
     'RECOMMENDATION_SYSTEM',
     'ACTION_SYSTEM',
+    'ACTION_BLOCK_SYSTEM',
+    'ACTION_PERSONALIZE_SYSTEM',
     
     # User prompts (templates)
     'DISCOVERY_USER_PROMPT',
     'ANALYSIS_USER_PROMPT',
     'RECOMMENDATION_USER_PROMPT',
     'ACTION_USER_PROMPT',
+    'ACTION_BLOCK_PROMPT',
+    'ACTION_PERSONALIZE_PROMPT',
     
     # UI messages
     'INITIAL_GREETING',
     'FOLLOWUP_GREETING',
+    'DISCOVERY_QUESTION_BANK',
     
     # Fallbacks
     'FALLBACK_DISCOVERY',
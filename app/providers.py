@@ -0,0 +1,356 @@
+"""
+Roadmap providers: health-weighted selection, failover and racing
+
+roadmap.py used to pick Groq or OpenAI once (USE_GROQ) and fall back to
+the static roadmap whenever that one provider was slow or down. Now
+every configured provider (ROADMAP_PROVIDERS, default "openai,groq";
+providers without an API key are skipped) keeps live stats - an EWMA of
+latency and of success - and each request:
+
+- orders the providers by a weighted draw: weight = (success / latency)^2,
+  halved per position in ROADMAP_PROVIDERS so the configured order wins
+  until there is data. The draw (rather than always taking the best)
+  keeps the other providers' stats fresh.
+- fails over to the next provider on an error, a timeout
+  (ROADMAP_PROVIDER_TIMEOUT seconds) or output that doesn't parse
+- benches a provider for COOLDOWN_SECONDS after FAILURES_BEFORE_COOLDOWN
+  consecutive failures (it is still tried last, if all others fail)
+
+With ROADMAP_RACE=true the first two providers are asked at once and the
+first valid result wins; the slower one still finishes in the background
+and its outcome feeds the stats.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .admission import get_admission
+from .config import load_env
+from .models import model_route
+
+
+# name -> routing table entry (app/models.py) and API key variable
+PROVIDERS = {
+    "openai": {"route": "roadmap", "key_env": "OPENAI_API_KEY"},
+    "groq": {"route": "roadmap_groq", "key_env": "GROQ_API_KEY"},
+}
+
+DEFAULT_TIMEOUT = 30.0
+EWMA_ALPHA = 0.2
+FAILURES_BEFORE_COOLDOWN = 3
+COOLDOWN_SECONDS = 30.0
+# Weight factor per position in ROADMAP_PROVIDERS
+PREFERENCE_DECAY = 0.5
+# Assumed latency when no provider has samples yet
+PRIOR_LATENCY = 2.0
+RACE_WIDTH = 2
+
+_random = random.Random()
+
+
+class ProviderError(Exception):
+    """Every provider failed (the message lists why)"""
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+def provider_names() -> List[str]:
+    """ROADMAP_PROVIDERS in preference order (USE_GROQ=true puts Groq first by default)"""
+    load_env()
+    use_groq = os.getenv("USE_GROQ", "false").lower() == "true"
+    default = "groq,openai" if use_groq else "openai,groq"
+    names = [name.strip().lower() for name in os.getenv("ROADMAP_PROVIDERS", default).split(",")]
+    return [name for name in dict.fromkeys(names) if name in PROVIDERS]
+
+
+def race_enabled() -> bool:
+    load_env()
+    return os.getenv("ROADMAP_RACE", "false").lower() == "true"
+
+
+def provider_timeout() -> float:
+    load_env()
+    return float(os.getenv("ROADMAP_PROVIDER_TIMEOUT", DEFAULT_TIMEOUT))
+
+
+def _create_client(name: str):
+    if name == "groq":
+        from groq import Groq
+        return Groq(api_key=os.getenv("GROQ_API_KEY"))
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+# ============================================================================
+# PROVIDER
+# ============================================================================
+
+def _outcome(error: Exception) -> str:
+    # openai/groq raise APITimeoutError, which isn't a TimeoutError
+    return "timeout" if isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower() else "error"
+
+
+class Provider:
+    """
+    One roadmap provider: its client (built on first use) and health stats
+
+    Args:
+        name: Key in PROVIDERS
+        preference: Position in ROADMAP_PROVIDERS (0 = preferred)
+        client: Ready-made client (stubs); None builds the SDK client
+    """
+
+    def __init__(self, name: str, preference: int = 0, client=None):
+        self.name = name
+        self.route = PROVIDERS[name]["route"]
+        self.preference = preference
+        self._client = client
+        self._lock = threading.Lock()
+        self._latency: Optional[float] = None
+        self._success = 1.0
+        self._failures_in_row = 0
+        self._cooldown_until = 0.0
+        self._recent = deque(maxlen=200)
+        self._counts = {"requests": 0, "successes": 0, "errors": 0, "timeouts": 0, "invalid": 0}
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = _create_client(self.name)
+        return self._client
+
+    def settings(self) -> Dict:
+        """Model, temperature and max_tokens for this provider's route"""
+        return model_route(self.route)
+
+    def create(self, ticket, messages: List[Dict], timeout: Optional[float] = None, **kwargs):
+        """
+        client.chat.completions.create with the route's settings, reporting
+        rate-limit headers and usage to the admission ticket (both SDKs
+        expose headers via with_raw_response)
+        """
+        settings = self.settings()
+        kwargs = {"model": settings["model"], "messages": messages, "temperature": settings["temperature"],
+                  "max_tokens": settings["max_tokens"], **kwargs}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        completions = self.client.chat.completions
+        raw = getattr(completions, "with_raw_response", None)
+        if raw is None:
+            response = completions.create(**kwargs)
+        else:
+            raw_response = raw.create(**kwargs)
+            ticket.observe(headers=raw_response.headers)
+            response = raw_response.parse()
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None) is not None:
+            ticket.observe(total_tokens=usage.total_tokens)
+        return response
+
+    # -- health ---------------------------------------------------------
+
+    def record(self, latency: float, outcome: str = "success") -> None:
+        """
+        Feed one request's outcome into the stats
+
+        Args:
+            latency: Seconds the request took
+            outcome: "success", "error", "timeout" or "invalid"
+        """
+        ok = outcome == "success"
+        with self._lock:
+            self._counts["requests"] += 1
+            self._counts["successes" if ok else ("invalid" if outcome == "invalid" else outcome + "s")] += 1
+            self._success += EWMA_ALPHA * (float(ok) - self._success)
+            if ok:
+                self._latency = latency if self._latency is None else \
+                    self._latency + EWMA_ALPHA * (latency - self._latency)
+                self._recent.append(latency)
+                self._failures_in_row = 0
+            else:
+                self._failures_in_row += 1
+                if self._failures_in_row >= FAILURES_BEFORE_COOLDOWN:
+                    self._cooldown_until = time.monotonic() + COOLDOWN_SECONDS
+                    print(f"[PROVIDERS] {self.name} failed {self._failures_in_row}x in a row, "
+                          f"benched for {COOLDOWN_SECONDS:.0f}s")
+
+    def record_error(self, latency: float, error: Exception) -> None:
+        """record() a failed request as a timeout or an error"""
+        self.record(latency, _outcome(error))
+
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self._cooldown_until
+
+    def latency(self) -> Optional[float]:
+        """Latency EWMA in seconds (None before the first success)"""
+        return self._latency
+
+    def weight(self, prior_latency: float = PRIOR_LATENCY) -> float:
+        """Selection weight: (success rate / latency)^2, discounted by preference position"""
+        with self._lock:
+            latency = self._latency if self._latency is not None else prior_latency
+            # Squared so a clearly faster, healthier provider gets most of the traffic
+            return (max(self._success, 0.01) / max(latency, 0.01)) ** 2 * PREFERENCE_DECAY ** self.preference
+
+    def stats(self) -> Dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            return {
+                **self._counts,
+                "model": self.settings()["model"],
+                "latency_ewma_ms": round(self._latency * 1000, 1) if self._latency is not None else None,
+                "latency_p50_ms": round(recent[len(recent) // 2] * 1000, 1) if recent else None,
+                "success_ewma": round(self._success, 3),
+                "cooling_down": self.cooling_down(),
+            }
+
+
+# ============================================================================
+# POOL
+# ============================================================================
+
+class ProviderPool:
+    """The configured providers, tried in health-weighted order"""
+
+    def __init__(self, providers: List[Provider]):
+        self.providers = providers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def ranked(self) -> List[Provider]:
+        """All providers, healthy ones in a weighted random order, benched ones last"""
+        healthy = [p for p in self.providers if not p.cooling_down()]
+        benched = [p for p in self.providers if p.cooling_down()]
+        order = []
+        # Unmeasured providers are assumed as fast as the best measured one, so they get tried
+        measured = [p.latency() for p in healthy if p.latency() is not None]
+        prior = min(measured) if measured else PRIOR_LATENCY
+        weights = [p.weight(prior) for p in healthy]
+        while healthy:
+            pick = _random.choices(range(len(healthy)), weights=weights)[0]
+            order.append(healthy.pop(pick))
+            weights.pop(pick)
+        return order + benched
+
+    def attempt(self, provider: Provider, messages: List[Dict], parse: Callable[[str], Any],
+                tokens: int, priority: str = "bulk") -> Any:
+        """One request to one provider, recorded in its stats; raises on any failure"""
+        t0 = time.perf_counter()
+        try:
+            with get_admission().admit(priority, tokens=tokens) as ticket:
+                response = provider.create(ticket, messages, timeout=provider_timeout())
+        except Exception as e:
+            provider.record_error(time.perf_counter() - t0, e)
+            raise
+        try:
+            result = parse(response.choices[0].message.content)
+        except Exception:
+            provider.record(time.perf_counter() - t0, "invalid")
+            raise
+        provider.record(time.perf_counter() - t0)
+        return result
+
+    def complete(self, messages: List[Dict], parse: Callable[[str], Any], tokens: int,
+                 race: Optional[bool] = None, priority: str = "bulk") -> Tuple[Any, str]:
+        """
+        Parsed completion from the first provider that delivers one
+
+        Args:
+            messages: Chat messages
+            parse: Turns the completion text into the result; raising
+                marks the output invalid and moves on to the next provider
+            tokens: Tokens to reserve with the admission controller
+            race: Ask the top RACE_WIDTH providers at once (default ROADMAP_RACE)
+            priority: Admission priority class
+
+        Returns:
+            (result, provider name)
+
+        Raises:
+            ProviderError: Every provider failed
+        """
+        order = self.ranked()
+        race = race_enabled() if race is None else race
+        errors = []
+        if race and len(order) > 1:
+            racers, order = order[:RACE_WIDTH], order[RACE_WIDTH:]
+            futures = {self._pool().submit(self.attempt, p, messages, parse, tokens, priority): p for p in racers}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        return future.result(), futures[future].name
+                    errors.append(f"{futures[future].name}: {future.exception()}")
+        for provider in order:
+            try:
+                return self.attempt(provider, messages, parse, tokens, priority), provider.name
+            except Exception as e:
+                print(f"[PROVIDERS] {provider.name} failed ({e}), failing over")
+                errors.append(f"{provider.name}: {e}")
+        raise ProviderError("; ".join(errors) or "no roadmap providers configured")
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="roadmap-race")
+        return self._executor
+
+    def stats(self) -> Dict:
+        return {provider.name: provider.stats() for provider in self.providers}
+
+
+_pool: Optional[ProviderPool] = None
+_pool_lock = threading.Lock()
+
+
+def _configured_pool() -> ProviderPool:
+    load_env()
+    names = provider_names()
+    available = [name for name in names if os.getenv(PROVIDERS[name]["key_env"])]
+    # Nothing configured: keep the first so the request fails (and falls back) as before
+    return ProviderPool([Provider(name, i) for i, name in enumerate(available or names[:1] or ["openai"])])
+
+
+def get_provider_pool() -> ProviderPool:
+    """Return the process-wide provider pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _configured_pool()
+    return _pool
+
+
+def set_provider_clients(clients: Dict[str, Any]) -> None:
+    """Replace the pool with these ready-made clients ({name: client}, in preference order)"""
+    global _pool
+    with _pool_lock:
+        _pool = ProviderPool([Provider(name, i, client) for i, (name, client) in enumerate(clients.items())])
+
+
+def provider_stats() -> Dict:
+    """Per-provider requests, outcomes, latency and health"""
+    return get_provider_pool().stats()
+
+
+__all__ = [
+    'PROVIDERS',
+    'Provider',
+    'ProviderError',
+    'ProviderPool',
+    'get_provider_pool',
+    'provider_names',
+    'provider_stats',
+    'set_provider_clients',
+]
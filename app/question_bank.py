@@ -0,0 +1,258 @@
+"""
+Question bank fast path for discovery
+
+discovery_node used to make an LLM call for every question, including
+generic ones like the first "what interests you?". Most turns are now
+answered from prompts.DISCOVERY_QUESTION_BANK in microseconds:
+
+- the bank question is picked for the router's current_focus, skipping
+  any already asked in this thread
+- templates with a {topic} are filled with something the user said
+  (the most catalog-specific word or word pair), so the question still
+  builds on it. The topic only comes from answers filed under fields
+  that fit the focus (TOPIC_FIELDS, newest answer first): an interests
+  question never quotes a work-style answer back. Without one, those
+  templates are skipped
+
+The LLM is only used when the last answer needs a personalized
+follow-up, decided by a cheap heuristic: the user asked something
+back, sounded unsure, or gave a long answer a template can't do justice
+to. DISCOVERY_LLM_RATIO (default 0.5) caps the share of discovery
+questions that may go to the LLM; 1 always uses the LLM (the old
+behaviour), 0 never does.
+"""
+
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from . import prompts
+from .config import load_env
+from .retrieval import stem
+
+
+DEFAULT_LLM_RATIO = 0.5
+
+# Live-profile fields a focus's {topic} may come from, in order of preference.
+# Skills and work-style templates ask about the subject the user is into
+# ("Have you tried doing anything with {topic} yourself?"), never their schedule.
+TOPIC_FIELDS = {
+    "interests": ("interests",),
+    "skills": ("interests", "skills"),
+    "workstyle": ("interests", "skills"),
+}
+
+# Answers at least this long get an LLM follow-up (when the ratio allows)
+DETAILED_ANSWER_WORDS = 25
+
+_WORD = re.compile(r"[a-z][a-z'-]*")
+_UNSURE = re.compile(
+    r"\b(not sure|don'?t know|dunno|idk|no idea|not really|maybe|confused|unsure|hard to say)\b",
+    re.IGNORECASE,
+)
+
+# Common in answers and in the catalog, but never a useful topic
+_GENERIC = {
+    "career", "careers", "entertainment", "industry", "work", "working", "love", "like", "really",
+    "things", "thing", "people", "general", "mostly", "stuff", "want", "find", "about", "with",
+    "also", "good", "great", "time", "make", "making", "doing", "into", "well", "more", "some",
+}
+
+_stats = {"bank": 0, "llm": 0, "reasons": Counter()}
+_stats_lock = threading.Lock()
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+def llm_ratio() -> float:
+    """Max share of discovery questions that may use the LLM (DISCOVERY_LLM_RATIO)"""
+    load_env()
+    return min(1.0, max(0.0, float(os.getenv("DISCOVERY_LLM_RATIO", DEFAULT_LLM_RATIO))))
+
+
+# ============================================================================
+# TOPICS
+# ============================================================================
+
+_vocabulary: Optional[Dict[str, int]] = None
+_vocabulary_fingerprint: Optional[str] = None
+_vocabulary_lock = threading.Lock()
+
+
+def catalog_vocabulary() -> Dict[str, int]:
+    """Folded word -> number of careers whose name/description/skills/work styles use it"""
+    global _vocabulary, _vocabulary_fingerprint
+    from .career_data import get_career_paths
+    from .retrieval import catalog_fingerprint
+
+    career_paths = get_career_paths()
+    fingerprint = catalog_fingerprint(career_paths)
+    if _vocabulary is not None and _vocabulary_fingerprint == fingerprint:
+        return _vocabulary
+    with _vocabulary_lock:
+        if _vocabulary is None or _vocabulary_fingerprint != fingerprint:
+            if hasattr(career_paths, "column"):
+                # Memory-mapped catalog: string columns only, no record dicts
+                texts = zip(career_paths.column("name"), career_paths.column("description"))
+                texts = [" ".join(filter(None, pair)) for pair in texts]
+                texts += career_paths.vocabulary("skills") + career_paths.vocabulary("work_style")
+            else:
+                texts = [" ".join([info.get("name", ""), info.get("description", "")]
+                                  + info.get("skills", []) + info.get("work_style", []))
+                         for info in career_paths.values()]
+            frequency = Counter()
+            for text in texts:
+                frequency.update({stem(word) for word in _WORD.findall(text.lower())})
+            _vocabulary, _vocabulary_fingerprint = dict(frequency), fingerprint
+    return _vocabulary
+
+
+def extract_topic(answer: str) -> Optional[str]:
+    """
+    The most career-specific thing the user mentioned, in their own words
+
+    Picks words that also appear in the catalog, preferring adjacent
+    pairs ("live music") and then the word used by the fewest careers.
+    """
+    vocabulary = catalog_vocabulary()
+    words = _WORD.findall((answer or "").lower())
+
+    def known(word: str) -> bool:
+        return len(word) >= 4 and word not in _GENERIC and stem(word) in vocabulary
+
+    best, best_score = None, 0.0
+    for i, word in enumerate(words):
+        if not known(word):
+            continue
+        score = 1.0 / vocabulary[stem(word)]
+        if score > best_score:
+            best, best_score = word, score
+        if i + 1 < len(words) and known(words[i + 1]):
+            pair_score = 1.0 + score + 1.0 / vocabulary[stem(words[i + 1])]
+            if pair_score > best_score:
+                best, best_score = f"{word} {words[i + 1]}", pair_score
+    return best
+
+
+# ============================================================================
+# SELECTION
+# ============================================================================
+
+def follow_up_reason(answer: str) -> Optional[str]:
+    """Why the last answer needs an LLM follow-up ("question", "unsure", "detailed"), or None"""
+    if not answer:
+        return None
+    if "?" in answer:
+        return "question"
+    if _UNSURE.search(answer):
+        return "unsure"
+    if len(answer.split()) >= DETAILED_ANSWER_WORDS:
+        return "detailed"
+    return None
+
+
+def focus_topic(focus: str, live_profile: Optional[Dict]) -> Optional[str]:
+    """Topic for `focus` from the newest answer under its TOPIC_FIELDS that has one"""
+    for field in TOPIC_FIELDS.get(focus, ()):
+        for answer in reversed((live_profile or {}).get(field, [])):
+            topic = extract_topic(answer)
+            if topic:
+                return topic
+    return None
+
+
+def bank_question(focus: str, asked: List[str], live_profile: Optional[Dict] = None) -> Optional[Dict]:
+    """
+    Next unasked bank question for `focus`
+
+    Args:
+        focus: current_focus from router_node
+        asked: Bank question ids already used in this thread
+        live_profile: Answers by field (router_node), for {topic} templates
+
+    Returns:
+        {"id", "text"} or None if the bank for this focus is used up
+    """
+    topic = None
+    for question_id, template in prompts.DISCOVERY_QUESTION_BANK.get(focus, []):
+        if question_id in asked:
+            continue
+        if "{topic}" in template:
+            if topic is None:
+                topic = focus_topic(focus, live_profile) or ""
+            if not topic:
+                continue
+            return {"id": question_id, "text": template.format(topic=topic)}
+        return {"id": question_id, "text": template}
+    return None
+
+
+def choose_question(focus: str, sources: List[str], answer: str, llm_available: bool = True,
+                    record: bool = True, live_profile: Optional[Dict] = None) -> Dict:
+    """
+    Decide how to ask the next discovery question
+
+    Args:
+        focus: current_focus from router_node
+        sources: question_sources so far (bank question ids and "llm")
+        answer: The user's latest answer ("" before the first one)
+        llm_available: False when there is no LLM configured
+        record: Count the choice in question_bank_stats()
+        live_profile: Answers by field, the source of {topic}s (see TOPIC_FIELDS)
+
+    Returns:
+        {"source": "bank", "id", "text"} or {"source": "llm", "reason"}
+    """
+    ratio = llm_ratio() if llm_available else 0.0
+    question = bank_question(focus, sources, live_profile) if ratio < 1.0 else None
+
+    if question is None:
+        reason = "always" if ratio >= 1.0 else "bank_exhausted"
+    else:
+        reason = follow_up_reason(answer)
+        llm_so_far = sources.count("llm")
+        # Stay within the configured share, counting the question about to be asked
+        if reason and llm_so_far >= ratio * (len(sources) + 1):
+            reason = None
+
+    if reason and llm_available:
+        choice = {"source": "llm", "reason": reason}
+    elif question is not None:
+        choice = {"source": "bank", **question}
+    else:
+        choice = {"source": "llm", "reason": reason or "bank_exhausted"}
+
+    if not record:
+        return choice
+    with _stats_lock:
+        _stats[choice["source"]] += 1
+        if choice["source"] == "llm":
+            _stats["reasons"][choice["reason"]] += 1
+    return choice
+
+
+def question_bank_stats() -> Dict:
+    """Discovery questions answered from the bank vs the LLM (with LLM reasons)"""
+    with _stats_lock:
+        total = _stats["bank"] + _stats["llm"]
+        return {
+            "bank": _stats["bank"],
+            "llm": _stats["llm"],
+            "bank_share": round(_stats["bank"] / total, 3) if total else 0.0,
+            "llm_reasons": dict(_stats["reasons"]),
+        }
+
+
+__all__ = [
+    'TOPIC_FIELDS',
+    'choose_question',
+    'extract_topic',
+    'focus_topic',
+    'follow_up_reason',
+    'llm_ratio',
+    'question_bank_stats',
+]
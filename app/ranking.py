@@ -0,0 +1,257 @@
+"""
+Multi-signal ranking of career matches
+
+ranking_node used to sort by the LLM's fit_score alone. Those scores are
+poorly calibrated and drift between runs (0.87 one time, 0.9 the next),
+so the top 3 reshuffled for the same profile. rank_careers() combines:
+
+- llm:         the LLM fit_score, clipped to [0, 1] and quantized to
+               LLM_SCORE_STEP so small run-to-run jitter doesn't reorder
+- overlap:     deterministic skill/work-style Jaccard against the profile
+               (bitsets.py), scaled so the best candidate is 1
+- constraints: salary and education fit against the profile's
+               constraints; careers that clearly violate one are filtered
+               out as long as enough candidates remain
+- diversity:   a penalty, applied while picking the top k, for each
+               candidate's similarity to careers already picked
+
+All signals are computed as vectors over the candidates; the candidate
+pool is cut with a heap before the greedy diversity pass. Weights come
+from RANKING_WEIGHTS (e.g. "llm=0.5,overlap=0.3,constraints=0.2,diversity=0.3").
+Ties break on career key, so the same inputs always give the same order.
+"""
+
+import heapq
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import load_env
+
+
+DEFAULT_WEIGHTS = {"llm": 0.6, "overlap": 0.25, "constraints": 0.15, "diversity": 0.3}
+LLM_SCORE_STEP = 0.05
+
+# Candidates kept for the diversity pass, per requested result
+POOL_FACTOR = 3
+
+_SALARY = re.compile(r"\$\s*(\d+(?:\.\d+)?)\s*(k|m)?", re.IGNORECASE)
+_PAY_WORDS = re.compile(r"\b(salary|pay|paid|money|income|earn\w*|financ\w*|wealth\w*)\b", re.IGNORECASE)
+_NO_DEGREE = re.compile(
+    r"\b(no|without( a)?|can'?t afford( a)?|avoid\w*|skip\w*)\s+(college|degree|university|school)\b"
+    r"|\bself[- ]taught\b|\bstudent debt\b",
+    re.IGNORECASE,
+)
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+def ranking_weights() -> Dict[str, float]:
+    """DEFAULT_WEIGHTS with any RANKING_WEIGHTS overrides ("name=value,...")"""
+    load_env()
+    weights = dict(DEFAULT_WEIGHTS)
+    for item in filter(None, (part.strip() for part in os.getenv("RANKING_WEIGHTS", "").split(","))):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in weights:
+            print(f"[RANKING] Ignoring unknown weight {name!r}")
+            continue
+        try:
+            weight = float(value)
+        except ValueError:
+            weight = math.nan
+        if not math.isfinite(weight):
+            print(f"[RANKING] Ignoring weight {name!r}: {value.strip()!r} is not a number")
+            continue
+        weights[name] = max(0.0, weight)
+    return weights
+
+
+# ============================================================================
+# CONSTRAINT SIGNALS
+# ============================================================================
+
+def salary_bounds(salary_range: str) -> Tuple[Optional[float], Optional[float]]:
+    """("$40k-$120k") -> (40.0, 120.0) in thousands; None for missing bounds"""
+    amounts = []
+    for number, unit in _SALARY.findall(salary_range or ""):
+        value = float(number)
+        if unit.lower() == "m":
+            value *= 1000
+        elif not unit and value >= 1000:
+            value /= 1000
+        amounts.append(value)
+    if not amounts:
+        return None, None
+    return amounts[0], amounts[-1] if len(amounts) > 1 else amounts[0]
+
+
+def degree_requirement(education: str) -> float:
+    """How firmly the career expects a degree: 0 (not needed) .. 1 (required)"""
+    text = (education or "").lower()
+    if not text or "no formal" in text or "not required" in text or "no specific" in text:
+        return 0.0
+    if "self-taught" in text or "helpful" in text or ("courses" in text and "degree" not in text):
+        return 0.25
+    if "required" in text:
+        return 1.0
+    if "recommended" in text or "degree" in text:
+        return 0.6
+    return 0.25
+
+
+def profile_constraints(user_profile: Dict) -> Dict:
+    """
+    Salary and education constraints stated in the profile
+
+    Returns:
+        {"min_salary": thousands or None, "pay_focus": bool, "avoid_degree": bool}
+    """
+    text = " ; ".join(str(item) for item in user_profile.get("constraints", []) or [])
+    floors = [bound for bound in salary_bounds(text) if bound is not None]
+    return {
+        "min_salary": min(floors) if floors else None,
+        "pay_focus": bool(_PAY_WORDS.search(text)),
+        "avoid_degree": bool(_NO_DEGREE.search(text)),
+    }
+
+
+def constraint_scores(infos: List[Dict], constraints: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Constraint fit per candidate
+
+    Returns:
+        (scores in [0, 1], violations) - both (len(infos),); careers
+        without stated constraints score 1
+    """
+    bounds = np.array([[np.nan if b is None else b for b in salary_bounds(info.get("salary_range", ""))]
+                       for info in infos], dtype=np.float32).reshape(len(infos), 2)
+    degree = np.array([degree_requirement(info.get("education", "")) for info in infos], dtype=np.float32)
+    scores = np.ones(len(infos), dtype=np.float32)
+    violations = np.zeros(len(infos), dtype=bool)
+    floor, ceiling = bounds[:, 0], bounds[:, 1]
+
+    min_salary = constraints.get("min_salary")
+    if min_salary is not None:
+        known = ~np.isnan(ceiling)
+        violations |= known & (ceiling < min_salary)
+        # Full marks when even the entry salary meets the minimum
+        meets = np.where(known, np.clip((ceiling - min_salary) / max(min_salary, 1.0), 0.0, 1.0), 0.5)
+        scores *= np.where(known & (floor >= min_salary), 1.0, 0.5 + 0.5 * meets)
+    elif constraints.get("pay_focus") and np.any(~np.isnan(floor)):
+        best = np.nanmax(floor)
+        scores *= np.where(np.isnan(floor), 0.5, 0.5 + 0.5 * np.nan_to_num(floor) / max(best, 1.0))
+
+    if constraints.get("avoid_degree"):
+        violations |= degree >= 1.0
+        scores *= 1.0 - 0.8 * degree
+
+    return scores, violations
+
+
+# ============================================================================
+# RANKING
+# ============================================================================
+
+def fit_score(match: Dict) -> float:
+    """The LLM's fit_score as a number: 0.85, "0.85" or "85%"; 0.0 if unparseable ("high")"""
+    value = match.get("fit_score", 0) or 0
+    scale = 1.0
+    if isinstance(value, str):
+        value = value.strip()
+        if value.endswith("%"):
+            value, scale = value[:-1], 0.01
+    try:
+        score = float(value) * scale
+    except (TypeError, ValueError):
+        return 0.0
+    return score if math.isfinite(score) else 0.0
+
+
+def rank_careers(matches: List[Dict], user_profile: Dict, career_paths: Dict[str, Dict],
+                 k: int = 3, weights: Optional[Dict[str, float]] = None) -> List[Dict]:
+    """
+    Top-k matches by fused score
+
+    Args:
+        matches: Resolved matches (with career_key, see resolve_career_matches)
+        user_profile: Profile from synthesis_node
+        career_paths: Catalog the keys refer to
+        k: Matches to return
+        weights: Signal weights (defaults to ranking_weights())
+
+    Returns:
+        Up to k matches, best first, each with "rank_score" and the
+        per-signal "signals" that produced it
+    """
+    from .bitsets import get_career_bitsets
+
+    # Deterministic base order: ties anywhere below resolve by career key
+    matches = sorted(matches, key=lambda match: match["career_key"])
+    if not matches or k <= 0:
+        return []
+    weights = weights or ranking_weights()
+    infos = [career_paths[match["career_key"]] for match in matches]
+
+    llm = np.array([fit_score(match) for match in matches], dtype=np.float32)
+    llm = np.round(np.clip(llm, 0.0, 1.0) / LLM_SCORE_STEP) * LLM_SCORE_STEP
+
+    bitsets = get_career_bitsets(career_paths)
+    rows = np.array([bitsets.rows[match["career_key"]] for match in matches])
+    overlap = bitsets.jaccard(user_profile, rows)
+    if overlap.max() > 0:
+        overlap = overlap / overlap.max()
+
+    constraints, violations = constraint_scores(infos, profile_constraints(user_profile))
+
+    total = weights["llm"] + weights["overlap"] + weights["constraints"] or 1.0
+    base = (weights["llm"] * llm + weights["overlap"] * overlap + weights["constraints"] * constraints) / total
+    # Rounded so float noise can't reorder equal scores
+    base = np.round(base, 6)
+
+    eligible = [i for i in range(len(matches)) if not violations[i]]
+    if len(eligible) < min(k, len(matches)):
+        eligible = list(range(len(matches)))
+
+    # heapq.nlargest is stable, so equal scores keep career-key order
+    pool = heapq.nlargest(min(len(eligible), k * POOL_FACTOR), eligible, key=lambda i: base[i])
+    similarity = bitsets.pairwise_jaccard(rows[pool])
+
+    penalty = np.zeros(len(pool), dtype=np.float32)
+    available = np.ones(len(pool), dtype=bool)
+    ranked = []
+    while available.any() and len(ranked) < k:
+        adjusted = np.where(available, base[pool] - weights["diversity"] * penalty, -np.inf)
+        best = int(np.argmax(adjusted))
+        available[best] = False
+        i = pool[best]
+        ranked.append({
+            **matches[i],
+            "fit_score": fit_score(matches[i]),
+            "rank_score": round(float(adjusted[best]), 3),
+            "signals": {
+                "llm": round(float(llm[i]), 3),
+                "overlap": round(float(overlap[i]), 3),
+                "constraints": round(float(constraints[i]), 3),
+                "diversity_penalty": round(float(base[i] - adjusted[best]), 3),
+            },
+        })
+        penalty = np.maximum(penalty, similarity[best])
+    return ranked
+
+
+__all__ = [
+    'DEFAULT_WEIGHTS',
+    'constraint_scores',
+    'degree_requirement',
+    'fit_score',
+    'profile_constraints',
+    'rank_careers',
+    'ranking_weights',
+    'salary_bounds',
+]
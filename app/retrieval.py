@@ -0,0 +1,289 @@
+"""
+Local candidate retrieval for career matching
+
+matching_node used to paste the whole catalog into the recommendation
+prompt, so prompt size and latency grew with every career added. This
+module keeps a hashed TF-IDF index over each career's name, description,
+skills and work styles, and returns the top-k careers for a user profile;
+only those go into RECOMMENDATION_USER_PROMPT.
+
+The index is a float32 NumPy matrix (one L2-normalized row per career)
+saved under CAREER_INDEX_DIR and memory-mapped on load. It is rebuilt
+automatically when the catalog or the index settings change.
+"""
+
+import functools
+import hashlib
+import itertools
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import load_env
+
+
+INDEX_VERSION = 1
+INDEX_DIMENSIONS = 2048
+DEFAULT_CANDIDATES = 8
+
+# Skills and work styles say more about fit than description prose
+FIELD_WEIGHTS = {"name": 1.0, "description": 1.0, "skills": 2.0, "work_style": 2.0, "entry_path": 0.5}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+# ============================================================================
+# FEATURES
+# ============================================================================
+
+def stem(word: str) -> str:
+    """Fold plurals so "beats" matches "beat" (deliberately minimal; shared with question_bank)"""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _terms(text: str) -> List[str]:
+    """Unigrams plus bigrams, lowercased and plural-folded"""
+    words = [stem(word) for word in _WORD.findall(text.lower())]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def _bucket(term: str) -> int:
+    # crc32 rather than hash(): must be stable across processes and runs
+    return zlib.crc32(term.encode("utf-8")) % INDEX_DIMENSIONS
+
+
+def _career_terms(info: Dict) -> Counter:
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = info.get(field, "")
+        text = " ".join(value) if isinstance(value, list) else str(value or "")
+        for term in _terms(text):
+            counts[term] += weight
+    return counts
+
+
+def _profile_terms(user_profile: Dict) -> Counter:
+    counts = Counter()
+    for field in ("interests", "skills", "work_style", "constraints"):
+        for item in user_profile.get(field, []) or []:
+            counts.update(_terms(str(item)))
+    return counts
+
+
+_SETTINGS = f"{INDEX_VERSION}:{INDEX_DIMENSIONS}:{sorted(FIELD_WEIGHTS.items())}".encode("utf-8")
+
+
+@functools.lru_cache(maxsize=64)
+def _source_fingerprint(source: str) -> str:
+    digest = hashlib.sha1(_SETTINGS)
+    digest.update(source.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def catalog_fingerprint(career_paths: Dict[str, Dict]) -> str:
+    """Changes whenever the catalog content or index settings change"""
+    # The built-in and external catalogs carry their own content
+    # fingerprint, hashed once; this runs on every lookup
+    source = getattr(career_paths, "fingerprint", None)
+    if source is not None:
+        return _source_fingerprint(source)
+    digest = hashlib.sha1(_SETTINGS)
+    for key, info in career_paths.items():
+        digest.update(key.encode("utf-8"))
+        digest.update(json.dumps(info, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+# ============================================================================
+# INDEX
+# ============================================================================
+
+class CareerIndex:
+    """
+    Hashed TF-IDF vectors for the career catalog
+
+    Args:
+        keys: Catalog keys, one per matrix row
+        matrix: (len(keys), INDEX_DIMENSIONS) float32, rows L2-normalized
+        idf: (INDEX_DIMENSIONS,) float32 inverse document frequencies
+    """
+
+    def __init__(self, keys: List[str], matrix: np.ndarray, idf: np.ndarray):
+        self.keys = keys
+        self.matrix = matrix
+        self.idf = idf
+
+    @classmethod
+    def build(cls, career_paths: Dict[str, Dict]) -> "CareerIndex":
+        keys = list(career_paths)
+        counts = [_career_terms(career_paths[key]) for key in keys]
+
+        document_frequency = np.zeros(INDEX_DIMENSIONS, dtype=np.float32)
+        for terms in counts:
+            document_frequency[list({_bucket(term) for term in terms})] += 1
+        idf = np.log((1 + len(keys)) / (1 + document_frequency)).astype(np.float32) + 1.0
+
+        matrix = np.zeros((len(keys), INDEX_DIMENSIONS), dtype=np.float32)
+        for row, terms in enumerate(counts):
+            for term, count in terms.items():
+                matrix[row, _bucket(term)] += 1.0 + math.log(count)
+        matrix *= idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        return cls(keys, matrix, idf)
+
+    # -- persistence -----------------------------------------------------
+
+    @staticmethod
+    def _paths(directory: str, fingerprint: str) -> Tuple[str, str, str]:
+        base = os.path.join(directory, f"career_index-{fingerprint}")
+        return base + ".matrix.npy", base + ".idf.npy", base + ".keys.json"
+
+    def save(self, directory: str, fingerprint: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        matrix_path, idf_path, keys_path = self._paths(directory, fingerprint)
+        # Write then rename so a concurrent reader never maps a half-written file
+        for path, write in (
+            (matrix_path, lambda f: np.save(f, self.matrix)),
+            (idf_path, lambda f: np.save(f, self.idf)),
+            (keys_path, lambda f: f.write(json.dumps(self.keys).encode("utf-8"))),
+        ):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, directory: str, fingerprint: str) -> Optional["CareerIndex"]:
+        """Memory-map a saved index, or None if there isn't one for `fingerprint`"""
+        matrix_path, idf_path, keys_path = cls._paths(directory, fingerprint)
+        try:
+            with open(keys_path, encoding="utf-8") as f:
+                keys = json.load(f)
+            matrix = np.load(matrix_path, mmap_mode="r")
+            idf = np.load(idf_path)
+        except (OSError, ValueError):
+            return None
+        if matrix.shape != (len(keys), INDEX_DIMENSIONS):
+            return None
+        return cls(keys, matrix, idf)
+
+    # -- search ----------------------------------------------------------
+
+    def query_vector(self, user_profile: Dict) -> Optional[np.ndarray]:
+        vector = np.zeros(INDEX_DIMENSIONS, dtype=np.float32)
+        for term, count in _profile_terms(user_profile).items():
+            vector[_bucket(term)] += 1.0 + math.log(count)
+        vector *= self.idf
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def scores(self, user_profile: Dict) -> Optional[np.ndarray]:
+        """Cosine similarity of every career to the profile, or None if it has no usable terms"""
+        vector = self.query_vector(user_profile)
+        if vector is None or not self.keys:
+            return None
+        return self.matrix @ vector
+
+    def search(self, user_profile: Dict, k: int) -> List[Tuple[str, float]]:
+        """Top-k (key, cosine similarity) for the profile, best first"""
+        scores = self.scores(user_profile)
+        if scores is None:
+            return []
+        k = min(k, len(self.keys))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.keys[i], float(scores[i])) for i in top]
+
+
+# ============================================================================
+# PROCESS-WIDE INDEX
+# ============================================================================
+
+_index: Optional[CareerIndex] = None
+_index_fingerprint: Optional[str] = None
+_index_lock = threading.Lock()
+
+
+def _index_dir() -> str:
+    load_env()
+    return os.getenv("CAREER_INDEX_DIR", os.path.join(".cache", "index"))
+
+
+def get_career_index(career_paths: Optional[Dict[str, Dict]] = None) -> CareerIndex:
+    """The index for the current catalog (mapped from disk, built on first use)"""
+    global _index, _index_fingerprint
+    if career_paths is None:
+        from .career_data import get_career_paths
+        career_paths = get_career_paths()
+    fingerprint = catalog_fingerprint(career_paths)
+    if _index is not None and _index_fingerprint == fingerprint:
+        return _index
+    with _index_lock:
+        if _index is None or _index_fingerprint != fingerprint:
+            directory = _index_dir()
+            index = CareerIndex.load(directory, fingerprint)
+            if index is None:
+                index = CareerIndex.build(career_paths)
+                try:
+                    index.save(directory, fingerprint)
+                    index = CareerIndex.load(directory, fingerprint) or index
+                except OSError as e:
+                    print(f"[RETRIEVAL] Could not persist index: {e}")
+            _index, _index_fingerprint = index, fingerprint
+    return _index
+
+
+def match_candidates() -> int:
+    """How many careers go into the recommendation prompt (MATCH_CANDIDATES)"""
+    load_env()
+    return int(os.getenv("MATCH_CANDIDATES", DEFAULT_CANDIDATES))
+
+
+def retrieve_career_paths(user_profile: Dict, career_paths: Optional[Dict[str, Dict]] = None,
+                          k: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    The k careers most similar to the profile, best first
+
+    Args:
+        user_profile: Profile from synthesis_node
+        career_paths: Catalog (defaults to get_career_paths())
+        k: Candidates to return (defaults to MATCH_CANDIDATES)
+
+    Returns:
+        Subset of the catalog in the same {key: info} shape. If the profile
+        has no usable terms, the first k careers.
+    """
+    if career_paths is None:
+        from .career_data import get_career_paths
+        career_paths = get_career_paths()
+    k = k or match_candidates()
+    if len(career_paths) <= k:
+        return career_paths
+
+    hits = get_career_index(career_paths).search(user_profile, k)
+    if not hits:
+        # islice: a memory-mapped catalog only decodes the k records returned
+        return dict(itertools.islice(career_paths.items(), k))
+    return {key: career_paths[key] for key, _ in hits}
+
+
+__all__ = [
+    'CareerIndex',
+    'catalog_fingerprint',
+    'get_career_index',
+    'match_candidates',
+    'retrieve_career_paths',
+    'stem',
+]
@@ -1,20 +1,28 @@
 """
-Roadmap generation using OpenAI or Groq
+Roadmap generation using OpenAI and/or Groq (see app/providers.py)
 """
+import hashlib
+import json
 import os
-from typing import Dict, List
-from dotenv import load_dotenv
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
 
-load_dotenv()
+from .admission import estimate_tokens, get_admission
+from .cache import get_cache
+from .config import load_env
+from .providers import get_provider_pool, provider_timeout, set_provider_clients
 
-USE_GROQ = os.getenv("USE_GROQ", "false").lower() == "true"
 
-if USE_GROQ:
-    from groq import Groq
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-else:
-    from openai import OpenAI
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def get_client():
+    """Return the preferred provider's client, creating it on first use"""
+    return get_provider_pool().providers[0].client
+
+
+def set_client(client, use_groq: bool = False) -> None:
+    """Use only this provider client (e.g. a stub for benchmarks); see set_provider_clients"""
+    set_provider_clients({"groq" if use_groq else "openai": client})
 
 
 ROADMAP_PROMPT = """You are a career roadmap expert. Generate a clear, structured roadmap for someone who wants to become: {goal}
@@ -39,65 +47,338 @@ Return ONLY valid JSON in this exact format:
 Make it practical, specific, and achievable. Focus on entertainment industry paths when relevant."""
 
 
+ROADMAP_SYSTEM = "You are a career advisor specializing in entertainment careers."
+
+# Roadmaps are cached in the shared cache (app/cache.py) so every worker
+# process benefits from every generation
+ROADMAP_CACHE_NAMESPACE = "roadmap"
+
+
+def roadmap_version() -> str:
+    """Hash of the prompt and the providers' model settings; part of every cache key"""
+    routes = json.dumps({p.name: p.settings() for p in get_provider_pool().providers}, sort_keys=True)
+    return hashlib.sha1(f"{ROADMAP_PROMPT}|{routes}".encode("utf-8")).hexdigest()[:12]
+
+
+def roadmap_cache_key(goal: str, version: Optional[str] = None) -> str:
+    """
+    Cache key for a goal
+
+    Normalizes case/whitespace and includes roadmap_version() (computed
+    unless passed in), so changing the prompt or a model setting
+    naturally invalidates old entries.
+    """
+    return f"{version or roadmap_version()}:{' '.join(goal.lower().split())}"
+
+
+def _roadmap_cache_enabled() -> bool:
+    load_env()
+    return os.getenv("ROADMAP_CACHE", "true").lower() == "true"
+
+
+def _roadmap_cache_ttl() -> float:
+    return float(os.getenv("ROADMAP_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def get_cached_roadmap(goal: str) -> Optional[Dict]:
+    """Return the cached roadmap for `goal`, or None"""
+    if not _roadmap_cache_enabled():
+        return None
+    try:
+        return get_cache().get(ROADMAP_CACHE_NAMESPACE, roadmap_cache_key(goal))
+    except sqlite3.Error as e:
+        print(f"Roadmap cache read failed: {e}")
+        return None
+
+
+def cache_roadmap(goal: str, roadmap: Dict) -> None:
+    """Store a generated roadmap in the shared cache"""
+    if not _roadmap_cache_enabled():
+        return
+    try:
+        get_cache().set(ROADMAP_CACHE_NAMESPACE, roadmap_cache_key(goal), roadmap, ttl=_roadmap_cache_ttl())
+    except sqlite3.Error as e:
+        print(f"Roadmap cache write failed: {e}")
+
+
+def _roadmap_tokens(goal: str) -> int:
+    """Tokens to reserve with the admission controller (prompt + max_tokens)"""
+    max_tokens = max(p.settings()["max_tokens"] or 2000 for p in get_provider_pool().providers)
+    return estimate_tokens(ROADMAP_SYSTEM + ROADMAP_PROMPT.format(goal=goal)) + max_tokens
+
+
+def fallback_roadmap(goal: str) -> Dict:
+    """Static roadmap used when generation fails"""
+    return {
+        "title": f"Roadmap to {goal}",
+        "phases": [
+            {
+                "title": "Foundation",
+                "duration": "3-6 months",
+                "steps": ["Learn the basics", "Build foundational skills"]
+            },
+            {
+                "title": "Development",
+                "duration": "6-12 months",
+                "steps": ["Practice regularly", "Build projects"]
+            },
+            {
+                "title": "Professional",
+                "duration": "12+ months",
+                "steps": ["Get experience", "Network in the industry"]
+            }
+        ]
+    }
+
+
+def parse_roadmap(content: str) -> Dict:
+    """Roadmap dict from completion text (``` fences allowed); raises ValueError if it isn't one"""
+    content = content.strip()
+    
+    # Remove markdown code fences
+    content = re.sub(r'^```json\s*', '', content)
+    content = re.sub(r'^```\s*', '', content)
+    content = re.sub(r'\s*```$', '', content)
+    content = content.strip()
+    
+    roadmap = json.loads(content)
+    if not isinstance(roadmap, dict) or not roadmap.get("phases"):
+        raise ValueError("completion is not a roadmap")
+    return roadmap
+
+
+def _roadmap_messages(goal: str) -> List[Dict]:
+    return [
+        {"role": "system", "content": ROADMAP_SYSTEM},
+        {"role": "user", "content": ROADMAP_PROMPT.format(goal=goal)}
+    ]
+
+
+def build_roadmap(goal: str, priority: str = "bulk") -> Dict:
+    """
+    Generate a roadmap with the LLM (no cache lookup) and cache it
+
+    Args:
+        goal: Career goal
+        priority: Admission priority class
+
+    Raises:
+        ProviderError: Every provider failed
+    """
+    roadmap, _ = get_provider_pool().complete(
+        _roadmap_messages(goal), parse_roadmap, tokens=_roadmap_tokens(goal), priority=priority
+    )
+    cache_roadmap(goal, roadmap)
+    return roadmap
+
+
 def generate_roadmap(goal: str) -> Dict:
-    """Generate a career roadmap using LLM"""
+    """Generate a career roadmap using LLM (served from the shared cache when possible)"""
+    
+    from .roadmap_prefetch import claim_prefetch, join_prefetch
+
+    cached = get_cached_roadmap(goal)
+    if cached:
+        claim_prefetch(goal)
+        return cached
+    
+    # Speculative prefetch still running in this process: wait for it instead of generating twice
+    prefetched = join_prefetch(goal, timeout=provider_timeout())
+    if prefetched:
+        return prefetched
     
     try:
-        if USE_GROQ:
-            response = client.chat.completions.create(
-                model="llama-3.1-70b-versatile",
-                messages=[
-                    {"role": "system", "content": "You are a career advisor specializing in entertainment careers."},
-                    {"role": "user", "content": ROADMAP_PROMPT.format(goal=goal)}
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
-        else:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a career advisor specializing in entertainment careers."},
-                    {"role": "user", "content": ROADMAP_PROMPT.format(goal=goal)}
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
-        
-        import json
-        import re
-        
-        content = response.choices[0].message.content.strip()
-        
-        # Remove markdown code fences
-        content = re.sub(r'^```json\s*', '', content)
-        content = re.sub(r'^```\s*', '', content)
-        content = re.sub(r'\s*```$', '', content)
-        content = content.strip()
-        
-        roadmap = json.loads(content)
-        return roadmap
+        return build_roadmap(goal)
         
     except Exception as e:
         print(f"Error generating roadmap: {e}")
-        # Fallback roadmap
-        return {
-            "title": f"Roadmap to {goal}",
-            "phases": [
-                {
-                    "title": "Foundation",
-                    "duration": "3-6 months",
-                    "steps": ["Learn the basics", "Build foundational skills"]
-                },
-                {
-                    "title": "Development",
-                    "duration": "6-12 months",
-                    "steps": ["Practice regularly", "Build projects"]
-                },
-                {
-                    "title": "Professional",
-                    "duration": "12+ months",
-                    "steps": ["Get experience", "Network in the industry"]
-                }
-            ]
-        }
\ No newline at end of file
+        return fallback_roadmap(goal)
+
+
+# ============================================================================
+# STREAMING
+# ============================================================================
+
+class RoadmapStreamParser:
+    """
+    Incremental parser for the roadmap JSON as it streams in
+
+    Feed completion text chunk by chunk; each call returns the events that
+    became complete: ("title", str) once the title string closes, and
+    ("phase", dict) for every object in the "phases" array as soon as its
+    closing brace arrives. Tolerates a leading ```json fence.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False   # at depth 1: next string is a key (vs. a value)
+        self._pending_key = None   # last key string seen at depth 1
+        self._current_key = None   # key whose value we're inside at depth 1
+        self._in_phases = False
+        self._phase_start = None
+        self.title = None
+        self.phases: List[Dict] = []
+
+    def feed(self, chunk: str) -> List[tuple]:
+        """Consume more text; returns newly completed (kind, value) events"""
+        self.buffer += chunk
+        events = []
+        buf = self.buffer
+        for i in range(self._pos, len(buf)):
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        text = json.loads(buf[self._string_start:i + 1])
+                        if self._expect_key:
+                            self._pending_key = text
+                        elif self._current_key == "title" and self.title is None:
+                            self.title = text
+                            events.append(("title", text))
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":" and self._depth == 1:
+                self._current_key = self._pending_key
+                self._expect_key = False
+            elif c == "," and self._depth == 1:
+                self._current_key = None
+                self._expect_key = True
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._expect_key = True
+                elif c == "[" and self._depth == 2 and self._current_key == "phases":
+                    self._in_phases = True
+                elif c == "{" and self._depth == 3 and self._in_phases:
+                    self._phase_start = i
+            elif c in "}]":
+                if c == "}" and self._depth == 3 and self._phase_start is not None:
+                    try:
+                        phase = json.loads(buf[self._phase_start:i + 1])
+                        self.phases.append(phase)
+                        events.append(("phase", phase))
+                    except json.JSONDecodeError as e:
+                        print(f"Skipping unparseable roadmap phase: {e}")
+                    self._phase_start = None
+                elif c == "]" and self._depth == 2:
+                    self._in_phases = False
+                self._depth -= 1
+        self._pos = len(buf)
+        return events
+
+    def result(self, goal: str) -> Tuple[Optional[Dict], bool]:
+        """
+        Roadmap once the stream ends
+
+        Returns:
+            (roadmap, complete): complete is True only if the whole buffer
+            parsed as a roadmap; otherwise the roadmap is made of the
+            phases that streamed (None if there were none)
+        """
+        content = re.sub(r'^```(?:json)?\s*', '', self.buffer.strip())
+        content = re.sub(r'\s*```$', '', content)
+        try:
+            roadmap = json.loads(content)
+            if isinstance(roadmap, dict) and roadmap.get("phases"):
+                return roadmap, True
+        except json.JSONDecodeError:
+            pass
+        if not self.phases:
+            return None, False
+        # Truncated (e.g. max_tokens) or trailing junk: keep what streamed successfully
+        return {"title": self.title or f"Roadmap to {goal}", "phases": self.phases}, False
+
+
+def stream_roadmap(goal: str):
+    """
+    Stream a roadmap as it is generated
+
+    Yields event dicts:
+        {"event": "title", "data": {"title": ...}}
+        {"event": "phase", "data": {"index": i, "phase": {...}}}
+        {"event": "done",  "data": {"roadmap": {...}, "cached": bool, "fallback": bool}}
+
+    Cached roadmaps are replayed immediately, and so is one this process is
+    still prefetching once it is ready. A provider that fails, or ends
+    its stream without a usable roadmap, before anything was sent is
+    failed over like in generate_roadmap; if all fail, or one fails
+    after sending only its title, the static fallback is sent with the
+    "done" event. A roadmap cut off mid-stream (an error, or max_tokens)
+    is sent as is but not cached.
+    """
+
+    from .roadmap_prefetch import claim_prefetch, join_prefetch
+
+    cached = get_cached_roadmap(goal)
+    if cached:
+        claim_prefetch(goal)
+    else:
+        cached = join_prefetch(goal, timeout=provider_timeout())
+    if cached:
+        yield {"event": "title", "data": {"title": cached.get("title", f"Roadmap to {goal}")}}
+        for index, phase in enumerate(cached.get("phases", [])):
+            yield {"event": "phase", "data": {"index": index, "phase": phase}}
+        yield {"event": "done", "data": {"roadmap": cached, "cached": True, "fallback": False}}
+        return
+
+    # Fail over to the next provider as long as nothing has been sent yet
+    parser = None
+    for provider in get_provider_pool().ranked():
+        parser = RoadmapStreamParser()
+        t0 = time.perf_counter()
+        failed = False
+        try:
+            # The slot is held until the stream is fully read
+            with get_admission().admit("bulk", tokens=_roadmap_tokens(goal)) as ticket:
+                stream = provider.create(ticket, _roadmap_messages(goal), timeout=provider_timeout(), stream=True)
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    text = chunk.choices[0].delta.content
+                    if not text:
+                        continue
+                    for kind, value in parser.feed(text):
+                        if kind == "title":
+                            yield {"event": "title", "data": {"title": value}}
+                        else:
+                            yield {"event": "phase", "data": {"index": len(parser.phases) - 1, "phase": value}}
+        except Exception as e:
+            failed = True
+            provider.record_error(time.perf_counter() - t0, e)
+            print(f"Error streaming roadmap from {provider.name}: {e}")
+            if parser.title is None and not parser.phases:
+                continue
+        
+        roadmap, complete = parser.result(goal)
+        if roadmap is None:
+            if not failed:
+                provider.record(time.perf_counter() - t0, "invalid")
+            if parser.title is None:
+                # Nothing was sent, so the next provider can still start over
+                continue
+            # Its title already went out; another provider would send a second one
+            break
+        if not failed:
+            if complete:
+                provider.record(time.perf_counter() - t0)
+                cache_roadmap(goal, roadmap)
+            else:
+                # Ended early without an error: sent as is, not cached as a finished roadmap
+                provider.record(time.perf_counter() - t0, "invalid")
+        yield {"event": "done", "data": {"roadmap": roadmap, "cached": False, "fallback": False}}
+        return
+
+    yield {"event": "done", "data": {"roadmap": fallback_roadmap(goal), "cached": False, "fallback": True}}
@@ -0,0 +1,244 @@
+"""
+Speculative roadmap prefetch
+
+Once ranking_node has picked the top 3 careers, the frontend's next move
+is almost always a roadmap request for one of them, which used to start
+a cold generate_roadmap call. ranking_node now hands the top 3 to
+prefetch_roadmaps(), which generates their roadmaps in the background
+(fire-and-forget, never blocking the turn) straight into the roadmap
+cache:
+
+- careers already cached (e.g. by the warm-up) are skipped
+- at most ROADMAP_PREFETCH_CONCURRENCY generations run at once; beyond
+  MAX_QUEUED_PER_WORKER waiting goals, new ones are dropped
+- a request that arrives while its prefetch is still running in this
+  process waits for it instead of generating a second copy
+
+Every prefetched roadmap leaves a marker in the shared cache. A roadmap
+request that finds one claims it (a hit); a marker still unclaimed
+ROADMAP_PREFETCH_WINDOW seconds after the prefetch is a wasted prefetch.
+ROADMAP_PREFETCH=false turns it off.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .cache import get_cache
+from .config import load_env
+
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_WINDOW = 1800
+
+# Goals waiting for a generation slot per worker thread before new ones are dropped
+MAX_QUEUED_PER_WORKER = 4
+
+MARKER_NAMESPACE = "roadmap_prefetch"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_in_flight: Dict[str, Future] = {}
+_pending = deque()  # (marker key, claim deadline) for prefetches not yet swept
+_lock = threading.Lock()
+_stats = {
+    "offered": 0, "already_cached": 0, "dropped": 0, "started": 0, "generated": 0,
+    "failed": 0, "hits": 0, "joined": 0, "wasted": 0,
+}
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+def prefetch_enabled() -> bool:
+    """ROADMAP_PREFETCH (default on)"""
+    load_env()
+    return os.getenv("ROADMAP_PREFETCH", "true").lower() in ("1", "true", "yes", "on")
+
+
+def prefetch_concurrency() -> int:
+    """Prefetch generations at once (ROADMAP_PREFETCH_CONCURRENCY)"""
+    load_env()
+    return max(1, int(os.getenv("ROADMAP_PREFETCH_CONCURRENCY", DEFAULT_CONCURRENCY)))
+
+
+def prefetch_window() -> float:
+    """Seconds a prefetched roadmap may wait for its request before it counts as wasted"""
+    load_env()
+    return float(os.getenv("ROADMAP_PREFETCH_WINDOW", DEFAULT_WINDOW))
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _stats[name] += n
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=prefetch_concurrency(),
+                                               thread_name_prefix="roadmap-prefetch")
+    return _executor
+
+
+# ============================================================================
+# PREFETCH
+# ============================================================================
+
+def _generate(future: Future, goal: str, key: str) -> None:
+    """Worker: generate one roadmap into the cache and leave a marker for its request"""
+    from .roadmap import _roadmap_cache_ttl, build_roadmap
+
+    roadmap = None
+    try:
+        # Speculative: yields the provider window to live requests, like the warm-up
+        roadmap = build_roadmap(goal, priority="background")
+        now = time.time()
+        # Marker before leaving _in_flight, so a request can't slip between the two unclaimed
+        get_cache().set(MARKER_NAMESPACE, key, {"goal": goal, "at": now}, ttl=_roadmap_cache_ttl())
+        with _lock:
+            _stats["generated"] += 1
+            _pending.append((key, now + prefetch_window()))
+    except Exception as e:
+        print(f"[PREFETCH] {goal!r} failed: {e}")
+        _count("failed")
+    finally:
+        future.set_result(roadmap)
+        with _lock:
+            _in_flight.pop(key, None)
+
+
+def prefetch_roadmaps(goals: List[str]) -> int:
+    """
+    Start background generation of the roadmaps for `goals` (returns at once)
+
+    Args:
+        goals: Career names, e.g. the paths of top_recommendations
+
+    Returns:
+        How many generations were started
+    """
+    from .roadmap import ROADMAP_CACHE_NAMESPACE, _roadmap_cache_enabled, roadmap_cache_key, roadmap_version
+
+    if not goals or not prefetch_enabled() or not _roadmap_cache_enabled():
+        return 0
+    sweep_prefetches()
+    version = roadmap_version()
+    keys = {goal: roadmap_cache_key(goal, version) for goal in goals}
+    cached = get_cache().expiries(ROADMAP_CACHE_NAMESPACE, list(keys.values()))
+
+    started = 0
+    limit = prefetch_concurrency() * (1 + MAX_QUEUED_PER_WORKER)
+    for goal, key in keys.items():
+        with _lock:
+            _stats["offered"] += 1
+            if key in cached:
+                _stats["already_cached"] += 1
+                continue
+            if key in _in_flight:
+                continue
+            if len(_in_flight) >= limit:
+                _stats["dropped"] += 1
+                continue
+            _stats["started"] += 1
+            # Registered before submit so a request arriving right away joins it
+            future = Future()
+            _in_flight[key] = future
+        try:
+            _pool().submit(_generate, future, goal, key)
+            started += 1
+        except RuntimeError:
+            # Executor shut down (process exiting)
+            with _lock:
+                _in_flight.pop(key, None)
+    return started
+
+
+# ============================================================================
+# REQUESTS
+# ============================================================================
+
+def claim_prefetch(goal: str) -> bool:
+    """Called when a roadmap request is served from the cache; counts a hit if it was prefetched"""
+    from .roadmap import roadmap_cache_key
+
+    if get_cache().delete(MARKER_NAMESPACE, roadmap_cache_key(goal)):
+        _count("hits")
+        return True
+    return False
+
+
+def join_prefetch(goal: str, timeout: Optional[float] = None) -> Optional[Dict]:
+    """
+    Wait for this process's in-flight prefetch of `goal`, if there is one
+
+    Returns:
+        The prefetched roadmap (claimed as a hit), or None when nothing is
+        in flight or it failed
+    """
+    from .roadmap import roadmap_cache_key
+
+    with _lock:
+        future = _in_flight.get(roadmap_cache_key(goal))
+    if future is None:
+        return None
+    try:
+        roadmap = future.result(timeout=timeout)
+    except TimeoutError:
+        return None
+    if roadmap is not None and claim_prefetch(goal):
+        _count("joined")
+    return roadmap
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+def sweep_prefetches() -> int:
+    """Count prefetches whose window passed unclaimed as wasted; returns how many were found"""
+    now = time.time()
+    expired = []
+    with _lock:
+        while _pending and _pending[0][1] <= now:
+            expired.append(_pending.popleft()[0])
+    wasted = sum(1 for key in expired if get_cache().delete(MARKER_NAMESPACE, key))
+    if wasted:
+        _count("wasted", wasted)
+    return wasted
+
+
+def prefetch_stats() -> Dict:
+    """
+    Prefetch counters for this process
+
+    hit_rate is hits / (hits + wasted) over prefetches whose outcome is
+    known; a hit is counted by the worker that served the request, a
+    waste by the worker that prefetched, so sum across workers.
+    """
+    sweep_prefetches()
+    with _lock:
+        decided = _stats["hits"] + _stats["wasted"]
+        return {
+            **_stats,
+            "in_flight": len(_in_flight),
+            "in_window": len(_pending),
+            "hit_rate": round(_stats["hits"] / decided, 3) if decided else None,
+        }
+
+
+__all__ = [
+    'claim_prefetch',
+    'join_prefetch',
+    'prefetch_concurrency',
+    'prefetch_enabled',
+    'prefetch_roadmaps',
+    'prefetch_stats',
+    'prefetch_window',
+    'sweep_prefetches',
+]
@@ -0,0 +1,371 @@
+"""
+Roadmap warm-up
+
+Roadmap goals are mostly catalog career names (the frontend links every
+recommendation to its roadmap), but roadmaps were only generated on
+demand, in the request path. The warm-up job generates and caches a
+roadmap for every career in the catalog ahead of time, so those clicks
+are cache hits:
+
+- careers whose roadmap is already cached are skipped; the cache key
+  includes roadmap_version(), so a prompt or model change makes every
+  entry missing and the next run regenerates them
+- entries that would expire before the next scheduled run are refreshed
+- with ROADMAP_WARMUP_VARIANTS=true the career's other names (" / "
+  parts, aliases, see name_resolver.name_variants) get a copy of its
+  roadmap - no extra LLM calls
+- at most ROADMAP_WARMUP_CONCURRENCY generations run at once, admitted
+  at "background" priority so user requests always go first
+- only one worker process runs it at a time (a lease in the shared cache)
+
+ROADMAP_WARMUP=true runs it on server startup, then every
+ROADMAP_WARMUP_INTERVAL seconds (0 = startup only).
+
+Usage:
+    python -m app.roadmap_warmup run [--variants] [--concurrency 4] [--force]
+    python -m app.roadmap_warmup coverage [--variants]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .cache import get_cache
+from .config import load_env
+
+
+DEFAULT_CONCURRENCY = 4
+
+# Stop a run after this many generations in a row have failed (provider down, no key)
+MAX_CONSECUTIVE_FAILURES = 10
+
+# Lease held in the shared cache by the worker that is running the warm-up
+LEASE_NAMESPACE = "roadmap_warmup"
+LEASE_KEY = "lease"
+LEASE_TTL = 600
+
+_lock = threading.Lock()
+_running = False
+_scheduler: Optional[threading.Thread] = None
+_stop = threading.Event()
+_stats = {"runs": 0, "generated": 0, "copied": 0, "failed": 0, "last_run": None}
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+def _flag(name: str, default: str = "false") -> bool:
+    load_env()
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
+def warmup_enabled() -> bool:
+    """ROADMAP_WARMUP: run on server startup (default off)"""
+    return _flag("ROADMAP_WARMUP")
+
+
+def warmup_interval() -> float:
+    """Seconds between scheduled runs (ROADMAP_WARMUP_INTERVAL, 0 = startup only)"""
+    load_env()
+    return float(os.getenv("ROADMAP_WARMUP_INTERVAL", "0"))
+
+
+def warmup_concurrency() -> int:
+    """Roadmaps generated at once (ROADMAP_WARMUP_CONCURRENCY)"""
+    load_env()
+    return max(1, int(os.getenv("ROADMAP_WARMUP_CONCURRENCY", DEFAULT_CONCURRENCY)))
+
+
+def warmup_variants() -> bool:
+    """ROADMAP_WARMUP_VARIANTS: also cache under each career's other names"""
+    return _flag("ROADMAP_WARMUP_VARIANTS")
+
+
+# ============================================================================
+# GOALS
+# ============================================================================
+
+def catalog_goals(variants: bool = False) -> Dict[str, List[str]]:
+    """
+    {career name: [variant goals]} for every catalog career, in catalog order
+
+    Variants are only listed when `variants` is set, and only those with
+    a cache key of their own (not just a case/spacing change of the name).
+    """
+    from .name_resolver import get_name_resolver
+
+    resolver = get_name_resolver()
+    goals: Dict[str, List[str]] = {}
+    for key, name in resolver.names.items():
+        own = " ".join(name.lower().split())
+        goals[name] = [v for v in resolver.variants.get(key, []) if v != own] if variants else []
+    return goals
+
+
+def _plan(goals: Dict[str, List[str]], version: str, refresh_before: float, force: bool) -> List[Dict]:
+    """Work items {"goal", "generate", "copy_to"} for the goals that need any"""
+    from .roadmap import ROADMAP_CACHE_NAMESPACE, roadmap_cache_key
+
+    keys = {goal: roadmap_cache_key(goal, version) for name, variants in goals.items()
+            for goal in [name, *variants]}
+    live = get_cache().expiries(ROADMAP_CACHE_NAMESPACE, list(keys.values()))
+
+    def due(goal: str) -> bool:
+        if keys[goal] not in live:
+            return True
+        expires = live[keys[goal]]
+        return expires is not None and expires < refresh_before
+
+    plan = []
+    for name, variants in goals.items():
+        generate = force or due(name)
+        copy_to = variants if generate else [v for v in variants if due(v)]
+        if generate or copy_to:
+            plan.append({"goal": name, "generate": generate, "copy_to": copy_to})
+    return plan
+
+
+# ============================================================================
+# RUN
+# ============================================================================
+
+def _acquire_lease() -> Optional[Dict]:
+    """The owner record if this worker got the lease, else None"""
+    owner = {"pid": os.getpid(), "token": uuid.uuid4().hex}
+    if get_cache().add(LEASE_NAMESPACE, LEASE_KEY, owner, ttl=LEASE_TTL):
+        return owner
+    return None
+
+
+def _renew_lease(owner: Dict) -> bool:
+    """False if the lease expired and another worker took it over"""
+    return get_cache().renew(LEASE_NAMESPACE, LEASE_KEY, owner, ttl=LEASE_TTL)
+
+
+def _release_lease(owner: Dict) -> None:
+    get_cache().delete_if(LEASE_NAMESPACE, LEASE_KEY, owner)
+
+
+def run_warmup(variants: Optional[bool] = None, concurrency: Optional[int] = None,
+               force: bool = False) -> Dict:
+    """
+    Generate and cache roadmaps for every catalog career that needs one
+
+    Args:
+        variants: Also cache under name variants (default ROADMAP_WARMUP_VARIANTS)
+        concurrency: Generations at once (default ROADMAP_WARMUP_CONCURRENCY)
+        force: Regenerate careers that are already cached
+
+    Returns:
+        Run report: generated / copied / failed counts, duration and the
+        coverage afterwards; {"skipped": reason} when it didn't run
+    """
+    global _running
+    from .roadmap import _roadmap_cache_enabled, build_roadmap, cache_roadmap, get_cached_roadmap, roadmap_version
+
+    if not _roadmap_cache_enabled():
+        return {"skipped": "ROADMAP_CACHE is off"}
+    with _lock:
+        if _running:
+            return {"skipped": "already running in this process"}
+        _running = True
+    try:
+        lease = _acquire_lease()
+        if lease is None:
+            return {"skipped": "running in another worker"}
+        try:
+            variants = warmup_variants() if variants is None else variants
+            concurrency = concurrency or warmup_concurrency()
+            t0 = time.perf_counter()
+            version = roadmap_version()
+            goals = catalog_goals(variants)
+            plan = _plan(goals, version, time.time() + warmup_interval(), force)
+            print(f"[WARMUP] {len(plan)} of {len(goals)} careers need roadmaps (version {version})")
+
+            report = {"version": version, "careers": len(goals), "planned": len(plan),
+                      "generated": 0, "copied": 0, "failed": 0, "aborted": False}
+            counts_lock = threading.Lock()
+            state = {"failures_in_a_row": 0, "renewed": time.monotonic()}
+            abort = threading.Event()
+
+            def warm(item: Dict) -> None:
+                if abort.is_set() or _stop.is_set():
+                    return
+                goal = item["goal"]
+                try:
+                    if item["generate"]:
+                        roadmap = build_roadmap(goal, priority="background")
+                    else:
+                        roadmap = get_cached_roadmap(goal)
+                    if roadmap:
+                        for variant in item["copy_to"]:
+                            cache_roadmap(variant, roadmap)
+                except Exception as e:
+                    print(f"[WARMUP] {goal!r} failed: {e}")
+                    with counts_lock:
+                        report["failed"] += 1
+                        state["failures_in_a_row"] += 1
+                        if state["failures_in_a_row"] >= MAX_CONSECUTIVE_FAILURES and not abort.is_set():
+                            print(f"[WARMUP] {MAX_CONSECUTIVE_FAILURES} failures in a row, stopping")
+                            report["aborted"] = True
+                            abort.set()
+                    return
+                with counts_lock:
+                    report["generated"] += int(item["generate"])
+                    report["copied"] += len(item["copy_to"]) if roadmap else 0
+                    state["failures_in_a_row"] = 0
+                    if time.monotonic() - state["renewed"] > LEASE_TTL / 3:
+                        state["renewed"] = time.monotonic()
+                        if not _renew_lease(lease) and not abort.is_set():
+                            print("[WARMUP] Lease taken over by another worker, stopping")
+                            report["aborted"] = True
+                            abort.set()
+
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="roadmap-warmup") as pool:
+                list(pool.map(warm, plan))
+
+            report["duration_s"] = round(time.perf_counter() - t0, 2)
+            report["coverage"] = roadmap_coverage(variants)
+            print(f"[WARMUP] Done in {report['duration_s']}s: {report['generated']} generated, "
+                  f"{report['failed']} failed, coverage {report['coverage']['coverage']:.0%}")
+        finally:
+            _release_lease(lease)
+    finally:
+        with _lock:
+            _running = False
+
+    with _lock:
+        _stats["runs"] += 1
+        for name in ("generated", "copied", "failed"):
+            _stats[name] += report[name]
+        _stats["last_run"] = {**report, "finished_at": time.time()}
+    return report
+
+
+# ============================================================================
+# COVERAGE
+# ============================================================================
+
+def roadmap_coverage(variants: Optional[bool] = None) -> Dict:
+    """
+    Share of catalog careers (and variants) with a live roadmap for the current version
+
+    Returns:
+        {"version", "careers", "cached", "coverage", "missing" (first 10 names),
+        plus "variants" / "variants_cached" when variants are counted}
+    """
+    from .roadmap import ROADMAP_CACHE_NAMESPACE, roadmap_cache_key, roadmap_version
+
+    variants = warmup_variants() if variants is None else variants
+    version = roadmap_version()
+    goals = catalog_goals(variants)
+    names = list(goals)
+    extra = [v for vs in goals.values() for v in vs]
+    live = get_cache().expiries(
+        ROADMAP_CACHE_NAMESPACE, [roadmap_cache_key(goal, version) for goal in names + extra]
+    )
+    missing = [name for name in names if roadmap_cache_key(name, version) not in live]
+    report = {
+        "version": version,
+        "careers": len(names),
+        "cached": len(names) - len(missing),
+        "coverage": round((len(names) - len(missing)) / len(names), 3) if names else 1.0,
+        "missing": missing[:10],
+    }
+    if variants:
+        report["variants"] = len(extra)
+        report["variants_cached"] = sum(roadmap_cache_key(v, version) in live for v in extra)
+    return report
+
+
+def warmup_stats() -> Dict:
+    """Warm-up totals for this process and the last run's report (includes coverage)"""
+    with _lock:
+        return {**_stats, "running": _running, "scheduled": _scheduler is not None}
+
+
+# ============================================================================
+# SCHEDULE
+# ============================================================================
+
+def _schedule_loop() -> None:
+    while not _stop.is_set():
+        try:
+            run_warmup()
+        except Exception as e:
+            print(f"[WARMUP] Run failed: {e}")
+        interval = warmup_interval()
+        if interval <= 0 or _stop.wait(interval):
+            break
+
+
+def start_warmup() -> bool:
+    """
+    Start the background warm-up if ROADMAP_WARMUP is on (at most one per process)
+
+    Returns:
+        Whether a scheduler thread was started
+    """
+    global _scheduler
+    if not warmup_enabled():
+        return False
+    with _lock:
+        if _scheduler is not None and _scheduler.is_alive():
+            return False
+        _stop.clear()
+        _scheduler = threading.Thread(target=_schedule_loop, name="roadmap-warmup", daemon=True)
+        _scheduler.start()
+    return True
+
+
+def stop_warmup() -> None:
+    """Stop scheduling runs; a run in progress finishes the generations already started"""
+    _stop.set()
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-generate roadmaps for the career catalog")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Generate every missing roadmap now")
+    run.add_argument("--variants", action="store_true", default=None, help="Also cache under name variants")
+    run.add_argument("--concurrency", type=int, default=None)
+    run.add_argument("--force", action="store_true", help="Regenerate roadmaps that are already cached")
+    coverage = sub.add_parser("coverage", help="Report how much of the catalog is cached")
+    coverage.add_argument("--variants", action="store_true", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run_warmup(args.variants, args.concurrency, args.force)
+    else:
+        report = roadmap_coverage(args.variants)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+__all__ = [
+    'catalog_goals',
+    'roadmap_coverage',
+    'run_warmup',
+    'start_warmup',
+    'stop_warmup',
+    'warmup_concurrency',
+    'warmup_enabled',
+    'warmup_interval',
+    'warmup_stats',
+    'warmup_variants',
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,544 @@
+"""
+Memory-bounded session checkpointer
+
+MemorySaver keeps every conversation thread in RAM forever. For demo and
+kiosk deployments that see many short-lived visitors, BoundedMemorySaver
+caps the resident size: once the serialized checkpoints, writes and
+channel blobs of all resident threads exceed the byte budget, the least
+recently used threads are moved to a local SQLite spill file. The next
+access to a spilled thread (get_state, a new turn) loads it back
+transparently.
+
+The spill file belongs to one process and is deleted on close(); it
+relieves memory pressure, it is not persistence.
+
+Both keep sessions inside one process, so they only work with a single
+api_server worker. With several workers a thread's turns land on
+different processes; SharedSessionSaver stores checkpoints in the
+shared SQLite cache file instead, so every worker sees the same
+sessions. SESSION_STORE picks one: "memory" (default) or "shared"
+(set automatically by `api_server.py --workers N`).
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from langgraph.checkpoint.base import WRITES_IDX_MAP, CheckpointTuple, get_checkpoint_id, get_checkpoint_metadata
+from langgraph.checkpoint.memory import MemorySaver
+
+from .config import load_env
+
+
+DEFAULT_BUDGET_MB = 256
+
+
+def _size(value) -> int:
+    """Bytes held by one stored entry (serialized payloads only)"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sum(_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_size(item) for item in value.values())
+    return 0
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    MemorySaver with a byte budget and LRU spill-to-disk
+
+    Args:
+        max_bytes: Resident budget for serialized thread data
+        spill_path: SQLite file for evicted threads
+    """
+
+    def __init__(self, max_bytes: int, spill_path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self._lock = threading.RLock()
+        self._resident: "OrderedDict[str, int]" = OrderedDict()  # thread_id -> bytes, LRU first
+        self._keys: Dict[str, Dict[str, set]] = {}                # thread_id -> writes/blobs keys
+        self._resident_bytes = 0
+        self._spilled: Dict[str, int] = {}                         # thread_id -> bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = {"evictions": 0, "restores": 0}
+
+    # ------------------------------------------------------------------
+    # Spill file
+    # ------------------------------------------------------------------
+
+    def _spill_db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.spill_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=OFF")
+            with self._conn:
+                self._conn.execute("DROP TABLE IF EXISTS threads")
+                self._conn.execute(
+                    "CREATE TABLE threads (thread_id TEXT PRIMARY KEY, data BLOB NOT NULL, "
+                    "bytes INTEGER NOT NULL, evicted_at REAL NOT NULL)"
+                )
+        return self._conn
+
+    def close(self) -> None:
+        """Close and delete the spill file"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                for suffix in ("", "-wal", "-shm"):
+                    try:
+                        os.remove(self.spill_path + suffix)
+                    except OSError:
+                        pass
+            self._spilled.clear()
+
+    # ------------------------------------------------------------------
+    # Accounting
+    # ------------------------------------------------------------------
+
+    def _thread_keys(self, thread_id: str) -> Dict[str, set]:
+        keys = self._keys.get(thread_id)
+        if keys is None:
+            keys = self._keys[thread_id] = {"writes": set(), "blobs": set()}
+        return keys
+
+    def _touch(self, thread_id: str) -> None:
+        """Mark `thread_id` most recently used, loading it back if it was spilled"""
+        if thread_id in self._spilled:
+            self._restore(thread_id)
+        if thread_id in self._resident:
+            self._resident.move_to_end(thread_id)
+
+    def _grow(self, thread_id: str, delta: int) -> None:
+        self._resident[thread_id] = self._resident.get(thread_id, 0) + delta
+        self._resident.move_to_end(thread_id)
+        self._resident_bytes += delta
+
+    def _enforce_budget(self, keep: str) -> None:
+        """Spill least recently used threads until under budget (never `keep`)"""
+        while self._resident_bytes > self.max_bytes:
+            victim = next((t for t in self._resident if t != keep), None)
+            if victim is None:
+                break
+            self._evict(victim)
+
+    # ------------------------------------------------------------------
+    # Eviction / restore
+    # ------------------------------------------------------------------
+
+    def _evict(self, thread_id: str) -> None:
+        keys = self._keys.pop(thread_id, {"writes": set(), "blobs": set()})
+        data = {
+            "storage": {ns: dict(checkpoints) for ns, checkpoints in self.storage.pop(thread_id, {}).items()},
+            "writes": {key: self.writes.pop(key) for key in keys["writes"] if key in self.writes},
+            "blobs": {key: self.blobs.pop(key) for key in keys["blobs"] if key in self.blobs},
+        }
+        size = self._resident.pop(thread_id, 0)
+        self._resident_bytes -= size
+        conn = self._spill_db()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO threads (thread_id, data, bytes, evicted_at) VALUES (?, ?, ?, ?)",
+                (thread_id, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), size, time.time()),
+            )
+        self._spilled[thread_id] = size
+        self._stats["evictions"] += 1
+
+    def _restore(self, thread_id: str) -> None:
+        conn = self._spill_db()
+        row = conn.execute("SELECT data, bytes FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()
+        with conn:
+            conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+        self._spilled.pop(thread_id, None)
+        if row is None:
+            return
+        data = pickle.loads(row[0])
+        for ns, checkpoints in data["storage"].items():
+            self.storage[thread_id][ns].update(checkpoints)
+        self.writes.update(data["writes"])
+        self.blobs.update(data["blobs"])
+        keys = self._thread_keys(thread_id)
+        keys["writes"].update(data["writes"])
+        keys["blobs"].update(data["blobs"])
+        self._grow(thread_id, row[1])
+        self._stats["restores"] += 1
+        self._enforce_budget(keep=thread_id)
+
+    def latest_checkpoint_id(self, thread_id: str, checkpoint_ns: str = "") -> Optional[str]:
+        """Newest checkpoint id of a resident thread, without loading it (None if spilled or unknown)"""
+        with self._lock:
+            checkpoints = self.storage.get(thread_id, {}).get(checkpoint_ns)
+            return max(checkpoints) if checkpoints else None
+
+    # ------------------------------------------------------------------
+    # MemorySaver overrides
+    # ------------------------------------------------------------------
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self._touch(thread_id)
+            result = super().get_tuple(config)
+            # MemorySaver's lookups leave empty defaultdict entries behind;
+            # drop them so untracked keys don't pile up
+            if result is not None:
+                key = (thread_id, result.config["configurable"]["checkpoint_ns"],
+                       result.config["configurable"]["checkpoint_id"])
+                if not self.writes.get(key):
+                    self.writes.pop(key, None)
+            elif thread_id not in self._resident and not any(self.storage.get(thread_id, {}).values()):
+                self.storage.pop(thread_id, None)
+            return result
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        # Only resident threads are listed when no thread_id is given
+        with self._lock:
+            if config:
+                self._touch(config["configurable"]["thread_id"])
+            items = list(super().list(config, filter=filter, before=before, limit=limit))
+        yield from items
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            self._touch(thread_id)
+            checkpoints = self.storage[thread_id][checkpoint_ns]
+            blob_keys = [(thread_id, checkpoint_ns, k, v) for k, v in new_versions.items()]
+            before = _size(checkpoints.get(checkpoint["id"])) + sum(_size(self.blobs.get(key)) for key in blob_keys)
+            result = super().put(config, checkpoint, metadata, new_versions)
+            after = _size(checkpoints.get(checkpoint["id"])) + sum(_size(self.blobs.get(key)) for key in blob_keys)
+            self._thread_keys(thread_id)["blobs"].update(blob_keys)
+            self._grow(thread_id, after - before)
+            self._enforce_budget(keep=thread_id)
+            return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        outer_key = (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+        with self._lock:
+            self._touch(thread_id)
+            before = _size(self.writes.get(outer_key))
+            super().put_writes(config, writes, task_id, task_path)
+            self._thread_keys(thread_id)["writes"].add(outer_key)
+            self._grow(thread_id, _size(self.writes.get(outer_key)) - before)
+            self._enforce_budget(keep=thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            keys = self._keys.pop(thread_id, None)
+            if keys is None:
+                super().delete_thread(thread_id)
+            else:
+                # Same as MemorySaver.delete_thread without scanning every key
+                self.storage.pop(thread_id, None)
+                for key in keys["writes"]:
+                    self.writes.pop(key, None)
+                for key in keys["blobs"]:
+                    self.blobs.pop(key, None)
+            self._resident_bytes -= self._resident.pop(thread_id, 0)
+            if self._spilled.pop(thread_id, None) is not None:
+                conn = self._spill_db()
+                with conn:
+                    conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """Resident size vs budget, spilled threads, eviction/restore counts"""
+        with self._lock:
+            return {
+                "budget_bytes": self.max_bytes,
+                "resident_bytes": self._resident_bytes,
+                "resident_threads": len(self._resident),
+                "spilled_threads": len(self._spilled),
+                "spilled_bytes": sum(self._spilled.values()),
+                **self._stats,
+            }
+
+
+class SharedSessionSaver(MemorySaver):
+    """
+    Checkpointer whose checkpoints, channel blobs and writes live in SQLite
+
+    Every process opening the same file sees the same threads, so any
+    api_server worker can serve any turn. MemorySaver's async methods
+    call the sync ones, which are overridden here; its in-memory dicts
+    stay empty.
+
+    Args:
+        path: SQLite file (the shared cache file by default)
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._init_schema()
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_checkpoints (thread_id TEXT NOT NULL, "
+                "checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, parent_id TEXT, "
+                "type TEXT, checkpoint BLOB, metadata_type TEXT, metadata BLOB, "
+                "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_blobs (thread_id TEXT NOT NULL, "
+                "checkpoint_ns TEXT NOT NULL, channel TEXT NOT NULL, version TEXT NOT NULL, "
+                "type TEXT, data BLOB, PRIMARY KEY (thread_id, checkpoint_ns, channel, version))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_writes (thread_id TEXT NOT NULL, "
+                "checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL, task_id TEXT NOT NULL, "
+                "idx INTEGER NOT NULL, channel TEXT, type TEXT, data BLOB, task_path TEXT, "
+                "PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))"
+            )
+
+    def close(self) -> None:
+        """Close this process's connections (the file and its sessions stay)"""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _load_channel_values(self, conn, thread_id: str, checkpoint_ns: str, versions: Dict) -> Dict:
+        if not versions:
+            return {}
+        pairs = list(versions.items())
+        rows = conn.execute(
+            "SELECT channel, type, data FROM session_blobs WHERE thread_id = ? AND checkpoint_ns = ? AND ("
+            + " OR ".join("(channel = ? AND version = ?)" for _ in pairs) + ")",
+            (thread_id, checkpoint_ns, *[value for channel, version in pairs for value in (channel, str(version))]),
+        ).fetchall()
+        return {channel: self.serde.loads_typed((kind, data)) for channel, kind, data in rows if kind != "empty"}
+
+    def _tuple(self, conn, row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, kind, checkpoint, metadata_kind, metadata = row
+        checkpoint_ = self.serde.loads_typed((kind, checkpoint))
+        writes = conn.execute(
+            "SELECT task_id, channel, type, data FROM session_writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY rowid",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint={
+                **checkpoint_,
+                "channel_values": self._load_channel_values(
+                    conn, thread_id, checkpoint_ns, checkpoint_["channel_versions"]
+                ),
+            },
+            metadata=self.serde.loads_typed((metadata_kind, metadata)),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((k, v))) for task_id, channel, k, v in writes],
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+        )
+
+    # ------------------------------------------------------------------
+    # MemorySaver overrides
+    # ------------------------------------------------------------------
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        conn = self._connect()
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, type, checkpoint, metadata_type, "
+                 "metadata FROM session_checkpoints WHERE thread_id = ? AND checkpoint_ns = ?")
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            row = conn.execute(query + " AND checkpoint_id = ?", (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+        else:
+            row = conn.execute(query + " ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, checkpoint_ns)).fetchone()
+        if row is None:
+            return None
+        result = self._tuple(conn, row)
+        if checkpoint_id:
+            # Like MemorySaver: echo the caller's config when it named a checkpoint
+            result = result._replace(config=config)
+        return result
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, type, checkpoint, metadata_type, "
+            "metadata FROM session_checkpoints" + (" WHERE " + " AND ".join(clauses) if clauses else "")
+            + " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC",
+            params,
+        ).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((row[6], row[7]))
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            yield self._tuple(conn, row)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        c = checkpoint.copy()
+        values = c.pop("channel_values")
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version),
+             *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")))
+            for channel, version in new_versions.items()
+        ]
+        kind, data = self.serde.dumps_typed(c)
+        metadata_kind, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO session_blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            conn.execute(
+                "INSERT OR REPLACE INTO session_checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 kind, data, metadata_kind, metadata_data),
+            )
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        conn = self._connect()
+        with conn:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                # Regular writes are kept from the first attempt; special ones (errors, interrupts) overwrite
+                verb = "INSERT OR IGNORE" if idx >= 0 else "INSERT OR REPLACE"
+                conn.execute(
+                    f"{verb} INTO session_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel,
+                     *self.serde.dumps_typed(value), task_path),
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        conn = self._connect()
+        with conn:
+            for table in ("session_checkpoints", "session_blobs", "session_writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def latest_checkpoint_id(self, thread_id: str, checkpoint_ns: str = "") -> Optional[str]:
+        """Newest checkpoint id of a thread, without loading it (None if unknown)"""
+        row = self._connect().execute(
+            "SELECT MAX(checkpoint_id) FROM session_checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ).fetchone()
+        return row[0] if row else None
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """Threads and checkpoints in the shared file"""
+        threads, checkpoints = self._connect().execute(
+            "SELECT COUNT(DISTINCT thread_id), COUNT(*) FROM session_checkpoints"
+        ).fetchone()
+        return {"store": "shared", "path": self.path, "threads": threads, "checkpoints": checkpoints}
+
+
+def session_store_mode() -> str:
+    """SESSION_STORE: "memory" (this process only) or "shared" (all workers)"""
+    load_env()
+    mode = os.getenv("SESSION_STORE", "memory").lower()
+    if mode not in ("memory", "shared"):
+        print(f"[SESSION] Unknown SESSION_STORE {mode!r}, using memory")
+        return "memory"
+    return mode
+
+
+def create_session_checkpointer():
+    """
+    Checkpointer for in-process sessions
+
+    SESSION_STORE=shared: SharedSessionSaver in the shared cache file
+    (CAREER_CACHE_PATH), required with more than one worker. Otherwise
+    BoundedMemorySaver sized by SESSION_MEMORY_BUDGET_MB (default 256,
+    0 = unbounded plain MemorySaver); each process spills to its own
+    file in SESSION_SPILL_DIR (default .cache).
+    """
+    from .cache import DEFAULT_CACHE_PATH
+
+    if session_store_mode() == "shared":
+        return SharedSessionSaver(os.getenv("CAREER_CACHE_PATH", DEFAULT_CACHE_PATH))
+    budget_mb = float(os.getenv("SESSION_MEMORY_BUDGET_MB", DEFAULT_BUDGET_MB))
+    if budget_mb <= 0:
+        return MemorySaver()
+    spill_dir = os.getenv("SESSION_SPILL_DIR", ".cache")
+    spill_path = os.path.join(spill_dir, f"session_spill-{os.getpid()}.sqlite3")
+    return BoundedMemorySaver(int(budget_mb * 1024 * 1024), spill_path)
+
+
+__all__ = [
+    'BoundedMemorySaver',
+    'SharedSessionSaver',
+    'create_session_checkpointer',
+    'session_store_mode',
+]
@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the career coach
+
+Everything here runs without network access or API keys.
+"""
@@ -0,0 +1,144 @@
+"""
+Skill / work-style bitset benchmark
+
+Compares the list scans get_career_paths_by_skill() used to do against
+the packed bitsets in app/bitsets.py, on synthetic catalogs of several
+sizes (see catalog_bench.synthetic_careers):
+
+- any:     careers with any of 3 skill terms
+- all:     careers with all of 2 skill terms
+- jaccard: similarity of every career to a user profile
+
+Results are checked against the scan before timing.
+
+Usage:
+    python -m benchmarks.bitset_bench
+    python -m benchmarks.bitset_bench --sizes 1000 10000 100000 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.catalog_bench import synthetic_careers
+
+ANY_TERMS = ["audio", "skill 12", "writing"]
+ALL_TERMS = ["music", "skill 3"]
+PROFILE = {
+    "interests": ["music", "making beats", "storytelling"],
+    "skills": ["audio editing", "writing", "skill 42"],
+    "work_style": ["independent", "creative", "style 7"],
+}
+
+
+# ============================================================================
+# BASELINE (the previous substring scans)
+# ============================================================================
+
+def scan_any(careers: Dict[str, Dict], terms: List[str]) -> List[str]:
+    terms = [t.lower() for t in terms]
+    return [key for key, info in careers.items()
+            if any(t in s.lower() for s in info.get("skills", []) for t in terms)]
+
+
+def scan_all(careers: Dict[str, Dict], terms: List[str]) -> List[str]:
+    terms = [t.lower() for t in terms]
+    return [key for key, info in careers.items()
+            if all(any(t in s.lower() for s in info.get("skills", [])) for t in terms)]
+
+
+def scan_jaccard(careers: Dict[str, Dict], bitsets) -> List[float]:
+    # Same profile-to-vocabulary mapping, set arithmetic per career
+    profile = {}
+    for field, sources in (("skills", ("skills", "interests")), ("work_style", ("work_style",))):
+        mask = bitsets.profile_mask(field, [i for s in sources for i in PROFILE.get(s, [])])
+        profile[field] = {entry for i, entry in enumerate(bitsets.vocabularies[field])
+                          if int(mask[i // 64]) >> (i % 64) & 1}
+    scores = []
+    for info in careers.values():
+        inter = union = 0
+        for field in ("skills", "work_style"):
+            entries = set(info.get(field, []))
+            inter += len(entries & profile[field])
+            union += len(entries | profile[field])
+        scores.append(inter / union if union else 0.0)
+    return scores
+
+
+# ============================================================================
+# RUN
+# ============================================================================
+
+def timed(fn: Callable, repeat: int) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def run(sizes: List[int], repeat: int) -> List[Dict]:
+    import numpy as np
+    from app.bitsets import CareerBitsets
+
+    rows = []
+    for size in sizes:
+        careers = synthetic_careers(size)
+        t0 = time.perf_counter()
+        bitsets = CareerBitsets.build(careers)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        assert bitsets.select(bitsets.match_any("skills", ANY_TERMS)) == scan_any(careers, ANY_TERMS)
+        assert bitsets.select(bitsets.match_all("skills", ALL_TERMS)) == scan_all(careers, ALL_TERMS)
+        assert np.allclose(bitsets.jaccard(PROFILE), scan_jaccard(careers, bitsets), atol=1e-6)
+
+        rows.append({
+            "size": size,
+            "build_ms": round(build_ms, 1),
+            "vocabulary": {field: len(entries) for field, entries in bitsets.vocabularies.items()},
+            "scan_ms": {
+                "any": round(timed(lambda: scan_any(careers, ANY_TERMS), repeat), 3),
+                "all": round(timed(lambda: scan_all(careers, ALL_TERMS), repeat), 3),
+                "jaccard": round(timed(lambda: scan_jaccard(careers, bitsets), repeat), 3),
+            },
+            "bitset_ms": {
+                "any": round(timed(lambda: bitsets.select(bitsets.match_any("skills", ANY_TERMS)), repeat), 3),
+                "all": round(timed(lambda: bitsets.select(bitsets.match_all("skills", ALL_TERMS)), repeat), 3),
+                "jaccard": round(timed(lambda: bitsets.jaccard(PROFILE), repeat), 3),
+            },
+        })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Skill / work-style bitset benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per query (median reported)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    rows = run(args.sizes, args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print(f"{'careers':>8} {'build ms':>9} | {'query':>8} {'scan ms':>9} {'bitset ms':>10} {'speedup':>8}")
+    for row in rows:
+        for query in ("any", "all", "jaccard"):
+            scan, bits = row["scan_ms"][query], row["bitset_ms"][query]
+            print(f"{row['size']:>8} {row['build_ms']:>9} | {query:>8} {scan:>9} {bits:>10} "
+                  f"{scan / bits if bits else float('inf'):>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
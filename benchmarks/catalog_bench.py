@@ -0,0 +1,142 @@
+"""
+Catalog scaling benchmark
+
+Generates synthetic catalogs (built-in careers mutated into N variants
+with skills/work styles drawn from a larger vocabulary), then compares
+loading them eagerly from JSONL against the memory-mapped sidecar
+(app/catalog.py): compile time, open time, random lookups and resident memory after
+the lookups. Each measurement runs in a fresh interpreter (Linux, reads
+/proc/self/statm).
+
+Usage:
+    python -m benchmarks.catalog_bench
+    python -m benchmarks.catalog_bench --sizes 1000 10000 100000 --lookups 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EXTRA_SKILLS = [f"skill {i}" for i in range(400)]
+EXTRA_STYLES = [f"style {i}" for i in range(60)]
+
+# Runs in a fresh interpreter: prints {"open_ms", "lookup_us", "rss_mb"}
+MEASURE = """
+import json, os, random, sys, time
+mode, path, lookups = sys.argv[1], sys.argv[2], int(sys.argv[3])
+t0 = time.perf_counter()
+if mode == "eager":
+    catalog = {}
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            catalog[record.pop("key")] = record
+else:
+    from app.catalog import open_catalog
+    catalog = open_catalog(path)
+open_ms = (time.perf_counter() - t0) * 1000
+keys = list(catalog)
+rng = random.Random(0)
+sample = [rng.choice(keys) for _ in range(lookups)]
+t0 = time.perf_counter()
+for key in sample:
+    catalog[key]["skills"]
+lookup_us = (time.perf_counter() - t0) / lookups * 1e6
+# Current RSS from /proc (ru_maxrss is inherited from the parent across exec)
+with open("/proc/self/statm") as f:
+    rss_mb = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+print(json.dumps({"open_ms": open_ms, "lookup_us": lookup_us, "rss_mb": rss_mb}))
+"""
+
+
+def synthetic_careers(size: int, seed: int = 0) -> Dict[str, Dict]:
+    """{key: career} with `size` variants of the built-in careers"""
+    sys.path.insert(0, REPO_ROOT)
+    from app.career_data import get_builtin_career_paths
+
+    rng = random.Random(seed)
+    base = list(get_builtin_career_paths().values())
+    careers = {}
+    for i in range(size):
+        info = dict(rng.choice(base))
+        info["name"] = f"{info['name']} {i}"
+        info["skills"] = info["skills"][:3] + rng.sample(EXTRA_SKILLS, 3)
+        info["work_style"] = info["work_style"][:3] + rng.sample(EXTRA_STYLES, 2)
+        careers[f"career_{i}"] = info
+    return careers
+
+
+def synthesize(size: int, path: str, seed: int = 0) -> None:
+    """Write a JSONL catalog of `size` careers"""
+    with open(path, "w", encoding="utf-8") as f:
+        for key, info in synthetic_careers(size, seed).items():
+            f.write(json.dumps({"key": key, **info}) + "\n")
+
+
+def measure(mode: str, path: str, lookups: int, env: Dict) -> Dict:
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE, mode, path, str(lookups)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(sizes: List[int], lookups: int) -> List[Dict]:
+    sys.path.insert(0, REPO_ROOT)
+    from app.catalog import compile_catalog
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="career-catalog-") as tmp:
+        env = {**os.environ, "CAREER_CATALOG_SIDECAR_DIR": os.path.join(tmp, "sidecars")}
+        for size in sizes:
+            source = os.path.join(tmp, f"catalog-{size}.jsonl")
+            synthesize(size, source)
+            os.environ["CAREER_CATALOG_SIDECAR_DIR"] = env["CAREER_CATALOG_SIDECAR_DIR"]
+            from app.catalog import sidecar_path_for
+            t0 = time.perf_counter()
+            compile_catalog(source, sidecar_path_for(source))
+            compile_ms = (time.perf_counter() - t0) * 1000
+            rows.append({
+                "size": size,
+                "source_mb": round(os.path.getsize(source) / 2**20, 2),
+                "sidecar_mb": round(os.path.getsize(sidecar_path_for(source)) / 2**20, 2),
+                "compile_ms": round(compile_ms, 1),
+                "eager": {k: round(v, 2) for k, v in measure("eager", source, lookups, env).items()},
+                "mapped": {k: round(v, 2) for k, v in measure("mapped", source, lookups, env).items()},
+            })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Catalog scaling benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--lookups", type=int, default=1000, help="Random key lookups per run")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    rows = run(args.sizes, args.lookups)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print(f"{'careers':>8} {'jsonl MB':>9} {'sidecar MB':>11} {'compile ms':>11} | "
+          f"{'open ms':>9} {'lookup us':>10} {'RSS MB':>8} (eager) | "
+          f"{'open ms':>9} {'lookup us':>10} {'RSS MB':>8} (mapped)")
+    for row in rows:
+        eager, mapped = row["eager"], row["mapped"]
+        print(f"{row['size']:>8} {row['source_mb']:>9} {row['sidecar_mb']:>11} {row['compile_ms']:>11} | "
+              f"{eager['open_ms']:>9} {eager['lookup_us']:>10} {eager['rss_mb']:>8}         | "
+              f"{mapped['open_ms']:>9} {mapped['lookup_us']:>10} {mapped['rss_mb']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Local fake OpenAI-compatible HTTP server
+
+Serves POST /v1/chat/completions (plain and `stream: true`) with canned
+output (see benchmarks/stubs.py) after a simulated latency, so api_server
+can be load tested end-to-end over real HTTP with no external services. Point the OpenAI SDK at it with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+With --rpm-limit / --tpm-limit it enforces per-minute rate limits like the
+real providers: every response carries `x-ratelimit-*` headers and
+requests over the limit get a 429 with `retry-after`.
+
+Usage:
+    python -m benchmarks.fake_provider --port 9100 --latency lognormal:400:0.35:12
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+from benchmarks.stubs import LatencyModel, canned_completion, classify_system_prompt, estimate_tokens
+
+
+class RateLimiter:
+    """Fixed one-minute windows for requests and tokens (0 = unlimited)"""
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window_start = time.monotonic()
+        self.requests = 0
+        self.tokens = 0
+
+    def _roll(self) -> None:
+        if time.monotonic() - self.window_start >= 60.0:
+            self.window_start = time.monotonic()
+            self.requests = self.tokens = 0
+
+    def allow(self, tokens: int) -> bool:
+        self._roll()
+        if (self.rpm and self.requests + 1 > self.rpm) or (self.tpm and self.tokens + tokens > self.tpm):
+            return False
+        self.requests += 1
+        self.tokens += tokens
+        return True
+
+    def headers(self) -> dict:
+        if not (self.rpm or self.tpm):
+            return {}
+        reset = max(0.0, 60.0 - (time.monotonic() - self.window_start))
+        headers = {"x-ratelimit-reset-requests": f"{reset:.3f}s"}
+        if self.rpm:
+            headers["x-ratelimit-limit-requests"] = str(self.rpm)
+            headers["x-ratelimit-remaining-requests"] = str(max(0, self.rpm - self.requests))
+        if self.tpm:
+            headers["x-ratelimit-limit-tokens"] = str(self.tpm)
+            headers["x-ratelimit-remaining-tokens"] = str(max(0, self.tpm - self.tokens))
+        return headers
+
+
+def create_app(latency: LatencyModel, error_rate: float = 0.0, seed: int = 0,
+               rpm_limit: int = 0, tpm_limit: int = 0) -> FastAPI:
+    """
+    Build the fake provider app
+
+    Args:
+        latency: Latency model applied to every completion
+        error_rate: Fraction of requests answered with a 500 (0.0 to 1.0)
+        seed: Seed for canned output and error injection
+        rpm_limit: Requests per minute before 429s (0 = unlimited)
+        tpm_limit: Tokens per minute before 429s (0 = unlimited)
+    """
+    app = FastAPI(title="Fake OpenAI Provider")
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0, "rate_limited": 0}
+    limiter = RateLimiter(rpm_limit, tpm_limit)
+
+    async def stream_chunks(model: str, text: str):
+        """OpenAI streaming format: one chat.completion.chunk per ~token, then [DONE]"""
+        chunk_id = f"chatcmpl-fake-{stats['requests']}"
+        created = int(time.time())
+        await asyncio.sleep(latency.sample_ttft())
+        for start in range(0, len(text), 4):
+            await asyncio.sleep(latency.token_time(1))
+            chunk = {
+                "id": chunk_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {"content": text[start:start + 4]}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        final = {
+            "id": chunk_id, "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        stats["requests"] += 1
+
+        if error_rate and rng.random() < error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(latency.sample_ttft())
+            return JSONResponse(status_code=500, content={"error": {"message": "injected failure", "type": "server_error"}})
+
+        system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+        prompt = messages[-1].get("content", "") if messages else ""
+        kind = classify_system_prompt(system)
+        text = canned_completion(kind, prompt, seed, fence_json=kind == "roadmap")
+        completion_tokens = estimate_tokens(text)
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in messages)
+
+        if not limiter.allow(prompt_tokens + completion_tokens):
+            stats["rate_limited"] += 1
+            headers = limiter.headers()
+            headers["retry-after"] = headers["x-ratelimit-reset-requests"].rstrip("s")
+            return JSONResponse(status_code=429, headers=headers, content={
+                "error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}
+            })
+
+        if body.get("stream"):
+            return StreamingResponse(stream_chunks(body.get("model", "fake-model"), text),
+                                     media_type="text/event-stream", headers=limiter.headers())
+
+        await asyncio.sleep(latency.sample(completion_tokens))
+
+        return JSONResponse(headers=limiter.headers(), content={
+            "id": f"chatcmpl-fake-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", default="lognormal:400:0.35:12",
+                        help="dist:ttft_ms:spread:per_token_ms")
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rpm-limit", type=int, default=0, help="Requests per minute (0 = unlimited)")
+    parser.add_argument("--tpm-limit", type=int, default=0, help="Tokens per minute (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    latency = LatencyModel.from_spec(args.latency, time_scale=args.time_scale, seed=args.seed)
+    app = create_app(latency, error_rate=args.error_rate, seed=args.seed,
+                     rpm_limit=args.rpm_limit, tpm_limit=args.tpm_limit)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Import-time / cold-start profile
+
+Imports each entry point in a fresh interpreter (several runs, median
+reported), and lists the slowest modules from `python -X importtime`.
+Also times first use of the lazily built pieces (graph compile, LLM and
+roadmap client) so the deferred cost stays visible.
+
+Usage:
+    python -m benchmarks.import_profile
+    python -m benchmarks.import_profile --runs 7 --top 15 app.graph api_server
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGETS = ["app.graph", "studio_entry", "api_server"]
+
+TIMED_IMPORT = """
+import json, time
+t0 = time.perf_counter()
+import {module}
+print(json.dumps({{"import_ms": (time.perf_counter() - t0) * 1000}}))
+"""
+
+FIRST_USE = """
+import json, time
+from app.graph import get_graph, get_session_graph
+from app.nodes import get_llm
+from app.roadmap import get_client
+out = {}
+for name, fn in [("compile_graph", get_graph), ("compile_session_graph", get_session_graph),
+                 ("get_llm", get_llm), ("get_roadmap_client", get_client)]:
+    t0 = time.perf_counter()
+    try:
+        fn()
+    except Exception:
+        pass
+    out[name] = (time.perf_counter() - t0) * 1000
+print(json.dumps(out))
+"""
+
+
+def run_python(code: str, extra_args: List[str] = None) -> subprocess.CompletedProcess:
+    # Dummy key so first-use timing includes building the real clients
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "import-profile")}
+    return subprocess.run(
+        [sys.executable, "-W", "ignore", *(extra_args or []), "-c", code],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def timed_import(module: str, runs: int) -> float:
+    """Median wall-clock ms to import `module` in a fresh interpreter"""
+    samples = []
+    for _ in range(runs):
+        result = run_python(TIMED_IMPORT.format(module=module))
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1])["import_ms"])
+    return statistics.median(samples)
+
+
+def slowest_modules(module: str, top: int) -> List[Dict]:
+    """Top-N modules by cumulative import time (from -X importtime)"""
+    result = run_python(f"import {module}", ["-X", "importtime"])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        rows.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+def first_use(runs: int) -> Dict[str, float]:
+    """Median ms for the first call of each lazy initializer"""
+    samples: Dict[str, List[float]] = {}
+    for _ in range(runs):
+        result = run_python(FIRST_USE)
+        for name, ms in json.loads(result.stdout.strip().splitlines()[-1]).items():
+            samples.setdefault(name, []).append(ms)
+    return {name: round(statistics.median(values), 1) for name, values in samples.items()}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start import profile")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS, help="Modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list per target")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = {
+        "imports": {
+            target: {
+                "median_ms": round(timed_import(target, args.runs), 1),
+                "slowest": slowest_modules(target, args.top),
+            }
+            for target in args.targets
+        },
+        "first_use_ms": first_use(args.runs),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    for target, data in report["imports"].items():
+        print(f"\n=== import {target}: {data['median_ms']} ms (median of {args.runs}) ===")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for row in data["slowest"]:
+            print(f"{row['cumulative_ms']:>14.1f} {row['self_ms']:>9.1f}  {row['module']}")
+    print("\n=== first use (lazy initializers) ===")
+    for name, ms in report["first_use_ms"].items():
+        print(f"{name:<24} {ms:>8} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
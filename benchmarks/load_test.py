@@ -0,0 +1,314 @@
+"""
+HTTP load test for api_server against a local fake provider
+
+Starts benchmarks.fake_provider and `api_server:app` as subprocesses (the
+API server's OpenAI client is pointed at the fake via OPENAI_BASE_URL),
+then drives /generate-roadmap and /health over real HTTP.
+
+Two load shapes:
+- closed loop (default): `--concurrency` clients each send back-to-back
+- open loop: `--rate` requests/sec with Poisson arrivals, capped at
+  `--concurrency` in flight. Latency is measured from the scheduled
+  arrival time so queueing isn't hidden (no coordinated omission).
+
+A separate probe hits /health every `--probe-interval` seconds on its own
+connection. /health does no work, so its latency is a direct read of the
+server's event-loop lag.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 16 --duration 20
+    python -m benchmarks.load_test --rate 30 --concurrency 64 --health-ratio 0.2
+    python -m benchmarks.load_test --api-url http://127.0.0.1:8000   # existing server
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.stats import summarize
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ============================================================================
+# PROCESS MANAGEMENT
+# ============================================================================
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    """Poll `url` until it answers 200 or `timeout` elapses"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def start_process(args: List[str], env: Optional[Dict] = None) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args],
+        cwd=REPO_ROOT,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def stop_process(proc: Optional[subprocess.Popen]) -> None:
+    if proc and proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# ============================================================================
+# LOAD GENERATION
+# ============================================================================
+
+class Recorder:
+    """Per-endpoint latencies and errors"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.status: Dict[str, Dict[str, int]] = {}
+
+    def record(self, endpoint: str, latency: float, status: str, ok: bool) -> None:
+        self.latencies.setdefault(endpoint, []).append(latency)
+        self.errors[endpoint] = self.errors.get(endpoint, 0) + (0 if ok else 1)
+        codes = self.status.setdefault(endpoint, {})
+        codes[status] = codes.get(status, 0) + 1
+
+    def report(self, elapsed: float) -> Dict:
+        out = {}
+        for endpoint, samples in self.latencies.items():
+            errors = self.errors.get(endpoint, 0)
+            out[endpoint] = {
+                **summarize(samples),
+                "errors": errors,
+                "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+                "requests_per_sec": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+                "status": self.status.get(endpoint, {}),
+            }
+        return out
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, goal: str, recorder: Recorder,
+               started: Optional[float] = None) -> None:
+    """Issue one request; latency counts from `started` (scheduled time) if given"""
+    t0 = started if started is not None else time.perf_counter()
+    try:
+        if endpoint == "/health":
+            response = await client.get("/health")
+        else:
+            response = await client.post(endpoint, json={"goal": goal})
+        ok = response.status_code == 200
+        status = str(response.status_code)
+    except httpx.HTTPError as e:
+        ok, status = False, type(e).__name__
+    recorder.record(endpoint, time.perf_counter() - t0, status, ok)
+
+
+async def closed_loop(client, pick, goals, recorder, concurrency: int, deadline: float) -> None:
+    async def worker(seed: int):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            await send(client, pick(rng), rng.choice(goals), recorder)
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+
+async def open_loop(client, pick, goals, recorder, rate: float, concurrency: int,
+                    deadline: float, seed: int) -> None:
+    rng = random.Random(seed)
+    in_flight = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def fire(scheduled: float, endpoint: str, goal: str):
+        async with in_flight:
+            await send(client, endpoint, goal, recorder, started=scheduled)
+
+    next_at = time.perf_counter()
+    while next_at < deadline:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(next_at, pick(rng), rng.choice(goals))))
+        next_at += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+
+
+async def lag_probe(base_url: str, interval: float, deadline: float, samples: List[float]) -> None:
+    """Serial /health pings on a dedicated connection"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                await client.get("/health")
+                samples.append(time.perf_counter() - t0)
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(max(0.0, interval - (time.perf_counter() - t0)))
+
+
+async def client_lag_monitor(deadline: float, samples: List[float], tick: float = 0.05) -> None:
+    """Load generator's own loop lag, to tell a saturated client from a slow server"""
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        await asyncio.sleep(tick)
+        samples.append(max(0.0, time.perf_counter() - t0 - tick))
+
+
+async def run_load(base_url: str, args) -> Dict:
+    from app.career_data import get_career_paths
+
+    goals = [info["name"] for info in get_career_paths().values()] + args.extra_goal
+
+    def pick(rng: random.Random) -> str:
+        return "/health" if rng.random() < args.health_ratio else "/generate-roadmap"
+
+    recorder = Recorder()
+    probe_samples: List[float] = []
+    client_lag: List[float] = []
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        t0 = time.perf_counter()
+        deadline = t0 + args.duration
+        background = [
+            asyncio.create_task(lag_probe(base_url, args.probe_interval, deadline, probe_samples)),
+            asyncio.create_task(client_lag_monitor(deadline, client_lag)),
+        ]
+        if args.rate > 0:
+            await open_loop(client, pick, goals, recorder, args.rate, args.concurrency, deadline, args.seed)
+        else:
+            await closed_loop(client, pick, goals, recorder, args.concurrency, deadline)
+        await asyncio.gather(*background)
+        elapsed = time.perf_counter() - t0
+
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "endpoints": recorder.report(elapsed),
+        "server_loop_lag": summarize(probe_samples),
+        "client_loop_lag": summarize(client_lag),
+    }
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def print_report(report: Dict) -> None:
+    cfg = report["config"]
+    shape = f"open loop {cfg['rate']}/s" if cfg["rate"] > 0 else "closed loop"
+    print(f"\n=== Load test: {shape}, concurrency {cfg['concurrency']}, "
+          f"{cfg['workers']} worker(s), {report['elapsed_s']}s ===")
+    print(f"{'endpoint':<20} {'reqs':>6} {'req/s':>8} {'err%':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+    for endpoint, stats in report["endpoints"].items():
+        print(f"{endpoint:<20} {stats['count']:>6} {stats['requests_per_sec']:>8} "
+              f"{stats['error_rate'] * 100:>6.1f} {stats['p50_ms']:>9} {stats['p90_ms']:>9} {stats['p99_ms']:>9}")
+    lag = report["server_loop_lag"]
+    print(f"\nserver event-loop lag (/health probe)  p50 {lag['p50_ms']}ms  p99 {lag['p99_ms']}ms  max {lag['max_ms']}ms")
+    lag = report["client_loop_lag"]
+    print(f"client event-loop lag                  p50 {lag['p50_ms']}ms  p99 {lag['p99_ms']}ms  max {lag['max_ms']}ms")
+    admission = report.get("server_metrics", {}).get("llm_admission", {})
+    if admission.get("window") is not None:
+        bulk = admission["queue_wait_ms"]["bulk"]
+        print(f"llm admission (one worker)             window {admission['window']}  "
+              f"throttle events {admission['throttle_events']}  bulk queue wait p50 {bulk['p50']}ms p99 {bulk['p99']}ms")
+    if "provider" in report:
+        provider = report["provider"]
+        print(f"provider                               requests {provider['requests']}  "
+              f"429s {provider.get('rate_limited', 0)}  errors {provider['errors']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test api_server against a local fake provider")
+    parser.add_argument("--concurrency", type=int, default=16, help="Closed-loop clients / open-loop max in flight")
+    parser.add_argument("--rate", type=float, default=0.0, help="Open-loop arrivals per second (0 = closed loop)")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load")
+    parser.add_argument("--health-ratio", type=float, default=0.0, help="Fraction of load sent to /health")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout (s)")
+    parser.add_argument("--probe-interval", type=float, default=0.25, help="Seconds between lag probes")
+    parser.add_argument("--extra-goal", action="append", default=[], help="Add a non-catalog goal (repeatable)")
+    parser.add_argument("--api-url", default=None, help="Target an already running api_server")
+    parser.add_argument("--workers", type=int, default=1, help="api_server worker processes")
+    parser.add_argument("--cache-path", default=None,
+                        help="api_server shared cache file (default: a fresh temp file)")
+    parser.add_argument("--provider-latency", default="lognormal:400:0.35:12",
+                        help="Fake provider dist:ttft_ms:spread:per_token_ms")
+    parser.add_argument("--provider-time-scale", type=float, default=0.25)
+    parser.add_argument("--provider-error-rate", type=float, default=0.0)
+    parser.add_argument("--provider-rpm-limit", type=int, default=0, help="Fake provider requests/min (0 = unlimited)")
+    parser.add_argument("--provider-tpm-limit", type=int, default=0, help="Fake provider tokens/min (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    provider = api = None
+    try:
+        if args.api_url:
+            base_url = args.api_url
+        else:
+            provider_port, api_port = free_port(), free_port()
+            provider = start_process([
+                "-m", "benchmarks.fake_provider", "--port", str(provider_port),
+                "--latency", args.provider_latency, "--time-scale", str(args.provider_time_scale),
+                "--error-rate", str(args.provider_error_rate), "--seed", str(args.seed),
+                "--rpm-limit", str(args.provider_rpm_limit), "--tpm-limit", str(args.provider_tpm_limit),
+            ])
+            wait_until_ready(f"http://127.0.0.1:{provider_port}/stats")
+
+            cache_path = args.cache_path or os.path.join(tempfile.mkdtemp(prefix="career-load-"), "cache.sqlite3")
+            api = start_process(
+                ["api_server.py", "--port", str(api_port), "--workers", str(args.workers)],
+                env={
+                    "OPENAI_BASE_URL": f"http://127.0.0.1:{provider_port}/v1",
+                    "OPENAI_API_KEY": "fake-provider",
+                    "USE_GROQ": "false",
+                    "CAREER_CACHE_PATH": cache_path,
+                },
+            )
+            base_url = f"http://127.0.0.1:{api_port}"
+            wait_until_ready(f"{base_url}/health")
+
+        report = asyncio.run(run_load(base_url, args))
+        report["config"] = vars(args)
+        # Admission controller view of one worker, and what the provider saw
+        report["server_metrics"] = httpx.get(f"{base_url}/metrics", timeout=10.0).json()
+        if provider:
+            report["provider"] = httpx.get(f"http://127.0.0.1:{provider_port}/stats", timeout=10.0).json()
+    finally:
+        stop_process(api)
+        stop_process(provider)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Model routing benchmark
+
+Sends each LLM-calling node's real prompt (built from the benchmark
+conversation, varied per sample) to the model its route resolves to,
+under several routing tables, and reports per route:
+
+- latency p50/p99
+- validity: the share of outputs the node could use - a single question
+  for discovery, a complete profile for synthesis, recommendations that
+  resolve to catalog careers for matching, all four sections for action
+
+Configurations are LLM_ROUTES strings (see app/models.py). Built in:
+
+- single: the old setup, every node on gpt-4o-mini at 0.7, no max_tokens
+- tiered: MODEL_ROUTES as shipped
+
+Offline (default) the models are stubs whose latency and failure rate
+follow benchmarks/stubs.MODEL_PROFILES; --live calls the real API.
+
+Usage:
+    python -m benchmarks.model_routing_bench
+    python -m benchmarks.model_routing_bench --samples 50 --time-scale 0.2
+    python -m benchmarks.model_routing_bench --config nano="discovery.model=gpt-4.1-nano"
+    python -m benchmarks.model_routing_bench --live --samples 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from benchmarks.run_benchmarks import CONVERSATION
+from benchmarks.stats import summarize
+from benchmarks.stubs import canned_profile, canned_recommendations, stub_llm_factory
+
+ROUTES = ["discovery", "synthesis", "matching", "action"]
+
+CONFIGS = {
+    "single": ",".join(
+        [f"{route}.model=gpt-4o-mini" for route in ROUTES]
+        + [f"{route}.temperature=0.7" for route in ROUTES]
+        + [f"{route}.max_tokens=none" for route in ROUTES]
+    ),
+    "tiered": "",
+}
+
+ACTION_SECTIONS = ("Next Steps", "Skills", "Resources", "Usher")
+
+
+# ============================================================================
+# PROMPTS
+# ============================================================================
+
+def _conversation(sample: int) -> List:
+    """Greeting plus the benchmark answers, rotated so every sample differs"""
+    from app import prompts
+
+    answers = CONVERSATION[1:]
+    shift = sample % len(answers)
+    answers = answers[shift:] + answers[:shift]
+    messages = [AIMessage(content=prompts.INITIAL_GREETING), HumanMessage(content=CONVERSATION[0])]
+    for answer in answers[:2 + sample % 4]:
+        messages += [AIMessage(content="Tell me more?"), HumanMessage(content=answer)]
+    return messages
+
+
+def build_prompt(route: str, sample: int) -> List:
+    """The messages the node for `route` would send"""
+    import random
+
+    from app import prompts
+    from app.career_data import get_career_paths
+    from app.retrieval import retrieve_career_paths
+
+    messages = _conversation(sample)
+    transcript = "\n".join(f"{m.__class__.__name__}: {m.content}" for m in messages)
+    profile = canned_profile()
+    if route == "discovery":
+        user = prompts.DISCOVERY_USER_PROMPT.format(
+            conversation_context="\n".join(f"{m.__class__.__name__}: {m.content}" for m in messages[-5:]),
+            user_profile=prompts.format_user_profile({}),
+            questions_asked=len(messages) // 2,
+        )
+        return [SystemMessage(content=prompts.DISCOVERY_SYSTEM), HumanMessage(content=user)]
+    if route == "synthesis":
+        user = prompts.ANALYSIS_USER_PROMPT.format(conversation=transcript)
+        return [SystemMessage(content=prompts.ANALYSIS_SYSTEM), HumanMessage(content=user)]
+    if route == "matching":
+        profile["interests"] = profile["interests"][sample % 3:] + [messages[-1].content]
+        user = prompts.RECOMMENDATION_USER_PROMPT.format(
+            user_profile=prompts.format_user_profile(profile),
+            career_paths=prompts.format_career_paths(retrieve_career_paths(profile, get_career_paths())),
+        )
+        return [SystemMessage(content=prompts.RECOMMENDATION_SYSTEM), HumanMessage(content=user)]
+    recommendations = canned_recommendations(random.Random(sample))
+    user = prompts.ACTION_USER_PROMPT.format(
+        recommendations_summary=prompts.format_recommendations_summary(recommendations)
+    )
+    return [SystemMessage(content=prompts.ACTION_SYSTEM), HumanMessage(content=user)]
+
+
+# ============================================================================
+# VALIDITY
+# ============================================================================
+
+def _valid_discovery(text: str) -> bool:
+    return text.strip().endswith("?") and len(text.split()) <= 60
+
+
+def _valid_synthesis(text: str) -> bool:
+    from app.nodes import parse_json_response
+
+    try:
+        profile = parse_json_response(text)
+    except Exception:
+        return False
+    return isinstance(profile, dict) and all(
+        isinstance(profile.get(field), list) for field in ("interests", "skills", "work_style")
+    )
+
+
+def _valid_matching(text: str) -> bool:
+    from app.name_resolver import resolve_career_name
+    from app.nodes import parse_json_response
+
+    try:
+        matches = parse_json_response(text)
+    except Exception:
+        return False
+    return isinstance(matches, list) and bool(matches) and all(
+        isinstance(match, dict) and "fit_score" in match and resolve_career_name(match.get("path", ""))
+        for match in matches
+    )
+
+
+def _valid_action(text: str) -> bool:
+    return all(section in text for section in ACTION_SECTIONS)
+
+
+VALIDATORS: Dict[str, Callable[[str], bool]] = {
+    "discovery": _valid_discovery,
+    "synthesis": _valid_synthesis,
+    "matching": _valid_matching,
+    "action": _valid_action,
+}
+
+
+# ============================================================================
+# RUN
+# ============================================================================
+
+def run_config(name: str, routes_spec: str, samples: int) -> Dict:
+    """Time and validate `samples` calls per route under one LLM_ROUTES setting"""
+    from app.models import model_route
+    from app.nodes import get_llm
+
+    os.environ["LLM_ROUTES"] = routes_spec
+    result = {"config": name, "routes": {}}
+    for route in ROUTES:
+        llm = get_llm(route)
+        if llm is None:
+            raise SystemExit("No LLM available (set OPENAI_API_KEY for --live)")
+        times, valid = [], 0
+        for sample in range(samples):
+            messages = build_prompt(route, sample)
+            t0 = time.perf_counter()
+            try:
+                # Straight to the model: admission queueing would carry over between configs
+                text = llm.invoke(messages).content
+            except Exception as e:
+                print(f"[BENCH] {route} call failed: {e}", file=sys.stderr)
+                text = ""
+            times.append(time.perf_counter() - t0)
+            valid += VALIDATORS[route](text)
+        result["routes"][route] = {
+            **model_route(route),
+            "latency": summarize(times),
+            "valid": round(valid / samples, 3),
+        }
+    total = [r["latency"]["p50_ms"] for r in result["routes"].values()]
+    result["sum_p50_ms"] = round(sum(total), 2)
+    return result
+
+
+def parse_configs(extra: List[str]) -> List[Tuple[str, str]]:
+    configs = dict(CONFIGS)
+    for item in extra:
+        name, _, spec = item.partition("=")
+        configs[name.strip()] = spec.strip()
+    return list(configs.items())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Per-node model routing benchmark")
+    parser.add_argument("--samples", type=int, default=30, help="Calls per route per configuration")
+    parser.add_argument("--config", action="append", default=[],
+                        help='Extra configuration NAME="LLM_ROUTES spec" (repeatable)')
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="Multiply simulated latency (offline only; 1 = realistic)")
+    parser.add_argument("--live", action="store_true", help="Call the real models (needs OPENAI_API_KEY)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    from app.nodes import set_llm_factory
+
+    if not args.live:
+        set_llm_factory(stub_llm_factory(time_scale=args.time_scale, seed=args.seed))
+
+    # parse_json_response prints every failure; the validity column counts them
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        results = [run_config(name, spec, args.samples) for name, spec in parse_configs(args.config)]
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    scale = "" if args.live else f" (simulated, time scale {args.time_scale})"
+    print(f"{args.samples} calls per route{scale}")
+    print(f"{'config':<10} {'route':<10} {'model':<24} {'temp':>5} {'max_tok':>7} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'valid':>6}")
+    for result in results:
+        for route, row in result["routes"].items():
+            print(f"{result['config']:<10} {route:<10} {row['model']:<24} {row['temperature']:>5} "
+                  f"{str(row['max_tokens']):>7} {row['latency']['p50_ms']:>9} {row['latency']['p99_ms']:>9} "
+                  f"{row['valid']:>6.0%}")
+        print(f"{result['config']:<10} {'(sum p50)':<10} {'':<24} {'':>5} {'':>7} {result['sum_p50_ms']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+Offline graph + roadmap benchmark
+
+Drives full 6-question conversations through run_career_coach and roadmap
+requests through api_server, with stub LLMs (see benchmarks/stubs.py).
+Reports turns/sec, p50/p99 per node and memory per session.
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --sessions 50 --concurrency 8 --time-scale 1
+    python -m benchmarks.run_benchmarks --latency uniform:300:0.2:8 --json
+    python -m benchmarks.run_benchmarks --click-delay 5      # roadmap click after each session
+"""
+
+import argparse
+import contextvars
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from benchmarks.stats import summarize
+from benchmarks.stubs import LatencyModel, install_stubs
+
+
+# Six answers, one per discovery question, plus the opening message
+CONVERSATION = [
+    "Hi! I want to find a career in entertainment.",
+    "I love going to concerts and live music in general.",
+    "Mostly the energy of the crowd and how the sound hits.",
+    "I play guitar and I edit videos for my friends' band.",
+    "I'm good with software and picking up new tools quickly.",
+    "I like working on my own but sharing ideas with a small team.",
+    "Flexible hours and different projects keep me motivated.",
+]
+
+GRAPH_NODES = {
+    "greeting", "router", "discovery", "validation", "synthesis",
+    "enrichment", "matching", "ranking", "explanation", "action",
+}
+
+
+# ============================================================================
+# NODE TIMING
+# ============================================================================
+
+class NodeTimer(BaseCallbackHandler):
+    """Callback handler recording wall time of every graph node run"""
+
+    def __init__(self):
+        self._started: Dict[uuid.UUID, tuple] = {}
+        self.samples: Dict[str, List[float]] = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, **kwargs):
+        name = kwargs.get("name")
+        if name in GRAPH_NODES:
+            self._started[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started:
+            name, t0 = started
+            self.samples.setdefault(name, []).append(time.perf_counter() - t0)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+
+_node_timer_var: contextvars.ContextVar = contextvars.ContextVar("bench_node_timer", default=None)
+register_configure_hook(_node_timer_var, inheritable=True)
+
+
+# ============================================================================
+# CHAT BENCHMARK
+# ============================================================================
+
+def run_session(thread_id: str, click_delay: Optional[float] = None) -> Dict:
+    """
+    Run one full conversation; returns per-turn latencies and final phase
+
+    With `click_delay`, the user then opens the roadmap of one of the
+    recommendations after that many seconds ("click_time" in the result).
+    """
+    from app.graph import run_career_coach
+
+    turn_times = []
+    result = {}
+    for message in CONVERSATION:
+        t0 = time.perf_counter()
+        result = run_career_coach(message, thread_id=thread_id)
+        turn_times.append(time.perf_counter() - t0)
+        # Discovery may end early; the user stops once recommendations arrive
+        if result.get("phase") == "completed":
+            break
+    session = {"turn_times": turn_times, "phase": result.get("phase")}
+    recommendations = result.get("recommendations") or []
+    if click_delay is not None and recommendations:
+        from app.roadmap import generate_roadmap
+
+        time.sleep(click_delay)
+        goal = random.Random(thread_id).choice(recommendations)["path"]
+        t0 = time.perf_counter()
+        generate_roadmap(goal)
+        session["click_time"] = time.perf_counter() - t0
+    return session
+
+
+def bench_chat(sessions: int, concurrency: int, click_delay: Optional[float] = None) -> Dict:
+    """Run `sessions` conversations on `concurrency` worker threads"""
+    timer = NodeTimer()
+
+    def worker(index: int) -> Dict:
+        _node_timer_var.set(timer)
+        return run_session(f"bench-{uuid.uuid4().hex[:8]}-{index}", click_delay)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(sessions)))
+    elapsed = time.perf_counter() - t0
+
+    from app.discovery import discovery_stats
+    from app.question_bank import question_bank_stats
+
+    turn_times = [t for r in results for t in r["turn_times"]]
+    completed = sum(1 for r in results if r["phase"] == "completed")
+    clicks = {}
+    if click_delay is not None:
+        from app.roadmap_prefetch import prefetch_stats
+
+        clicks = {"roadmap_clicks": {
+            "latency": summarize([r["click_time"] for r in results if "click_time" in r]),
+            "prefetch": prefetch_stats(),
+        }}
+    return {
+        "sessions": sessions,
+        "completed_sessions": completed,
+        "turns": len(turn_times),
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_sec": round(len(turn_times) / elapsed, 2) if elapsed else 0.0,
+        "turn_latency": summarize(turn_times),
+        "nodes": {name: summarize(samples) for name, samples in sorted(timer.samples.items())},
+        "discovery": discovery_stats(),
+        "question_bank": question_bank_stats(),
+        **clicks,
+    }
+
+
+def bench_memory(sessions: int) -> Dict:
+    """Retained heap per completed session (checkpoints stay in the MemorySaver)"""
+    import gc
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for index in range(sessions):
+        run_session(f"mem-{uuid.uuid4().hex[:8]}-{index}")
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "sessions": sessions,
+        "retained_kib_per_session": round((after - before) / 1024 / max(sessions, 1), 1),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+# ============================================================================
+# ROADMAP BENCHMARK
+# ============================================================================
+
+def bench_roadmap(requests: int, concurrency: int) -> Dict:
+    """POST /generate-roadmap for catalog careers through the FastAPI app"""
+    from fastapi.testclient import TestClient
+
+    import api_server
+    from app.career_data import get_career_paths
+
+    goals = [info["name"] for info in get_career_paths().values()]
+    latencies: List[float] = []
+    fallbacks = 0
+
+    with TestClient(api_server.app) as client:
+        def call(index: int) -> tuple:
+            t0 = time.perf_counter()
+            response = client.post("/generate-roadmap", json={"goal": goals[index % len(goals)]})
+            elapsed = time.perf_counter() - t0
+            phases = response.json().get("roadmap", {}).get("phases", [])
+            is_fallback = response.status_code != 200 or not phases or phases[0].get("title") == "Foundation"
+            return elapsed, is_fallback
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for elapsed, is_fallback in pool.map(call, range(requests)):
+                latencies.append(elapsed)
+                fallbacks += int(is_fallback)
+        wall = time.perf_counter() - t0
+
+    return {
+        "requests": requests,
+        "fallbacks": fallbacks,
+        "requests_per_sec": round(requests / wall, 2) if wall else 0.0,
+        "latency": summarize(latencies),
+    }
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def print_report(report: Dict) -> None:
+    chat = report["chat"]
+    print(f"\n=== Chat ({chat['sessions']} sessions, {chat['completed_sessions']} completed) ===")
+    print(f"turns: {chat['turns']}  elapsed: {chat['elapsed_s']}s  turns/sec: {chat['turns_per_sec']}")
+    lat = chat["turn_latency"]
+    print(f"turn latency  p50 {lat['p50_ms']}ms  p99 {lat['p99_ms']}ms  max {lat['max_ms']}ms")
+    disc = chat["discovery"]
+    print(f"discovery questions/session: {disc['avg_questions']}  early exits: {disc['early_exits']}  "
+          f"questions saved: {disc['questions_saved']}")
+    bank = chat["question_bank"]
+    print(f"question bank: {bank['bank']} bank / {bank['llm']} LLM questions  llm reasons: {bank['llm_reasons']}")
+    if "roadmap_clicks" in chat:
+        lat, pre = chat["roadmap_clicks"]["latency"], chat["roadmap_clicks"]["prefetch"]
+        print(f"roadmap click p50 {lat['p50_ms']}ms  p99 {lat['p99_ms']}ms  prefetched: {pre['generated']}  "
+              f"hits: {pre['hits']} (joined in flight: {pre['joined']})  wasted: {pre['wasted']}")
+    print(f"\n{'node':<12} {'count':>6} {'p50 ms':>10} {'p99 ms':>10}")
+    for name, stats in chat["nodes"].items():
+        print(f"{name:<12} {stats['count']:>6} {stats['p50_ms']:>10} {stats['p99_ms']:>10}")
+
+    if "memory" in report:
+        mem = report["memory"]
+        print(f"\n=== Memory ({mem['sessions']} sessions) ===")
+        print(f"retained per session: {mem['retained_kib_per_session']} KiB  peak: {mem['peak_kib']} KiB")
+
+    if "roadmap" in report:
+        road = report["roadmap"]
+        lat = road["latency"]
+        print(f"\n=== Roadmap ({road['requests']} requests, {road['fallbacks']} fallbacks) ===")
+        print(f"req/sec: {road['requests_per_sec']}  p50 {lat['p50_ms']}ms  p99 {lat['p99_ms']}ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline career coach benchmark (no network)")
+    parser.add_argument("--sessions", type=int, default=20, help="Conversations to run")
+    parser.add_argument("--concurrency", type=int, default=4, help="Worker threads")
+    parser.add_argument("--roadmaps", type=int, default=40, help="Roadmap requests (0 to skip)")
+    parser.add_argument("--memory-sessions", type=int, default=5, help="Sessions for memory pass (0 to skip)")
+    parser.add_argument("--latency", default="lognormal:400:0.35:12",
+                        help="Node LLM latency dist:ttft_ms:spread:per_token_ms")
+    parser.add_argument("--roadmap-latency", default=None, help="Roadmap latency spec (defaults to --latency)")
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="Multiply all simulated latency (1 = realistic, 0 = none)")
+    parser.add_argument("--click-delay", type=float, default=None,
+                        help="Seconds (scaled by --time-scale) before each finished session opens a roadmap")
+    parser.add_argument("--provider", choices=["openai", "groq"], default="openai")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-path", default=None,
+                        help="Shared cache file (default: a fresh temp file, so stub output never pollutes .cache/)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    os.environ["CAREER_CACHE_PATH"] = args.cache_path or os.path.join(
+        tempfile.mkdtemp(prefix="career-bench-"), "cache.sqlite3")
+
+    latency = LatencyModel.from_spec(args.latency, time_scale=args.time_scale, seed=args.seed)
+    roadmap_latency = LatencyModel.from_spec(args.roadmap_latency or args.latency,
+                                             time_scale=args.time_scale, seed=args.seed + 1)
+    install_stubs(latency, roadmap_latency, seed=args.seed, provider=args.provider)
+
+    # Node debug prints would swamp the report
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        report = {"config": vars(args), "chat": bench_chat(
+            args.sessions, args.concurrency,
+            None if args.click_delay is None else args.click_delay * args.time_scale,
+        )}
+        if args.memory_sessions:
+            report["memory"] = bench_memory(args.memory_sessions)
+        if args.roadmaps:
+            report["roadmap"] = bench_roadmap(args.roadmaps, args.concurrency)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
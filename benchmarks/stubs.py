@@ -0,0 +1,440 @@
+"""
+Deterministic stub LLMs for offline benchmarking
+
+Stand-ins for the ChatOpenAI model used by app/nodes.py and the
+OpenAI/Groq clients used by app/roadmap.py. No network, no API keys.
+Each stub sleeps according to a configurable latency model and returns
+canned output that parse_json_response (and the roadmap parser) accept.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app import prompts
+from app.career_data import get_career_paths
+
+
+# ============================================================================
+# LATENCY MODEL
+# ============================================================================
+
+class LatencyModel:
+    """
+    Latency = time-to-first-token + output_tokens * per-token time
+
+    Args:
+        dist: "lognormal" | "uniform" | "constant" (applies to TTFT)
+        ttft_ms: Median (lognormal), midpoint (uniform) or fixed TTFT
+        spread: Sigma for lognormal, +/- fraction for uniform
+        per_token_ms: Generation time per output token
+        time_scale: Multiplier applied to every sleep (0 = no sleeping)
+        seed: RNG seed so runs are reproducible
+    """
+
+    def __init__(self, dist: str = "lognormal", ttft_ms: float = 400.0,
+                 spread: float = 0.35, per_token_ms: float = 12.0,
+                 time_scale: float = 1.0, seed: int = 0):
+        if dist not in ("lognormal", "uniform", "constant"):
+            raise ValueError(f"Unknown latency distribution: {dist}")
+        self.dist = dist
+        self.ttft_ms = ttft_ms
+        self.spread = spread
+        self.per_token_ms = per_token_ms
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec: str, **kwargs) -> "LatencyModel":
+        """Build from a CLI spec like "lognormal:400:0.35:12" """
+        parts = spec.split(":")
+        args = {"dist": parts[0]}
+        for name, raw in zip(("ttft_ms", "spread", "per_token_ms"), parts[1:]):
+            args[name] = float(raw)
+        return cls(**{**args, **kwargs})
+
+    def sample_ttft(self) -> float:
+        """Sample time-to-first-token in seconds (already scaled)"""
+        with self._lock:
+            if self.dist == "lognormal":
+                ms = self.ttft_ms * self._rng.lognormvariate(0.0, self.spread)
+            elif self.dist == "uniform":
+                ms = self.ttft_ms * self._rng.uniform(1 - self.spread, 1 + self.spread)
+            else:
+                ms = self.ttft_ms
+        return max(ms, 0.0) * self.time_scale / 1000.0
+
+    def token_time(self, tokens: int) -> float:
+        """Seconds spent generating `tokens` output tokens (already scaled)"""
+        return tokens * self.per_token_ms * self.time_scale / 1000.0
+
+    def sample(self, output_tokens: int) -> float:
+        """Total seconds for a completion with `output_tokens` tokens"""
+        return self.sample_ttft() + self.token_time(output_tokens)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token)"""
+    return max(1, len(text) // 4)
+
+
+# ============================================================================
+# CANNED OUTPUTS
+# ============================================================================
+
+DISCOVERY_QUESTIONS = [
+    "What kind of entertainment do you find yourself coming back to most?",
+    "When you picture yourself at work, are you on stage, behind the scenes, or online?",
+    "What's something creative you've made or helped make that you were proud of?",
+    "Which tools or skills do you pick up fastest - tech, people, or words?",
+    "Do you do your best work solo or bouncing ideas off a team?",
+    "Would you rather have a steady schedule or jump between projects?",
+]
+
+ACTION_PLAN = """**🎯 Next Steps (This Week)**
+- Pick one project you can finish in 7 days and share it
+- Follow three working professionals in your top path
+- Sign up for a free beginner course
+
+**📚 Skills to Develop**
+- Core tools of the trade: practice 30 minutes a day
+- Communication: explain your work to a friend
+
+**🔗 Resources**
+- YouTube tutorials, free online courses, local community groups
+
+**🌟 Usher's New Look Programs**
+- Career prep and talent development programs can connect you with mentors"""
+
+
+def classify_system_prompt(system: str) -> str:
+    """Work out which node (or the roadmap endpoint) is calling from its system prompt"""
+    if system == prompts.ANALYSIS_SYSTEM:
+        return "analysis"
+    if system == prompts.RECOMMENDATION_SYSTEM:
+        return "recommendation"
+    if system == prompts.ACTION_SYSTEM:
+        return "action"
+    if system == prompts.ACTION_BLOCK_SYSTEM:
+        return "action_block"
+    if system == prompts.ACTION_PERSONALIZE_SYSTEM:
+        return "action_intro"
+    if system == prompts.DISCOVERY_SYSTEM:
+        return "discovery"
+    return "roadmap"
+
+
+def _classify(messages: List[BaseMessage]) -> str:
+    system = next((m.content for m in messages if isinstance(m, SystemMessage)), "")
+    return classify_system_prompt(system)
+
+
+def _rng_for(text: str, seed: int) -> random.Random:
+    """Deterministic RNG keyed by the prompt so equal prompts give equal output"""
+    digest = hashlib.sha256(f"{seed}:{text}".encode("utf-8")).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def canned_profile() -> Dict:
+    """Profile JSON matching ANALYSIS_USER_PROMPT's output format"""
+    return {
+        "interests": ["live music", "making beats", "video content"],
+        "skills": ["audio editing", "attention to detail", "storytelling"],
+        "work_style": ["independent work", "flexible schedule", "hands-on learning"],
+        "constraints": ["budget conscious"],
+    }
+
+
+def canned_recommendations(rng: random.Random) -> List[Dict]:
+    """Three recommendations whose paths exist in the career catalog"""
+    careers = sorted(info["name"] for info in get_career_paths().values())
+    picks = rng.sample(careers, 3)
+    scores = sorted((round(rng.uniform(0.6, 0.95), 2) for _ in picks), reverse=True)
+    return [
+        {
+            "path": name,
+            "fit_score": score,
+            "reasoning": f"Your interest in live music and hands-on work lines up with {name}.",
+            "day_to_day": "A mix of focused solo work, collaboration and learning new tools.",
+        }
+        for name, score in zip(picks, scores)
+    ]
+
+
+def canned_roadmap(goal: str, rng: random.Random) -> Dict:
+    """Roadmap JSON matching ROADMAP_PROMPT's output format"""
+    phase_names = ["Explore", "Foundations", "Practice", "Portfolio", "Network", "Launch"]
+    count = rng.randint(4, 6)
+    return {
+        "title": f"Roadmap to {goal}",
+        "phases": [
+            {
+                "title": phase_names[i],
+                "duration": f"{3 * (i + 1)}-{3 * (i + 2)} months",
+                "steps": [f"{phase_names[i]} step {j + 1} towards {goal}" for j in range(rng.randint(2, 4))],
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def canned_action_block(career: str, rng: random.Random) -> Dict:
+    """Block JSON matching ACTION_BLOCK_PROMPT's output format"""
+    return {
+        "next_steps": [f"{verb} {career} this week" for verb in
+                       rng.sample(["Shadow someone in", "Watch three interviews about", "Try a mini project in",
+                                   "Join an online group about", "Read up on"], 3)],
+        "skills": [
+            {"skill": f"{career} skill {i + 1}", "why": "Used every day on the job",
+             "how": "A free beginner course and 30 minutes of practice a day"}
+            for i in range(rng.randint(3, 4))
+        ],
+        "resources": [f"{kind} for {career}" for kind in ("YouTube channel", "Online course", "Book", "Community")],
+        "usher": "Career prep and talent development programs connect you with mentors in this field.",
+    }
+
+
+def canned_completion(kind: str, prompt: str, seed: int = 0, fence_json: bool = False) -> str:
+    """
+    Canned completion text for a node kind
+
+    Args:
+        kind: "discovery" | "analysis" | "recommendation" | "action" | "action_block"
+            | "action_intro" | "roadmap"
+        prompt: The user prompt (keys the deterministic RNG)
+        seed: Global seed
+        fence_json: Wrap JSON payloads in ```json fences like real models often do
+    """
+    rng = _rng_for(prompt, seed)
+    if kind == "discovery":
+        return rng.choice(DISCOVERY_QUESTIONS)
+    if kind == "action":
+        return ACTION_PLAN
+    if kind == "action_intro":
+        return ("Your love of live music and hands-on work makes this a natural fit. "
+                "Start with the first step this week and build from there.")
+
+    if kind == "analysis":
+        payload = canned_profile()
+    elif kind == "recommendation":
+        payload = canned_recommendations(rng)
+    elif kind == "action_block":
+        career = prompt.split("Career:", 1)[-1].split("\n", 1)[0].strip() or "this career"
+        payload = canned_action_block(career, rng)
+    else:
+        goal = prompt.split("to become:", 1)[-1].split("\n", 1)[0].strip() or "your goal"
+        payload = canned_roadmap(goal, rng)
+
+    text = json.dumps(payload, indent=2)
+    return f"```json\n{text}\n```" if fence_json else text
+
+
+# ============================================================================
+# STUB CHAT MODEL (replaces ChatOpenAI in app/nodes.py)
+# ============================================================================
+
+class StubChatModel(BaseChatModel):
+    """
+    LangChain chat model that sleeps per its latency model and returns canned text
+
+    Honours a per-call `timeout` like the OpenAI client: a response slower
+    than the timeout raises TimeoutError after `timeout` seconds. Like a
+    real model it stops at `max_tokens` (cutting JSON short), and with
+    `invalid_rate` it returns that share of responses cut off mid-way.
+    """
+
+    latency: Any = None
+    seed: int = 0
+    fence_json: bool = False
+    max_tokens: Optional[int] = None
+    invalid_rate: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def _respond(self, messages: List[BaseMessage]) -> tuple:
+        kind = _classify(messages)
+        prompt = messages[-1].content if messages else ""
+        text = canned_completion(kind, prompt, self.seed, self.fence_json)
+        rng = _rng_for(f"invalid:{self.calls}:{prompt}", self.seed)
+        if self.invalid_rate and rng.random() < self.invalid_rate:
+            text = text[:rng.randint(1, max(1, len(text) - 1))]
+        if self.max_tokens and estimate_tokens(text) > self.max_tokens:
+            text = text[:self.max_tokens * 4]
+        delay = self.latency.sample(estimate_tokens(text)) if self.latency else 0.0
+        self.calls += 1
+        return text, delay
+
+    def _result(self, text: str) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _generate(self, messages, stop=None, run_manager=None, timeout=None, **kwargs) -> ChatResult:
+        text, delay = self._respond(messages)
+        if timeout is not None and delay > timeout:
+            time.sleep(max(0.0, timeout))
+            raise TimeoutError("stub request timed out")
+        if delay:
+            time.sleep(delay)
+        return self._result(text)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, timeout=None, **kwargs) -> ChatResult:
+        text, delay = self._respond(messages)
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(max(0.0, timeout))
+            raise TimeoutError("stub request timed out")
+        if delay:
+            await asyncio.sleep(delay)
+        return self._result(text)
+
+
+# ============================================================================
+# STUB OPENAI / GROQ CLIENTS (replace the client in app/roadmap.py)
+# ============================================================================
+
+class _StubCompletions:
+    def __init__(self, owner: "StubOpenAIClient"):
+        self._owner = owner
+
+    def create(self, model: str, messages: List[Dict], stream: bool = False,
+               timeout: Optional[float] = None, **kwargs) -> Any:
+        owner = self._owner
+        prompt = messages[-1]["content"] if messages else ""
+        text = canned_completion("roadmap", prompt, owner.seed, owner.fence_json)
+        tokens = estimate_tokens(text)
+        owner.calls += 1
+        if stream:
+            return self._stream(model, text)
+        delay = owner.latency.sample(tokens) if owner.latency else 0.0
+        if timeout is not None and delay > timeout:
+            time.sleep(max(0.0, timeout))
+            raise TimeoutError("stub request timed out")
+        if delay:
+            time.sleep(delay)
+        return SimpleNamespace(
+            id=f"stub-{owner.calls}",
+            model=model,
+            choices=[SimpleNamespace(index=0, finish_reason="stop",
+                                     message=SimpleNamespace(role="assistant", content=text))],
+            usage=SimpleNamespace(prompt_tokens=estimate_tokens(prompt),
+                                  completion_tokens=tokens,
+                                  total_tokens=estimate_tokens(prompt) + tokens),
+        )
+
+
+    def _stream(self, model: str, text: str):
+        """Yield ChatCompletionChunk-shaped objects, ~4 chars (one token) each"""
+        latency = self._owner.latency
+        if latency:
+            time.sleep(latency.sample_ttft())
+        for start in range(0, len(text), 4):
+            if latency:
+                time.sleep(latency.token_time(1))
+            delta = SimpleNamespace(role="assistant", content=text[start:start + 4])
+            yield SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, delta=delta, finish_reason=None)])
+        yield SimpleNamespace(model=model, choices=[SimpleNamespace(
+            index=0, delta=SimpleNamespace(role=None, content=None), finish_reason="stop")])
+
+
+class StubOpenAIClient:
+    """Mimics `openai.OpenAI().chat.completions.create` for roadmap generation"""
+
+    def __init__(self, latency: Optional[LatencyModel] = None, seed: int = 0, fence_json: bool = True):
+        self.latency = latency
+        self.seed = seed
+        self.fence_json = fence_json
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_StubCompletions(self))
+
+
+class StubGroqClient(StubOpenAIClient):
+    """Groq's client has the same surface; defaults to a faster latency profile"""
+
+    def __init__(self, latency: Optional[LatencyModel] = None, seed: int = 0, fence_json: bool = True):
+        super().__init__(latency or LatencyModel(ttft_ms=150.0, per_token_ms=3.0), seed, fence_json)
+
+
+# ============================================================================
+# SIMULATED MODELS (for comparing model routing tables offline)
+# ============================================================================
+
+# Rough relative speed and reliability per model. Assumptions for offline
+# comparisons only - measure the real thing with model_routing_bench --live.
+MODEL_PROFILES = {
+    "gpt-4o-mini": {"ttft_ms": 400.0, "per_token_ms": 12.0, "invalid_rate": 0.04},
+    "gpt-4o": {"ttft_ms": 550.0, "per_token_ms": 22.0, "invalid_rate": 0.01},
+    "gpt-4.1-nano": {"ttft_ms": 250.0, "per_token_ms": 6.0, "invalid_rate": 0.10},
+    "llama-3.1-70b-versatile": {"ttft_ms": 150.0, "per_token_ms": 3.0, "invalid_rate": 0.06},
+}
+
+
+def stub_llm_factory(time_scale: float = 1.0, seed: int = 0):
+    """
+    Route -> StubChatModel factory for nodes.set_llm_factory
+
+    Latency and the share of broken outputs follow MODEL_PROFILES for the
+    route's model; the broken share grows with temperature.
+    """
+    def factory(route: Dict) -> StubChatModel:
+        profile = MODEL_PROFILES.get(route["model"], MODEL_PROFILES["gpt-4o-mini"])
+        temperature = route.get("temperature") or 0.0
+        latency = LatencyModel(ttft_ms=profile["ttft_ms"], per_token_ms=profile["per_token_ms"],
+                               time_scale=time_scale, seed=seed)
+        return StubChatModel(latency=latency, seed=seed, max_tokens=route.get("max_tokens"),
+                             invalid_rate=profile["invalid_rate"] * (0.5 + temperature))
+    return factory
+
+
+# ============================================================================
+# INSTALLATION
+# ============================================================================
+
+def install_stubs(latency: Optional[LatencyModel] = None, roadmap_latency: Optional[LatencyModel] = None,
+                  seed: int = 0, provider: str = "openai") -> Dict[str, Any]:
+    """
+    Swap the real LLM clients in app.nodes and app.roadmap for stubs
+
+    Args:
+        latency: Latency model for node LLM calls
+        roadmap_latency: Latency model for roadmap calls (defaults to `latency`)
+        seed: Seed for canned outputs
+        provider: "openai" or "groq" roadmap client stub
+
+    Returns:
+        dict with the installed "llm" and "roadmap_client"
+    """
+    from app import nodes, roadmap
+
+    llm = StubChatModel(latency=latency, seed=seed)
+    client_cls = StubGroqClient if provider == "groq" else StubOpenAIClient
+    client = client_cls(latency=roadmap_latency or latency, seed=seed)
+
+    nodes.set_llm(llm)
+    roadmap.set_client(client, use_groq=provider == "groq")
+
+    return {"llm": llm, "roadmap_client": client}
+
+
+__all__ = [
+    'LatencyModel',
+    'StubChatModel',
+    'MODEL_PROFILES',
+    'stub_llm_factory',
+    'StubOpenAIClient',
+    'StubGroqClient',
+    'canned_completion',
+    'classify_system_prompt',
+    'estimate_tokens',
+    'install_stubs',
+]